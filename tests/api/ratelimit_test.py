@@ -0,0 +1,75 @@
+import asyncio
+import time
+from datetime import timedelta
+
+import pytest
+
+from yui.api.ratelimit import MAX_INTERVAL
+from yui.api.ratelimit import TokenBucket
+from yui.api.ratelimit import get_retry_after
+
+
+def test_get_retry_after():
+    assert get_retry_after({'Retry-After': '30'}) == 30.0
+    assert get_retry_after({'Retry-After': '-1'}) == 0.0
+    assert get_retry_after({'Retry-After': 'soon'}) == 1.0
+    assert get_retry_after({}) == 1.0
+    assert get_retry_after({}, 5.0) == 5.0
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_fifo():
+    bucket = TokenBucket(0.05)
+    order: list[int] = []
+
+    async def call(i: int):
+        await bucket.acquire()
+        order.append(i)
+
+    started_at = time.monotonic()
+    await asyncio.gather(*[call(i) for i in range(4)])
+    elapsed = time.monotonic() - started_at
+
+    assert order == [0, 1, 2, 3]
+    # first token is ready at start, others wait one interval each
+    assert 0.14 <= elapsed < 0.5
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_penalize():
+    bucket = TokenBucket(0.01)
+    await bucket.acquire()
+
+    bucket.penalize(0.1)
+    assert bucket.interval == 0.02
+
+    started_at = time.monotonic()
+    await bucket.acquire()
+    assert time.monotonic() - started_at >= 0.09
+
+    bucket.reward()
+    assert bucket.interval == pytest.approx(0.018)
+    for _ in range(100):
+        bucket.reward()
+    assert bucket.interval == 0.01
+
+    for _ in range(20):
+        bucket.penalize(0)
+    assert bucket.interval == MAX_INTERVAL
+
+
+def test_rate_limiter(bot):
+    limiter = bot.api.rate_limiter
+    bot.api.throttle_interval['test.method'] = timedelta(seconds=3)
+
+    bucket = limiter.get_bucket('test.method')
+    assert bucket.interval == 3.0
+    assert limiter.get_bucket('test.method') is bucket
+
+    limiter.penalize('test.method', 10)
+    assert bucket.interval == 6.0
+    limiter.reward('test.method')
+    assert bucket.interval == pytest.approx(5.4)
+
+    limiter.reward('not.used')
+    assert 'not.used' not in limiter.buckets
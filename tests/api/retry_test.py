@@ -0,0 +1,40 @@
+from yui.api.retry import RetryPolicy
+from yui.types.slack.response import APIResponse
+
+
+def response(status: int, body, headers=None) -> APIResponse:
+    return APIResponse(body=body, status=status, headers=headers or {})
+
+
+def test_retry_policy_get_backoff():
+    policy = RetryPolicy(base_delay=1.0, max_delay=5.0)
+
+    for attempt in range(10):
+        assert 0 <= policy.get_backoff(attempt) <= min(5.0, pow(2, attempt))
+
+
+def test_retry_policy_get_delay():
+    policy = RetryPolicy(base_delay=0.0)
+    not_idempotent = RetryPolicy(base_delay=0.0, idempotent=False)
+
+    ok = response(200, {'ok': True})
+    assert policy.get_delay(0, ok) is None
+
+    error = response(200, {'ok': False, 'error': 'channel_not_found'})
+    assert policy.get_delay(0, error) is None
+
+    rate_limited = response(429, 'ratelimited', {'Retry-After': '3'})
+    assert policy.get_delay(0, rate_limited) == 3.0
+    assert not_idempotent.get_delay(0, rate_limited) == 3.0
+
+    rate_limited = response(200, {'ok': False, 'error': 'ratelimited'})
+    assert policy.get_delay(0, rate_limited) == 0.0
+    assert not_idempotent.get_delay(0, rate_limited) == 0.0
+
+    for transient in [
+        response(503, 'Service Unavailable'),
+        response(200, {'ok': False, 'error': 'internal_error'}),
+        None,
+    ]:
+        assert policy.get_delay(0, transient) == 0.0
+        assert not_idempotent.get_delay(0, transient) is None
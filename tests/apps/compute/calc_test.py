@@ -1,15 +1,25 @@
+import ast
 import asyncio
+import decimal
 import math
+import time
 from concurrent.futures.process import ProcessPoolExecutor
 from datetime import date
 from datetime import datetime
 
 import pytest
 
+from yui.apps.compute import calc
 from yui.apps.compute.calc import BadSyntax
 from yui.apps.compute.calc import Decimal as D
 from yui.apps.compute.calc import Evaluator
+from yui.apps.compute.calc import TooExpensive
+from yui.apps.compute.calc import calc_decimal
 from yui.apps.compute.calc import calculate
+from yui.apps.compute.calc import calculate_and_render
+from yui.apps.compute.calc import estimate_pow_cost
+from yui.apps.compute.calc import validate
+from yui.utils.sandbox import SandboxPool
 
 from ...util import FakeBot
 
@@ -750,6 +760,187 @@ def test_yield_from():
     assert 'x' not in e.symbol_table
 
 
+def test_compile():
+    e = Evaluator()
+    code = e.compile(ast.parse('x += 1\n[y for y in range(x)]'))
+    e.symbol_table['x'] = 0
+    assert code() == [0]
+    assert code() == [0, 1]
+    assert e.symbol_table == {'x': 2}
+
+    # refused syntax is raised when it is reached
+    code = e.compile(ast.parse('x = 10\nimport os'))
+    with pytest.raises(BadSyntax, match='You can not import anything'):
+        code()
+    assert e.symbol_table == {'x': 10}
+
+
+def test_budget():
+    e = Evaluator()
+    assert e.run('x = 0\nfor i in range(10):\n    x += i\nx') == 45
+    assert 0 < e.cost < 1000
+
+    for expr in [
+        '9 ** 9 ** 9',
+        '2 ** 10 ** 7',
+        '1 << 10 ** 10',
+        "'a' * 10 ** 9",
+        'math.factorial(10 ** 6)',
+        'int(Decimal("1e1000000"))',
+    ]:
+        e = Evaluator()
+        with pytest.raises(TooExpensive):
+            e.run(expr)
+        # refused before running operation
+        assert e.cost > e.budget
+
+    for expr in [
+        'while True:\n    pass',
+        'x = 0\nfor i in range(10 ** 9):\n    x += 1',
+        '[x for x in range(10 ** 9)]',
+    ]:
+        e = Evaluator(budget=10000)
+        with pytest.raises(TooExpensive):
+            e.run(expr)
+
+    # budget is reset at each run
+    e = Evaluator(budget=10000)
+    assert e.run('[x for x in range(1000)]') == list(range(1000))
+    assert e.run('[x for x in range(1000)]') == list(range(1000))
+    assert e.run('2 ** 1000') == 2**1000
+
+
+def test_budget_iteration():
+    # builtins go through their arguments in C, so cost is by length
+    for expr in [
+        'sum(range(10 ** 8))',
+        'max(range(10 ** 8))',
+        'sorted(range(10 ** 8))',
+        'set(range(10 ** 100))',
+        'list(map(abs, range(10 ** 8)))',
+        'dict(zip(range(10 ** 8), range(10 ** 8)))',
+        'functools.reduce(operator.add, range(10 ** 8))',
+        'bytes(10 ** 9)',
+    ]:
+        e = Evaluator()
+        with pytest.raises(TooExpensive):
+            e.run(expr)
+        assert e.cost > e.budget
+
+    e = Evaluator()
+    assert e.run('sum(range(1000))') == 499500
+    assert 1000 < e.cost < 2000
+    assert e.run('max(1, 2, 3)') == 3
+    assert e.cost < 100
+
+
+def test_budget_decimal_pow():
+    e = Evaluator(decimal_mode=True)
+    assert e.run('Decimal(2) ** 10') == D(1024)
+    small = e.cost
+    with pytest.raises(decimal.Overflow):
+        e.run('Decimal(2) ** 10 ** 18')
+    assert small < e.cost < 1000
+
+    # squaring stops at 64 bits of exponent. huge one only costs conversion
+    assert estimate_pow_cost(D(2), 10) < estimate_pow_cost(D(2), 2**64)
+    assert estimate_pow_cost(D(2), D(2**64)) == estimate_pow_cost(
+        D(2), D(10**100)
+    )
+    assert estimate_pow_cost(D(2), 10**100000) > estimate_pow_cost(
+        D(2), 10**100
+    )
+
+
+def test_render():
+    e = Evaluator()
+    for value in [
+        1,
+        True,
+        None,
+        1.5,
+        'a\nb',
+        [1, 'a', (2,), {3}, frozenset()],
+        {'k': [D('1.50'), set()]},
+        range(3),
+    ]:
+        assert e.render(value) == str(value)
+        assert e.render(value, as_repr=True) == repr(value)
+
+    a = [1]
+    a.append(a)
+    assert e.render(a) == '[1, [...]]'
+
+    assert e.render(10**5000) == (
+        '10000000000000000000...00000000000000000000 (5001 digits)'
+    )
+    assert e.render(-(3**10000)) == (
+        '-16313501853426258743...41498105206552200001 (4772 digits)'
+    )
+    assert e.render(D(10**5000)) == (
+        '10000000000000000000...00000000000000000000 (5001 digits)'
+    )
+    assert e.render('x' * 10000, as_repr=True) == repr('x' * 1500)[:1500]
+    assert len(e.render(list(range(10**6)))) == 1500
+
+    # preview without leading digits when budget is short
+    e = Evaluator(budget=10000)
+    assert e.render(3**100000) == (
+        '...74250669865522000001 (about 47713 digits)'
+    )
+
+
+def test_calculate_and_render():
+    result, local = calculate_and_render(
+        'x = 10 ** 5000\nx + 1',
+        decimal_mode=False,
+    )
+    assert result == (
+        '10000000000000000000...00000000000000000001 (5001 digits)'
+    )
+    assert local == (
+        'x = 10000000000000000000...00000000000000000000 (5001 digits)'
+    )
+
+    result, local = calculate_and_render(
+        'x = Decimal("1" * 2000)',
+        decimal_mode=False,
+    )
+    assert result is None
+    assert local == (
+        "x = Decimal('11111111111111111111...11111111111111111111')"
+        ' (2000 digits)'
+    )
+
+    result, local = calculate_and_render('a = 1\nb = [a]', decimal_mode=False)
+    assert result is None
+    assert local == 'a = 1\nb = [1]'
+
+
+def test_validate():
+    assert validate('a = [x * 2 for x in range(10)]; sum(a)')
+    assert validate('"{}".format(x.y)')
+
+    with pytest.raises(SyntaxError):
+        validate('1 +')
+
+    with pytest.raises(BadSyntax, match='You can not import anything'):
+        validate('import os')
+
+    with pytest.raises(BadSyntax, match='You can not import anything'):
+        validate('if False:\n    import os')
+
+    err = 'Defining new function via lambda syntax is not allowed'
+    with pytest.raises(BadSyntax, match=err):
+        validate('sorted([1, 2], key=lambda x: -x)')
+
+    with pytest.raises(NotImplementedError):
+        validate('f(*x)')
+
+    # too long input is left to worker
+    assert validate('1+' * 5000 + '1') is None
+
+
 @pytest.fixture(scope='module')
 def event_loop():
     loop = asyncio.new_event_loop()
@@ -882,3 +1073,26 @@ async def test_calculate_fine(
         assert type(expected) == type(local)
 
         assert expected == local
+
+
+@pytest.mark.asyncio
+async def test_calc_busy(bot, monkeypatch):
+    pool = SandboxPool(size=1, timeout=5, acquire_timeout=0.1)
+    monkeypatch.setattr(calc, 'calc_pool', pool)
+    bot.add_channel('C1', 'general')
+    bot.add_user('U1', 'tester')
+    event = bot.create_message('C1', 'U1', ts='1234.5678')
+    try:
+        job = asyncio.ensure_future(pool.run(time.sleep, 0.5))
+        await asyncio.sleep(0.05)
+        await calc_decimal(bot, event, '1+2')
+        await job
+    finally:
+        await pool.close()
+
+    said = bot.call_queue.pop(0)
+    assert said.method == 'chat.postMessage'
+    assert said.data['channel'] == 'C1'
+    assert said.data['text'] == (
+        '지금은 계산 요청이 너무 많아서 계산하지 못했어요! 잠시 후에 다시 시도해주세요!'
+    )
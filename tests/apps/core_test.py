@@ -0,0 +1,372 @@
+import asyncio
+
+import pytest
+
+from yui.apps.core import on_channel_archive
+from yui.apps.core import on_channel_changed
+from yui.apps.core import on_channel_gone
+from yui.apps.core import on_channel_marked
+from yui.apps.core import on_channel_unarchive
+from yui.apps.core import on_start
+from yui.apps.core import on_team_join
+from yui.apps.core import on_user_change
+from yui.apps.core import refresh_users
+from yui.event import create_event
+from yui.snapshot import Snapshot
+from yui.snapshot import load_snapshot
+from yui.snapshot import save_snapshot
+from yui.types.slack.response import APIResponse
+
+from ..util import FakeBot
+
+
+@pytest.mark.asyncio
+async def test_on_start(bot):
+    channels = {
+        'C1': {'id': 'C1', 'name': 'general', 'is_channel': True},
+        'C2': {'id': 'C2', 'name': 'random', 'is_channel': True},
+        'G1': {'id': 'G1', 'name': 'secret', 'is_group': True},
+        'D1': {'id': 'D1', 'user': 'U2', 'is_im': True},
+    }
+    for channel in channels.values():
+        channel['last_read'] = 0
+        if 'name' in channel:
+            channel['creator'] = 'U1'
+    users = [
+        {'id': 'U1', 'team_id': 'T0', 'name': 'kirito'},
+        {'id': 'U2', 'team_id': 'T0', 'name': 'asuna'},
+    ]
+
+    def make_response(body):
+        return APIResponse(body=body, status=200, headers={})
+
+    @bot.response('conversations.list')
+    def conversations_list(data):
+        if data.get('cursor') == 'next':
+            return make_response(
+                {'ok': True, 'channels': [{'id': 'G1'}, {'id': 'D1'}]}
+            )
+        return make_response(
+            {
+                'ok': True,
+                'channels': [{'id': 'C1'}, {'id': 'C2'}, {'id': 'C3'}],
+                'response_metadata': {'next_cursor': 'next'},
+            }
+        )
+
+    @bot.response('conversations.info')
+    def conversations_info(data):
+        if data['channel'] not in channels:
+            return make_response({'ok': False, 'error': 'channel_not_found'})
+        return make_response(
+            {'ok': True, 'channel': channels[data['channel']]}
+        )
+
+    @bot.response('users.list')
+    def users_list(data):
+        if data.get('cursor') == 'next':
+            return make_response({'ok': True, 'members': users[1:]})
+        return make_response(
+            {
+                'ok': True,
+                'members': users[:1],
+                'response_metadata': {'next_cursor': 'next'},
+            }
+        )
+
+    assert not bot.is_ready
+
+    assert await on_start(bot)
+    await bot.registry.hydration
+
+    assert bot.is_ready
+    assert [u.name for u in bot.users] == ['kirito', 'asuna']
+    assert [c.name for c in bot.channels] == ['general', 'random']
+    assert [g.name for g in bot.groups] == ['secret']
+    assert [d.id for d in bot.ims] == ['D1']
+    assert bot.ims.get('D1').user is bot.users.get('U2')
+
+    methods = [call.method for call in bot.call_queue]
+    assert methods.count('conversations.list') == 2
+    assert methods.count('conversations.info') == 5
+    assert methods.count('users.list') == 2
+
+
+@pytest.mark.asyncio
+async def test_on_start_retry(bot, monkeypatch):
+    calls = []
+    waits = []
+
+    def make_response(body):
+        return APIResponse(body=body, status=200, headers={})
+
+    @bot.response('conversations.list')
+    def conversations_list(data):
+        return make_response({'ok': True, 'channels': []})
+
+    @bot.response('users.list')
+    def users_list(data):
+        calls.append(data)
+        if len(calls) <= 2:
+            return make_response({'ok': False, 'error': 'ratelimited'})
+        return make_response(
+            {
+                'ok': True,
+                'members': [{'id': 'U1', 'team_id': 'T0', 'name': 'kirito'}],
+            }
+        )
+
+    async def sleep(delay):
+        waits.append((delay, bot.is_ready))
+
+    assert await on_start(bot)
+    monkeypatch.setattr(asyncio, 'sleep', sleep)
+    await bot.registry.hydration
+
+    # not ready with empty registry while loading fails
+    assert waits == [(1.0, False), (2.0, False)]
+    assert bot.is_ready
+    assert [u.name for u in bot.users] == ['kirito']
+
+
+@pytest.mark.asyncio
+async def test_on_start_keep_changes(bot, monkeypatch):
+    bot.add_user('U1', 'kirito')
+    bot.add_channel('C1', 'general')
+    channels = {
+        'C1': {'id': 'C1', 'name': 'general', 'creator': 'U1'},
+        'C2': {'id': 'C2', 'name': 'random', 'creator': 'U1'},
+    }
+    for channel in channels.values():
+        channel.update(last_read=0, is_channel=True)
+    users_loaded = asyncio.Event()
+
+    def make_response(body):
+        return APIResponse(body=body, status=200, headers={})
+
+    @bot.response('conversations.list')
+    def conversations_list(data):
+        return make_response({'ok': True, 'channels': list(channels.values())})
+
+    @bot.response('conversations.info')
+    def conversations_info(data):
+        return make_response(
+            {'ok': True, 'channel': channels[data['channel']]}
+        )
+
+    @bot.response('users.list')
+    def users_list(data):
+        return make_response(
+            {
+                'ok': True,
+                'members': [{'id': 'U1', 'team_id': 'T0', 'name': 'kirito'}],
+            }
+        )
+
+    call = bot.call
+
+    async def slow_call(method, data=None, **kwargs):
+        if method == 'users.list':
+            await users_loaded.wait()
+        return await call(method, data, **kwargs)
+
+    monkeypatch.setattr(bot, 'call', slow_call)
+
+    assert await on_start(bot)
+    await asyncio.sleep(0)
+
+    # events while loading
+    event = create_event(
+        'channel_rename',
+        {'channel': {'id': 'C1', 'name': 'notice', 'created': 0}},
+    )
+    assert await on_channel_changed(bot, event)
+    event = create_event('channel_deleted', {'channel': 'C2'})
+    assert await on_channel_gone(bot, event)
+    event = create_event(
+        'user_change',
+        {'user': {'id': 'U1', 'team_id': 'T0', 'name': 'kazuto'}},
+    )
+    assert await on_user_change(bot, event)
+    assert bot.registry.changed_ids == {'C1', 'C2', 'U1'}
+
+    users_loaded.set()
+    await bot.registry.hydration
+
+    # loaded data did not revert them
+    assert [c.name for c in bot.channels] == ['notice']
+    assert bot.users.get('U1').name == 'kazuto'
+    assert not bot.registry.changed_ids
+
+    # changes are not tracked after loading
+    event = create_event('channel_deleted', {'channel': 'C1'})
+    assert await on_channel_gone(bot, event)
+    assert not bot.registry.changed_ids
+
+
+@pytest.mark.asyncio
+async def test_on_start_snapshot(bot_config, tmp_path):
+    bot_config.SNAPSHOT_PATH = str(tmp_path / 'workspace.json')
+    bot = FakeBot(bot_config)
+    general = {
+        'id': 'C1',
+        'name': 'general',
+        'creator': 'U1',
+        'last_read': 0,
+        'is_channel': True,
+    }
+    random = dict(general, id='C2', name='random')
+    kirito = {'id': 'U1', 'team_id': 'T0', 'name': 'kirito'}
+    asuna = {'id': 'U2', 'team_id': 'T0', 'name': 'asuna'}
+    save_snapshot(
+        bot_config.SNAPSHOT_PATH,
+        Snapshot(users=[kirito], channels=[general]),
+    )
+    seen = []
+
+    def make_response(body):
+        return APIResponse(body=body, status=200, headers={})
+
+    @bot.response('conversations.list')
+    def conversations_list(data):
+        seen.append((bot.is_ready, [c.name for c in bot.channels]))
+        return make_response({'ok': True, 'channels': [general, random]})
+
+    @bot.response('conversations.info')
+    def conversations_info(data):
+        channel = general if data['channel'] == 'C1' else random
+        return make_response({'ok': True, 'channel': channel})
+
+    @bot.response('users.list')
+    def users_list(data):
+        return make_response({'ok': True, 'members': [kirito, asuna]})
+
+    assert await on_start(bot)
+
+    # handler returns right after loading snapshot
+    assert bot.is_ready
+    assert [c.name for c in bot.channels] == ['general']
+    assert not bot.registry.hydration.done()
+    await bot.registry.hydration
+
+    # snapshot was used before reconciling with Slack
+    assert seen == [(True, ['general'])]
+    assert [u.name for u in bot.users] == ['kirito', 'asuna']
+    assert [c.name for c in bot.channels] == ['general', 'random']
+
+    snapshot = load_snapshot(bot_config.SNAPSHOT_PATH)
+    assert snapshot.users == [kirito, asuna]
+    assert snapshot.channels == [general, random]
+
+
+@pytest.mark.asyncio
+async def test_channel_events(bot):
+    bot.add_channel('C1', 'general')
+    bot.add_private_channel('G1', 'secret')
+
+    @bot.response('conversations.info')
+    def conversations_info(data):
+        return APIResponse(
+            body={
+                'ok': True,
+                'channel': {
+                    'id': data['channel'],
+                    'name': 'notice',
+                    'creator': 'U0',
+                    'is_channel': True,
+                },
+            },
+            status=200,
+            headers={},
+        )
+
+    try:
+        event = create_event(
+            'channel_archive', {'channel': 'C1', 'user': 'U0'}
+        )
+        assert await on_channel_archive(bot, event)
+        assert bot.channels.get('C1').is_archived
+
+        event = create_event(
+            'channel_unarchive', {'channel': 'C1', 'user': 'U0'}
+        )
+        assert await on_channel_unarchive(bot, event)
+        assert not bot.channels.get('C1').is_archived
+
+        event = create_event('channel_marked', {'channel': 'C1', 'ts': '1.2'})
+        assert await on_channel_marked(bot, event)
+        assert bot.channels.get('C1').last_read == '1.2'
+
+        event = create_event(
+            'channel_rename',
+            {'channel': {'id': 'C1', 'name': 'notice', 'created': 0}},
+        )
+        assert await on_channel_changed(bot, event)
+        assert bot.channels.get_by_name('notice').id == 'C1'
+        assert bot.channels.get_by_name('general') is None
+
+        event = create_event(
+            'channel_created',
+            {'channel': {'id': 'C2', 'name': 'random', 'creator': 'U0'}},
+        )
+        assert await on_channel_changed(bot, event)
+        assert bot.channels.get_by_name('random').id == 'C2'
+
+        event = create_event('group_left', {'channel': 'G1'})
+        assert await on_channel_gone(bot, event)
+        assert not bot.groups
+
+        # known channels and complete payloads need no API call
+        assert not bot.call_queue
+        assert not bot.registry.channel_resync.pending
+
+        event = create_event(
+            'channel_archive', {'channel': 'C3', 'user': 'U0'}
+        )
+        assert await on_channel_archive(bot, event)
+        assert bot.channels.get('C3').name == 'notice'
+        assert [c.method for c in bot.call_queue] == ['conversations.info']
+        assert not bot.registry.channel_resync.pending
+    finally:
+        bot.registry.cancel_pending()
+
+
+@pytest.mark.asyncio
+async def test_user_events(bot):
+    old = bot.add_user('U1', 'kirito')
+
+    @bot.response('users.info')
+    def users_info(data):
+        return APIResponse(
+            body={
+                'ok': True,
+                'user': {'id': data['user'], 'team_id': 'T0', 'name': 'yuuki'},
+            },
+            status=200,
+            headers={},
+        )
+
+    try:
+        event = create_event(
+            'user_change',
+            {'user': {'id': 'U1', 'team_id': 'T0', 'name': 'kazuto'}},
+        )
+        assert await on_user_change(bot, event)
+        assert bot.users.get('U1') is event.user
+        assert bot.users.get('U1') is not old
+        assert bot.users.get_by_name('kazuto').id == 'U1'
+        assert not bot.call_queue
+        assert not bot.registry.user_refresh.pending
+
+        event = create_event('team_join', {'user': {'id': 'U2'}})
+        assert await on_team_join(bot, event)
+        assert bot.users.get('U2') is None
+        assert bot.registry.pending_user_ids == {'U2'}
+        assert bot.registry.user_refresh.pending
+
+        await refresh_users(bot)
+        assert not bot.registry.pending_user_ids
+        assert bot.users.get('U2').name == 'yuuki'
+        assert [c.method for c in bot.call_queue] == ['users.info']
+    finally:
+        bot.registry.cancel_pending()
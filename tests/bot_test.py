@@ -2,11 +2,23 @@ import asyncio
 from collections import defaultdict
 from datetime import timedelta
 
+import aiohttp
+
 import pytest
 
 from yui.api import SlackAPI
+from yui.api.retry import RetryPolicy
+from yui.bot import APICallError
 from yui.bot import Bot
+from yui.bot import RECONNECT_DELAY
+from yui.bot import RECONNECT_MAX_DELAY
+from yui.bot import next_reconnect_delay
+from yui.bot import peek_event_type
 from yui.box import Box
+from yui.dispatcher import Dispatcher
+from yui.event import create_event
+from yui.event_queue import EventQueue
+from yui.registry import Registry
 from yui.types.slack.response import APIResponse
 from yui.utils import json
 
@@ -23,19 +35,115 @@ def test_bot_init(event_loop, monkeypatch, bot_config):
     bot = Bot(bot_config, event_loop, using_box=box)
 
     assert bot.config == bot_config
-    assert bot.channels == []
-    assert bot.ims == []
-    assert bot.groups == []
+    assert isinstance(bot.registry, Registry)
+    assert bot.channels is bot.registry.channels
+    assert not bot.channels
+    assert not bot.ims
+    assert not bot.groups
+    assert not bot.users
     assert bot.restart is False
     assert isinstance(bot.api, SlackAPI)
     assert bot.box is box
-    assert isinstance(bot.queue, asyncio.Queue)
+    assert isinstance(bot.queue, EventQueue)
+    assert bot.queue.policies['low'].policy == 'drop_oldest'
+    assert isinstance(bot.dispatcher, Dispatcher)
+    assert bot.dispatcher.concurrency == bot_config.DISPATCH_CONCURRENCY
     assert importlib.import_queue == [
         'yui.app1',
         'yui.app2',
     ]
 
 
+@pytest.mark.asyncio
+async def test_dispatch(event_loop, bot_config):
+    box = Box()
+    called = []
+
+    @box.on('hello', needs_registry=False)
+    async def stateless():
+        called.append('stateless')
+        return True
+
+    @box.on('hello')
+    async def first():
+        called.append('first')
+        return False
+
+    @box.on('hello')
+    async def second():
+        called.append('second')
+        return True
+
+    bot = Bot(bot_config, event_loop, using_box=box)
+    await bot.dispatch(create_event('hello', {}))
+
+    assert called == ['stateless']
+
+    called.clear()
+    bot.is_ready = True
+    await bot.dispatch(create_event('hello', {}))
+
+    assert called == ['stateless', 'first']
+
+
+def test_peek_event_type():
+    assert peek_event_type('{"type":"hello"}') == 'hello'
+    assert peek_event_type(' { "type" : "user_typing", "id": 1}') == (
+        'user_typing'
+    )
+    assert peek_event_type('{"id":1,"type":"hello"}') is None
+    assert peek_event_type('[]') is None
+
+
+@pytest.mark.asyncio
+async def test_receive(event_loop, bot_config):
+    box = Box()
+
+    @box.on('hello')
+    async def hello():
+        pass
+
+    @box.on('message')
+    async def message():
+        pass
+
+    class FakeWebSocket:
+        def __init__(self, frames):
+            self.closed = False
+            self.messages = [
+                aiohttp.WSMessage(aiohttp.WSMsgType.TEXT, frame, None)
+                for frame in frames
+            ]
+
+        async def receive(self):
+            if self.messages:
+                return self.messages.pop(0)
+            return aiohttp.WSMessage(aiohttp.WSMsgType.CLOSED, None, None)
+
+    bot = Bot(bot_config, event_loop, using_box=box)
+    ws = FakeWebSocket(
+        [
+            '{"type":"hello"}',
+            '{"type":"user_typing","channel":"C1","user":"U1"}',
+            '{"type":"message","subtype":"bot_message","text":"hi"}',
+            '{"type":"message","channel":"C1","user":"U1","text":"hi",'
+            '"ts":"1.2"}',
+            '{"type":"pong","reply_to":1}',
+        ]
+    )
+    await bot.receive(ws)
+
+    assert bot.queue.qsize() == 2
+    # message is in higher lane
+    assert bot.queue.get_nowait().type == 'message'
+    assert bot.queue.get_nowait().type == 'hello'
+    assert bot.dropped_events == {
+        'user_typing': 1,
+        'message': 1,
+        'pong': 1,
+    }
+
+
 @pytest.mark.asyncio
 async def test_call(event_loop, bot_config, response_mock):
     token = 'asdf1234'
@@ -110,3 +218,181 @@ async def test_call(event_loop, bot_config, response_mock):
         status=200,
         headers={'content-type': 'application/json'},
     )
+
+    assert bot.api_stats.calls == 5
+    assert bot.api_stats.errors == 0
+
+    session = bot.session
+    assert session is not None
+    assert bot.get_session() is session
+
+    await bot.close()
+    assert session.closed
+    assert bot.session is None
+
+
+@pytest.mark.asyncio
+async def test_reset_session(event_loop, bot_config):
+    box = Box()
+    bot = Bot(bot_config, event_loop, using_box=box)
+
+    session = bot.get_session()
+    bot.session_in_use[session] += 1
+    await bot.reset_session()
+    assert bot.session is None
+    # keep running session until api call is finished
+    assert not session.closed
+
+    new_session = bot.get_session()
+    assert new_session is not session
+    await bot.close()
+    assert new_session.closed
+    await session.close()
+
+
+@pytest.mark.asyncio
+async def test_call_retry(event_loop, bot_config, response_mock):
+    response_mock.post(
+        'https://slack.com/api/test.retry',
+        body=json.dumps({'ok': False, 'error': 'ratelimited'}),
+        headers={'content-type': 'application/json', 'Retry-After': '0'},
+        status=429,
+    )
+    response_mock.post(
+        'https://slack.com/api/test.retry',
+        body='Internal Server Error',
+        content_type='text/plain',
+        status=500,
+    )
+    response_mock.post(
+        'https://slack.com/api/test.retry',
+        body=json.dumps({'ok': True}),
+        headers={'content-type': 'application/json'},
+        status=200,
+    )
+    response_mock.post(
+        'https://slack.com/api/test.post',
+        body='Internal Server Error',
+        content_type='text/plain',
+        status=500,
+    )
+    response_mock.post(
+        'https://slack.com/api/test.fail',
+        exception=aiohttp.ClientError(),
+        repeat=True,
+    )
+
+    box = Box()
+    bot = Bot(bot_config, event_loop, using_box=box)
+    bot.api.throttle_interval = defaultdict(lambda: timedelta(0))
+    bot.api.retry_policy['test.retry'] = RetryPolicy(base_delay=0)
+    bot.api.retry_policy['test.post'] = RetryPolicy(
+        base_delay=0,
+        idempotent=False,
+    )
+    bot.api.retry_policy['test.fail'] = RetryPolicy(
+        base_delay=0,
+        max_attempts=3,
+    )
+
+    res = await bot.call('test.retry')
+    assert res.status == 200
+    assert res.body == {'ok': True}
+    assert bot.api.rate_limiter.buckets['test.retry'].interval == 0
+
+    res = await bot.call('test.post')
+    assert res.status == 500
+
+    with pytest.raises(APICallError):
+        await bot.call('test.fail')
+
+    assert bot.api_stats.calls == 7
+    assert bot.api_stats.errors == 3
+
+    await bot.close()
+
+
+def test_next_reconnect_delay():
+    assert next_reconnect_delay(0.0) == RECONNECT_DELAY
+    assert next_reconnect_delay(RECONNECT_DELAY) == RECONNECT_DELAY * 2
+    assert next_reconnect_delay(RECONNECT_MAX_DELAY) == RECONNECT_MAX_DELAY
+
+
+@pytest.mark.asyncio
+async def test_request_system_start(event_loop, bot_config):
+    box = Box()
+    called = []
+
+    @box.on('chatterbox_system_start', needs_registry=False)
+    async def on_start():
+        called.append('start')
+        return True
+
+    bot = Bot(bot_config, event_loop, using_box=box)
+
+    # start event is coalesced while previous one is pending
+    assert await bot.request_system_start()
+    assert not await bot.request_system_start()
+    assert bot.queue.qsize() == 1
+
+    await bot.dispatch(bot.queue.get_nowait())
+    assert called == ['start']
+    assert await bot.request_system_start()
+
+
+@pytest.mark.asyncio
+async def test_connect_backoff(event_loop, bot_config, monkeypatch):
+    bot = Bot(bot_config, event_loop, using_box=Box())
+    responses: list = [
+        aiohttp.ClientError('fail'),
+        APIResponse(body={'ok': False}, status=200, headers={}),
+        aiohttp.ClientError('fail'),
+        asyncio.CancelledError(),
+    ]
+    delays = []
+
+    async def call(method, *args, **kwargs):
+        response = responses.pop(0)
+        if isinstance(response, BaseException):
+            raise response
+        return response
+
+    async def sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(bot, 'call', call)
+    monkeypatch.setattr(asyncio, 'sleep', sleep)
+
+    with pytest.raises(asyncio.CancelledError):
+        await bot.connect()
+
+    assert delays == [
+        RECONNECT_DELAY,
+        RECONNECT_DELAY * 2,
+        RECONNECT_DELAY * 4,
+    ]
+    # failed connection does not request workspace hydration
+    assert bot.queue.qsize() == 0
+
+
+@pytest.mark.asyncio
+async def test_close(event_loop, bot_config):
+    box = Box()
+    called = []
+
+    @box.on_shutdown
+    async def broken():
+        called.append('broken')
+        raise RuntimeError('broken')
+
+    @box.on_shutdown
+    async def close_pool():
+        called.append('close_pool')
+
+    assert box.shutdown_hooks == [broken, close_pool]
+
+    bot = Bot(bot_config, event_loop, using_box=box)
+    await bot.close()
+
+    # failed hook does not stop others
+    assert called == ['broken', 'close_pool']
@@ -0,0 +1,42 @@
+import pytest
+
+from sqlalchemy.orm import Session
+
+from yui.box.apps.base import BaseApp
+from yui.event import create_event
+from yui.orm import EngineConfig
+from yui.orm import session_counter
+from yui.types.handler import Handler
+
+
+@pytest.mark.asyncio
+async def test_call_handler(bot, fx_engine):
+    bot.config.DATABASE_ENGINE = fx_engine
+    app = BaseApp()
+    event = create_event('message', {'channel': 'C1', 'user': 'U0'})
+    calls = []
+
+    async def lite(bot, event, foo):
+        calls.append((bot, event, foo))
+        return True
+
+    async def heavy(bot, sess, engine_config):
+        assert isinstance(sess, Session)
+        calls.append(engine_config)
+
+    created = session_counter['created']
+    assert await app.call_handler(
+        Handler(lite),
+        bot=bot,
+        event=event,
+        kwargs={'foo': 1},
+    )
+    assert calls.pop() == (bot, event, 1)
+    assert session_counter['created'] == created
+
+    assert await app.call_handler(Handler(heavy), bot=bot, event=event) is None
+    assert calls.pop() == EngineConfig(
+        url=bot.config.DATABASE_URL,
+        echo=bot.config.DATABASE_ECHO,
+    )
+    assert session_counter['created'] == created + 1
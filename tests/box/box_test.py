@@ -1,5 +1,7 @@
 from yui.box import Box
 from yui.box.apps.basic import App
+from yui.box.apps.route import Route
+from yui.box.apps.route import RouteApp
 from yui.event import Hello
 
 
@@ -89,3 +91,123 @@ def test_box_class():
     testapp = Test(handler=test4, type='message', subtype=None)
     box.register(testapp)
     assert box.apps.pop() == testapp
+
+
+def test_box_get_apps(bot):
+    box = Box()
+
+    @box.on(Hello)
+    async def on_hello():
+        pass
+
+    @box.on('message')
+    async def on_message():
+        pass
+
+    @box.command('test', aliases=['t'])
+    async def command_test():
+        pass
+
+    @box.on('message', subtype='*')
+    async def on_any_message():
+        pass
+
+    @box.command('edited', subtype='message_changed')
+    async def command_edited():
+        pass
+
+    class Custom(App):
+        async def run(self, bot, event, *, tokens=None):
+            return True
+
+    class Sample(RouteApp):
+        name = 'sample'
+
+        def __init__(self):
+            self.route_list = [Route('add', self.add)]
+
+        async def add(self):
+            pass
+
+    custom = Custom('hello', None, on_hello)
+    sample = Sample()
+    box.register(custom)
+    box.register(sample)
+
+    hello, message, test, any_message, edited = box.apps[:5]
+
+    assert box.get_apps(Hello()) == [hello, custom]
+
+    event = bot.create_message('C1', 'U1', text='=test 1 2')
+    assert box.get_apps(event, '=test', '=') == [
+        message,
+        test,
+        any_message,
+        custom,
+    ]
+    assert box.get_apps(event, '=t', '=') == [
+        message,
+        test,
+        any_message,
+        custom,
+    ]
+    assert box.get_apps(event, 'test', '=') == [message, any_message, custom]
+    assert box.get_apps(event, '=sample', '=') == [
+        message,
+        any_message,
+        custom,
+        sample,
+    ]
+
+    event = bot.create_message(
+        'C1',
+        'U1',
+        text='=edited',
+        subtype='message_changed',
+    )
+    assert box.get_apps(event, '=edited', '=') == [any_message, edited, custom]
+    assert box.get_apps(event, '=test', '=') == [any_message, custom]
+
+    @box.on(Hello)
+    async def on_hello2():
+        pass
+
+    assert box.get_apps(Hello()) == [hello, custom, box.apps[-1]]
+
+
+def test_box_handles():
+    box = Box()
+
+    assert not box.handles_type('hello')
+
+    @box.on(Hello)
+    async def on_hello():
+        pass
+
+    @box.command('edited', subtype='message_changed')
+    async def command_edited():
+        pass
+
+    assert box.handles_type('hello')
+    assert box.handles_type('message')
+    assert not box.handles_type('user_typing')
+    assert box.handles('hello')
+    assert box.handles('message', 'message_changed')
+    assert not box.handles('message')
+    assert not box.handles('message', 'bot_message')
+
+    @box.on('message', subtype='*')
+    async def on_any_message():
+        pass
+
+    assert box.handles('message')
+    assert box.handles('message', 'bot_message')
+    assert not box.handles('user_typing')
+
+    class Custom(App):
+        async def run(self, bot, event, *, tokens=None):
+            return True
+
+    box.register(Custom('hello', None, on_hello))
+    assert box.handles_type('user_typing')
+    assert box.handles('user_typing')
@@ -0,0 +1,37 @@
+from yui.box.injection import InjectionContext
+from yui.box.injection import PROVIDERS
+from yui.box.injection import provide_joined_remain_chunks
+from yui.types.handler import Handler
+
+
+def test_make_plan(bot):
+    async def handler(self, raw, count: int, remain_chunks: list[str], bot):
+        pass
+
+    async def joined(remain_chunks: str):
+        pass
+
+    plan = Handler(handler).plan
+    assert plan == [
+        ('self', PROVIDERS['self']),
+        ('raw', PROVIDERS['raw']),
+        ('remain_chunks', PROVIDERS['remain_chunks']),
+        ('bot', PROVIDERS['bot']),
+    ]
+    assert Handler(joined).plan == [
+        ('remain_chunks', provide_joined_remain_chunks),
+    ]
+
+    context = InjectionContext(
+        bot=bot,
+        app='app',
+        raw='a b',
+        remain_chunks=['a', 'b'],
+    )
+    assert [provide(context) for _, provide in plan] == [
+        'app',
+        'a b',
+        ['a', 'b'],
+        bot,
+    ]
+    assert provide_joined_remain_chunks(context) == 'a b'
@@ -259,3 +259,35 @@ def test_parse_option_and_arguments():
         'args: fail to transform argument value '
         '(day is out of range for month)'
     )
+
+
+def test_parser():
+    box = Box()
+
+    @box.command('test-parser')
+    @option('--flag', is_flag=True)
+    @option('--name', '-n')
+    @option('--name=x', dest='odd')
+    @argument('args', nargs=-1, concat=True)
+    async def test_command(flag, name, odd, args):
+        pass
+
+    app: App = box.apps.pop()
+    assert app.handler.parser is None
+
+    chunks = ['-n=kirito', '--flag=1', '2']
+    kw, remain_chunks = parse_option_and_arguments(app.handler, chunks)
+    parser = app.handler.parser
+    assert parser is not None
+    assert kw == {'flag': True, 'name': 'kirito', 'odd': None, 'args': '1 2'}
+    assert remain_chunks is chunks
+    assert not remain_chunks
+
+    assert parser.match('--name') == (app.handler.options[1], None)
+    matched, value = parser.match('--name=x=y')
+    assert matched.name == '--name'
+    assert value == 'x=y'
+    assert parser.match('name') == (None, None)
+
+    parse_option_and_arguments(app.handler, ['--flag', 'a', 'b'])
+    assert app.handler.parser is parser
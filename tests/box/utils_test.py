@@ -1,4 +1,21 @@
+import random
+import shlex
+
+import pytest
+
 from yui.box.utils import is_container
+from yui.box.utils import split_call
+from yui.box.utils import split_chunks
+from yui.box.utils import tokenize
+from yui.types.objects import MessageMessage
+
+
+def shlex_split(text: str) -> list[str]:
+    lex = shlex.shlex(text, posix=True)
+    lex.whitespace_split = True
+    lex.whitespace += '\xa0'
+    lex.commenters = ''
+    return list(lex)
 
 
 def test_is_container():
@@ -11,3 +28,57 @@ def test_is_container():
     assert not is_container(int)
     assert not is_container(float)
     assert not is_container(bool)
+
+
+def test_split_call(bot):
+    def message(text, **kwargs):
+        return bot.create_message('C1', 'U1', text=text, **kwargs)
+
+    assert split_call(message('=ping')) == ('=ping', '')
+    assert split_call(message('=calc 1 + 2')) == ('=calc', '1 + 2')
+    assert split_call(message('=calc\xa01')) == ('=calc', '1')
+    assert split_call(message(None)) == ('', '')
+
+    event = message(None)
+    event.message = MessageMessage(user='U1', text='=ping pong')
+    assert split_call(event) == ('=ping', 'pong')
+
+
+def test_tokenize():
+    assert tokenize('') == []
+    assert tokenize('  a\xa0b\tc  ') == ['a', 'b', 'c']
+    assert tokenize('say "hello world" \'it is\' me\\ too') == [
+        'say',
+        'hello world',
+        'it is',
+        'me too',
+    ]
+    assert tokenize('a"b c"d \'\' ""') == ['ab cd', '', '']
+    assert tokenize(r'"\"\\\x" ' + "'\\'") == ['"\\\\x', '\\']
+    assert tokenize('#not comment') == ['#not', 'comment']
+
+    with pytest.raises(ValueError, match='No closing quotation'):
+        tokenize('say "hello')
+    with pytest.raises(ValueError, match='No closing quotation'):
+        tokenize("say 'hello")
+    with pytest.raises(ValueError, match='No escaped character'):
+        tokenize('say hello\\')
+    with pytest.raises(ValueError, match='No escaped character'):
+        tokenize('say "hello\\')
+
+    assert split_chunks('a  "b c"', True) == ['a', 'b c']
+    assert split_chunks('a  "b c"', False) == ['a', '"b', 'c"']
+
+
+def test_tokenize_same_as_shlex():
+    def run(func, text):
+        try:
+            return func(text)
+        except ValueError as e:
+            return str(e)
+
+    rng = random.Random(0)
+    alphabet = list('ab \'"\\\t\n\r\xa0\x0b#=-') + ['가', '\u3000']
+    for _ in range(3000):
+        text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+        assert run(tokenize, text) == run(shlex_split, text), repr(text)
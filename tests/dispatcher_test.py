@@ -0,0 +1,159 @@
+import asyncio
+
+import pytest
+
+from yui import dispatcher as dispatcher_module
+from yui.dispatcher import Dispatcher
+from yui.dispatcher import get_lane_key
+from yui.event import Hello
+from yui.event import Message
+
+
+def test_get_lane_key(bot):
+    channel = bot.add_channel('C1', 'general')
+    user = bot.add_user('U1', 'kirito')
+
+    assert get_lane_key(Hello()) is None
+    assert get_lane_key(bot.create_message(channel, user)) == 'C1'
+    assert get_lane_key(Message(channel='C2', user='U1', ts='')) == 'C2'
+
+
+@pytest.mark.asyncio
+async def test_dispatcher(bot):
+    c1 = bot.add_channel('C1', 'general')
+    c2 = bot.add_channel('C2', 'random')
+    user = bot.add_user('U1', 'kirito')
+    log: list[tuple[str, str]] = []
+    gate = asyncio.Event()
+
+    async def handler(event):
+        if event.text == 'slow':
+            await gate.wait()
+        log.append((event.channel.id, event.text))
+
+    dispatcher = Dispatcher(
+        handler,
+        concurrency=2,
+        queue_size=10,
+        lag_warning=5.0,
+    )
+    await dispatcher.start()
+
+    await dispatcher.put(bot.create_message(c1, user, text='slow'))
+    await dispatcher.put(bot.create_message(c1, user, text='after slow'))
+    await dispatcher.put(bot.create_message(c2, user, text='fast'))
+
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+    # slow handler must not block other channel
+    assert log == [('C2', 'fast')]
+    assert dispatcher.stats['pending'] == 2
+    assert dispatcher.stats['busy'] == 1
+
+    gate.set()
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+    # order in same channel must be kept
+    assert log == [('C2', 'fast'), ('C1', 'slow'), ('C1', 'after slow')]
+    assert dispatcher.stats['pending'] == 0
+    assert dispatcher.stats['lanes'] == 0
+    assert set(dispatcher.stats['lag']) == {'C1', 'C2'}
+
+    await dispatcher.stop()
+    assert not dispatcher.workers
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_handler_error(bot):
+    channel = bot.add_channel('C1', 'general')
+    user = bot.add_user('U1', 'kirito')
+    log: list[str] = []
+
+    async def handler(event):
+        if event.text == 'fail':
+            raise RuntimeError('fail')
+        log.append(event.text)
+
+    dispatcher = Dispatcher(
+        handler,
+        concurrency=1,
+        queue_size=2,
+        lag_warning=5.0,
+    )
+    await dispatcher.start()
+
+    # more failures than workers and queue size
+    for text in ['fail', 'fail', 'fail', 'ok']:
+        await asyncio.wait_for(
+            dispatcher.put(bot.create_message(channel, user, text=text)),
+            1,
+        )
+
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+    assert log == ['ok']
+    assert all(not worker.done() for worker in dispatcher.workers)
+    assert dispatcher.stats['pending'] == 0
+    assert dispatcher.stats['busy'] == 0
+
+    await dispatcher.stop()
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_bounded_state(bot, monkeypatch):
+    monkeypatch.setattr(dispatcher_module, 'LAG_LANES_LIMIT', 2)
+    user = bot.add_user('U1', 'kirito')
+    channels = [bot.add_channel(f'C{i}', f'channel{i}') for i in range(4)]
+    gate = asyncio.Event()
+
+    async def handler(event):
+        if event.text == 'slow':
+            await gate.wait()
+
+    dispatcher = Dispatcher(
+        handler,
+        concurrency=1,
+        queue_size=10,
+        lag_warning=5.0,
+    )
+    await dispatcher.start()
+
+    for channel in channels:
+        await dispatcher.put(bot.create_message(channel, user))
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+    # only recent lanes are kept
+    assert list(dispatcher.stats['lag']) == ['C2', 'C3']
+
+    await dispatcher.put(bot.create_message(channels[0], user, text='slow'))
+    await dispatcher.put(bot.create_message(channels[0], user))
+    await dispatcher.put(bot.create_message(channels[1], user))
+    await asyncio.sleep(0)
+    assert dispatcher.stats['busy'] == 1
+    assert dispatcher.stats['pending'] == 3
+
+    await dispatcher.stop()
+    assert not dispatcher.workers
+    assert dispatcher.stats == {
+        'concurrency': 1,
+        'queue_size': 10,
+        'pending': 0,
+        'busy': 0,
+        'lanes': 0,
+        'lag': {},
+    }
+
+    # dispatcher works again after restart
+    gate.set()
+    await dispatcher.start()
+    await dispatcher.put(bot.create_message(channels[0], user))
+    for _ in range(5):
+        await asyncio.sleep(0)
+    assert dispatcher.stats['pending'] == 0
+    assert list(dispatcher.stats['lag']) == ['C0']
+
+    await dispatcher.stop()
@@ -0,0 +1,144 @@
+import asyncio
+
+import pytest
+
+from yui.event import create_event
+from yui.event_queue import BLOCK
+from yui.event_queue import DROP_NEW
+from yui.event_queue import DROP_OLDEST
+from yui.event_queue import EventQueue
+from yui.event_queue import HIGH
+from yui.event_queue import LOW
+from yui.event_queue import LanePolicy
+from yui.event_queue import NORMAL
+from yui.event_queue import create_event_queue
+from yui.event_queue import get_lane
+
+
+def typing(channel='C1'):
+    return create_event('user_typing', {'channel': channel, 'user': 'U1'})
+
+
+def test_get_lane(bot):
+    channel = bot.add_channel('C1', 'general')
+    user = bot.add_user('U1', 'kirito')
+
+    assert get_lane(bot.create_message(channel, user)) == HIGH
+    assert get_lane(create_event('hello', {})) == NORMAL
+    assert get_lane(typing()) == LOW
+    assert get_lane(create_event('pong', {})) == LOW
+
+
+def test_lane_policy():
+    with pytest.raises(ValueError):
+        LanePolicy(capacity=0)
+    with pytest.raises(ValueError):
+        LanePolicy(capacity=1, policy='unknown')
+
+
+@pytest.mark.asyncio
+async def test_event_queue(bot):
+    channel = bot.add_channel('C1', 'general')
+    user = bot.add_user('U1', 'kirito')
+    queue = EventQueue(
+        {
+            HIGH: LanePolicy(capacity=2),
+            NORMAL: LanePolicy(capacity=2, policy=DROP_NEW),
+            LOW: LanePolicy(capacity=2, policy=DROP_OLDEST),
+        }
+    )
+    assert queue.empty()
+    with pytest.raises(asyncio.QueueEmpty):
+        queue.get_nowait()
+
+    hello1 = create_event('hello', {})
+    hello2 = create_event('hello', {})
+    typing1 = typing('C1')
+    typing2 = typing('C2')
+    typing3 = typing('C3')
+    message = bot.create_message(channel, user)
+
+    for event in [typing1, hello1, typing2, hello2, typing3, message]:
+        await queue.put(event)
+    await queue.put(create_event('hello', {}))
+
+    assert queue.qsize() == 5
+    assert queue.stats[NORMAL]['dropped'] == 1
+    assert queue.stats[LOW]['dropped'] == 1
+    assert queue.stats[LOW]['peak'] == 2
+
+    result = [await queue.get() for _ in range(5)]
+    assert result == [message, hello1, hello2, typing2, typing3]
+    assert queue.empty()
+
+
+@pytest.mark.asyncio
+async def test_event_queue_block(bot):
+    channel = bot.add_channel('C1', 'general')
+    user = bot.add_user('U1', 'kirito')
+    queue = create_event_queue(
+        {HIGH: {'capacity': 1}},
+        {
+            HIGH: {'capacity': 10, 'policy': BLOCK},
+            NORMAL: {'capacity': 10},
+            LOW: {'capacity': 10, 'policy': DROP_NEW},
+        },
+    )
+    assert queue.policies[HIGH] == LanePolicy(capacity=1, policy=BLOCK)
+    assert queue.policies[LOW] == LanePolicy(capacity=10, policy=DROP_NEW)
+
+    first = bot.create_message(channel, user, text='first')
+    second = bot.create_message(channel, user, text='second')
+    await queue.put(first)
+    with pytest.raises(asyncio.QueueFull):
+        queue.put_nowait(second)
+
+    # other lanes are not blocked
+    queue.put_nowait(typing())
+
+    putter = asyncio.ensure_future(queue.put(second))
+    await asyncio.sleep(0)
+    assert not putter.done()
+
+    assert await queue.get() is first
+    await asyncio.wait_for(putter, 1)
+    assert await queue.get() is second
+    assert queue.stats[HIGH]['dropped'] == 0
+
+
+@pytest.mark.asyncio
+async def test_event_queue_wait(bot):
+    channel = bot.add_channel('C1', 'general')
+    user = bot.add_user('U1', 'kirito')
+    queue = EventQueue(
+        {
+            HIGH: LanePolicy(capacity=1),
+            NORMAL: LanePolicy(capacity=1),
+            LOW: LanePolicy(capacity=1),
+        }
+    )
+
+    getter = asyncio.ensure_future(queue.get())
+    await asyncio.sleep(0)
+    assert not getter.done()
+
+    hello = create_event('hello', {})
+    await queue.put(hello)
+    assert await asyncio.wait_for(getter, 1) is hello
+    assert queue.empty()
+
+    first = bot.create_message(channel, user, text='first')
+    second = bot.create_message(channel, user, text='second')
+    await queue.put(first)
+    cancelled = asyncio.ensure_future(
+        queue.put(bot.create_message(channel, user))
+    )
+    putter = asyncio.ensure_future(queue.put(second))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    await asyncio.sleep(0)
+
+    assert await queue.get() is first
+    await asyncio.wait_for(putter, 1)
+    assert queue.qsize() == 1
+    assert await queue.get() is second
@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from yui.registry import EntityIndex
+from yui.registry import Registry
+from yui.types.channel import DirectMessageChannel
+from yui.types.channel import PublicChannel
+from yui.types.user import User
+
+
+def test_entity_index(bot):
+    index: EntityIndex[User] = EntityIndex(lambda u: u.name)
+    kirito = User(id='U1', team_id='T0', name='kirito')
+    asuna = User(id='U2', team_id='T0', name='asuna')
+
+    index.add(kirito)
+    index.add(asuna)
+    assert len(index) == 2
+    assert 'U1' in index
+    assert asuna in index
+    assert index.get('U1') is kirito
+    assert index.get_by_name('asuna') is asuna
+    assert index.get('U3') is None
+    assert list(index) == [kirito, asuna]
+
+    renamed = User(id='U1', team_id='T0', name='kazuto')
+    index.add(renamed)
+    assert len(index) == 2
+    assert index.get('U1') is renamed
+    assert index.get_by_name('kazuto') is renamed
+    assert index.get_by_name('kirito') is None
+
+    asuna.name = 'yuuki'
+    index.add(asuna)
+    assert index.get_by_name('yuuki') is asuna
+    assert index.get_by_name('asuna') is None
+
+    assert index.remove('U2') is asuna
+    assert index.remove('U2') is None
+    assert index.get_by_name('yuuki') is None
+    assert list(index) == [renamed]
+
+    index.replace([kirito])
+    assert list(index) == [kirito]
+    assert index.get_by_name('kirito') is kirito
+    assert index.get_by_name('kazuto') is None
+
+    index.clear()
+    assert not index
+
+
+def test_registry(bot):
+    registry = Registry()
+    user = User(id='U1', team_id='T0', name='kirito')
+    channel = PublicChannel(
+        id='C1',
+        name='general',
+        creator='U0',
+        last_read=0,
+    )
+    registry.users.add(user)
+    registry.channels.add(channel)
+    registry.ims.add(DirectMessageChannel(id='D1', user='U1', last_read=0))
+
+    assert registry.get_channel_index('C1') is registry.channels
+    assert registry.get_channel_index('D1') is registry.ims
+    assert registry.get_channel_index('G1') is registry.groups
+    assert registry.ims.get_by_name('U1').id == 'D1'
+
+    with pytest.raises(KeyError):
+        registry.get_channel_index('X1')
+    with pytest.raises(KeyError):
+        registry.get_channel_index('')
+
+
+@pytest.mark.asyncio
+async def test_registry_pending():
+    called = []
+
+    async def func():
+        called.append(True)
+
+    registry = Registry()
+    other = Registry()
+    assert registry.user_refresh is not other.user_refresh
+    assert registry.pending_user_ids is not other.pending_user_ids
+
+    registry.pending_user_ids.add('U1')
+    registry.user_refresh.schedule(10, func)
+    registry.channel_resync.schedule(10, func)
+    assert not other.user_refresh.pending
+    assert not other.pending_user_ids
+
+    registry.cancel_pending()
+    assert not registry.user_refresh.pending
+    assert not registry.channel_resync.pending
+    assert not registry.pending_user_ids
+    await asyncio.sleep(0)
+    assert not called
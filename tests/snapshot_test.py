@@ -0,0 +1,57 @@
+import os
+import stat
+
+from yui.snapshot import SNAPSHOT_MODE
+from yui.snapshot import SNAPSHOT_VERSION
+from yui.snapshot import Snapshot
+from yui.snapshot import load_snapshot
+from yui.snapshot import save_snapshot
+from yui.utils import json
+
+
+def test_snapshot(tmp_path):
+    path = str(tmp_path / 'workspace.json')
+    assert load_snapshot(path) is None
+
+    snapshot = Snapshot(
+        users=[{'id': 'U1', 'team_id': 'T0', 'name': 'kirito'}],
+        channels=[{'id': 'C1', 'name': 'general', 'is_channel': True}],
+    )
+    (tmp_path / '.workspace.json.tmp').write_text('stale')
+    os.chmod(tmp_path / '.workspace.json.tmp', 0o644)
+    save_snapshot(path, snapshot)
+    assert not (tmp_path / '.workspace.json.tmp').exists()
+    assert stat.S_IMODE(os.stat(path).st_mode) == SNAPSHOT_MODE
+
+    loaded = load_snapshot(path)
+    assert loaded == snapshot
+    assert loaded.version == SNAPSHOT_VERSION
+    assert 0 <= loaded.age < 60
+    assert load_snapshot(path, max_age=60) == snapshot
+
+    snapshot.created_at -= 120
+    save_snapshot(path, snapshot)
+    assert load_snapshot(path) == snapshot
+    assert load_snapshot(path, max_age=60) is None
+
+
+def test_load_snapshot_invalid(tmp_path):
+    path = tmp_path / 'workspace.json'
+
+    path.write_text('{broken')
+    assert load_snapshot(str(path)) is None
+
+    path.write_text(
+        json.dumps(
+            {
+                'version': SNAPSHOT_VERSION + 1,
+                'users': [],
+                'channels': [],
+                'created_at': 0,
+            }
+        )
+    )
+    assert load_snapshot(str(path)) is None
+
+    path.write_text(json.dumps({'version': SNAPSHOT_VERSION, 'users': []}))
+    assert load_snapshot(str(path)) is None
@@ -0,0 +1,58 @@
+from yui.types.channel import PublicChannel
+from yui.types.lazy import LazyList
+
+
+def test_lazy_list():
+    calls = []
+
+    def convert(value):
+        calls.append(value)
+        if isinstance(value, dict):
+            value = value['id']
+        return value and value.upper()
+
+    values = LazyList(['a', {'id': 'b'}, None], convert)
+    assert len(values) == 3
+    assert values.ids == ['a', 'b', None]
+    assert not values.is_resolved
+    assert 'ids=' in repr(values)
+    assert not calls
+
+    assert values[0] == 'A'
+    assert values.is_resolved
+    assert len(calls) == 3
+    assert list(values) == ['A', 'B', None]
+    assert values == ['A', 'B', None]
+    assert 'ids=' not in repr(values)
+    assert values.resolve() is values.resolve()
+    assert len(calls) == 3
+
+
+def test_lazy_members(bot):
+    kirito = bot.add_user('U1', 'kirito')
+    channel = PublicChannel(
+        id='C1',
+        name='general',
+        creator='U0',
+        last_read=0,
+        members=['U1', 'U2'],
+    )
+    assert isinstance(channel.members, LazyList)
+    assert not channel.members.is_resolved
+    assert channel.members.ids == ['U1', 'U2']
+
+    # U2 joined after channel was built
+    asuna = bot.add_user('U2', 'asuna')
+    assert channel.members == [kirito, asuna]
+    assert channel.members[1] is asuna
+    assert kirito in channel.members
+
+    same = PublicChannel(
+        id='C1',
+        name='general',
+        creator='U0',
+        last_read=0,
+        members=channel.members,
+    )
+    assert same.members is channel.members
+    assert same == channel
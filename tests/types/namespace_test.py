@@ -0,0 +1,87 @@
+import tracemalloc
+
+import pytest
+
+from yui.types.namespace import BooleanField
+from yui.types.namespace import Namespace
+from yui.types.namespace import StringField
+from yui.types.namespace import dropped_extras
+from yui.types.namespace import namespace
+from yui.types.namespace import slotted_namespace
+
+
+def test_namespace():
+    @namespace
+    class Box:
+        name: str = StringField()
+
+    box = Box(name='cat', color='black')
+    assert box.name == 'cat'
+    assert box.color == 'black'
+    assert box.__dict__ == {'name': 'cat', 'color': 'black'}
+
+
+def test_slotted_namespace():
+    @slotted_namespace
+    class Box:
+        type = 'box'
+        name: str = StringField()
+
+    @slotted_namespace
+    class BigBox(Box):
+        size: str = StringField()
+
+    box = Box(name='cat')
+    assert not hasattr(box, '__dict__')
+    assert box._extras is None
+    with pytest.raises(AttributeError):
+        box.color
+
+    box = Box(name='cat', type='ignored', color='black')
+    assert box.type == 'box'
+    assert box.color == 'black'
+    assert box._extras == {'color': 'black'}
+    assert box == Box(name='cat')
+    assert 'color' not in repr(box)
+
+    big = BigBox(name='dog', size='big', weight=3)
+    assert not hasattr(big, '__dict__')
+    assert big.weight == 3
+    assert [a.name for a in BigBox.__attrs_attrs__].count('_extras') == 1
+
+    @Namespace(slots=True, extras_limit=2)
+    class SmallBox:
+        name: str = StringField()
+
+    box = SmallBox(name='cat', a=1, b=2, c=3, d=4)
+    assert box._extras == {'a': 1, 'b': 2}
+    with pytest.raises(AttributeError):
+        box.c
+    assert dropped_extras[SmallBox.__qualname__] == 2
+
+
+def test_slotted_namespace_memory():
+    def measure(decorator) -> float:
+        fields = [f'is_{x}' for x in 'abcdefghijklmnop']
+        cls = decorator(
+            type(
+                'Channel',
+                (),
+                {
+                    '__annotations__': dict.fromkeys(fields, bool),
+                    **{field: BooleanField() for field in fields},
+                },
+            )
+        )
+        payload = dict.fromkeys(fields, True)
+        tracemalloc.start()
+        try:
+            before, _ = tracemalloc.get_traced_memory()
+            objs = [cls(**payload) for _ in range(1000)]
+            after, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        assert len(objs) == 1000
+        return (after - before) / 1000
+
+    assert measure(slotted_namespace) < measure(namespace) * 0.8
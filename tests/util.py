@@ -13,6 +13,7 @@ from yui.cache import Cache
 from yui.config import Config
 from yui.config import DEFAULT
 from yui.event import Message
+from yui.registry import Registry
 from yui.types.channel import DirectMessageChannel
 from yui.types.channel import PrivateChannel
 from yui.types.channel import PublicChannel
@@ -49,12 +50,11 @@ class FakeBot(Bot):
         self.loop = loop or asyncio.get_event_loop()
         self.call_queue: list[Call] = []
         self.api = SlackAPI(self)
-        self.channels: list[PublicChannel] = []
-        self.ims: list[DirectMessageChannel] = []
-        self.groups: list[PrivateChannel] = []
+        self.registry = Registry()
         self.cache: Cache = cache
-        self.users: list[User] = [User(id='U0', team_id='T0', name='system')]
+        self.registry.users.add(User(id='U0', team_id='T0', name='system'))
         self.responses: dict[str, Callable] = {}
+        self.is_ready = False
         self.config = config
         self.process_pool_executor = process_pool_executor
         self.thread_pool_executor = thread_pool_executor
@@ -100,7 +100,7 @@ class FakeBot(Bot):
             creator=creator,
             last_read=last_read,
         )
-        self.channels.append(channel)
+        self.registry.channels.add(channel)
         return channel
 
     def add_private_channel(
@@ -116,7 +116,7 @@ class FakeBot(Bot):
             creator=creator,
             last_read=last_read,
         )
-        self.groups.append(channel)
+        self.registry.groups.add(channel)
         return channel
 
     def add_dm(self, id: str, user: Union[User, str], last_read: int = 0):
@@ -125,12 +125,12 @@ class FakeBot(Bot):
         else:
             user_id = user
         dm = DirectMessageChannel(id=id, user=user_id, last_read=last_read)
-        self.ims.append(dm)
+        self.registry.ims.add(dm)
         return dm
 
     def add_user(self, id: str, name: str, team_id: str = 'T0'):
         user = User(id=id, name=name, team_id=team_id)
-        self.users.append(user)
+        self.registry.users.add(user)
         return user
 
     def create_message(
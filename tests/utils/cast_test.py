@@ -7,6 +7,7 @@ import pytest
 
 from yui.types.namespace import Field
 from yui.types.namespace import namespace
+from yui.utils.cast import CastError
 from yui.utils.cast import cast
 
 
@@ -69,3 +70,20 @@ def test_cast(bot):
 
     with pytest.raises(ValueError):
         cast(Union[int, float], 'asdf')
+
+
+def test_compiled_caster():
+    assert cast.get_caster(list[int]) is cast.get_caster(list[int])
+    assert cast.get_caster(int) is cast.get_caster(int)
+
+    # equal unions must not share caster because order matters
+    assert cast(Union[int, float], '3') == 3
+    assert type(cast(Union[float, int], '3')) is float
+    assert cast(list[Union[float, int]], ['3']) == [3.0]
+    assert type(cast(list[Union[int, float]], ['3'])[0]) is int
+
+    assert cast(int, True) is True
+    with pytest.raises(TypeError):
+        cast(list[int], None)
+    with pytest.raises(CastError):
+        cast(int, None)
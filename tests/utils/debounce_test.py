@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+from yui.utils.debounce import Debouncer
+
+
+@pytest.mark.asyncio
+async def test_debouncer():
+    called = []
+
+    async def func(value):
+        called.append(value)
+
+    debouncer = Debouncer()
+    task = debouncer.schedule(0.05, func, 1)
+    assert debouncer.pending
+    assert debouncer.schedule(0.05, func, 2) is task
+    assert debouncer.schedule(0.05, func, 3) is task
+    await task
+
+    assert called == [1]
+    assert not debouncer.pending
+    assert debouncer.requested == 3
+    assert debouncer.runs == 1
+
+    await debouncer.schedule(0, func, 4)
+    assert called == [1, 4]
+
+    debouncer.schedule(10, func, 5)
+    debouncer.cancel()
+    assert not debouncer.pending
+    await asyncio.sleep(0)
+    assert called == [1, 4]
+
+
+@pytest.mark.asyncio
+async def test_debouncer_error():
+    async def func():
+        raise ValueError()
+
+    debouncer = Debouncer()
+    await debouncer.schedule(0, func)
+    assert debouncer.runs == 1
@@ -0,0 +1,169 @@
+import asyncio
+import multiprocessing
+import os
+import pickle
+import struct
+import time
+
+import pytest
+
+from yui.utils import sandbox
+from yui.utils.sandbox import PoolBusy
+from yui.utils.sandbox import SandboxPool
+from yui.utils.sandbox import Worker
+
+
+def get_pid():
+    return os.getpid()
+
+
+def sleep(seconds: float):
+    time.sleep(seconds)
+    return seconds
+
+
+def fail():
+    raise ValueError('fail')
+
+
+def allocate(size: int):
+    return len(bytearray(size))
+
+
+@pytest.mark.asyncio
+async def test_sandbox_pool():
+    pool = SandboxPool(size=2, timeout=0.5, max_jobs=3)
+    try:
+        pool.start()
+        assert len(pool.workers) == 2
+        assert pool.busy == 0
+        assert pool.stats.spawned == 2
+
+        pid = await pool.run(get_pid)
+        assert pid != os.getpid()
+
+        with pytest.raises(ValueError, match='fail'):
+            await pool.run(fail)
+        assert pool.stats.errors == 1
+
+        results = await asyncio.gather(pool.run(sleep, 0.1), pool.run(get_pid))
+        assert results[0] == 0.1
+        assert pool.utilization == 0.0
+
+        # worker which overruns deadline is killed and replaced
+        with pytest.raises(asyncio.TimeoutError):
+            await pool.run(sleep, 10)
+        assert pool.stats.killed == 1
+        # killed worker is reaped without blocking
+        assert len(pool.reapers) == 1
+        assert len(pool.workers) == 2
+        assert len(pool.idle) == 2
+
+        # workers are recycled after max_jobs jobs
+        pids = {await pool.run(get_pid) for _ in range(6)}
+        assert pool.stats.recycled >= 2
+        assert len(pids) > 2
+        assert len(pool.workers) == 2
+        assert pool.stats.jobs == 10
+        # retired workers are reaped in background too
+        assert pool.reapers
+        await asyncio.gather(*pool.reapers)
+        assert not pool.reapers
+
+        # closed pool waits its workers to exit
+        processes = [worker.process for worker in pool.workers]
+        await pool.close()
+        assert not pool.workers
+        assert not pool.reapers
+        assert not any(process.is_alive() for process in processes)
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_sandbox_pool_memory_limit():
+    pool = SandboxPool(size=1, timeout=5, memory_limit=16 * 1024 * 1024)
+    try:
+        assert await pool.run(allocate, 1024 * 1024) == 1024 * 1024
+        with pytest.raises(MemoryError):
+            await pool.run(allocate, 64 * 1024 * 1024)
+        # limit is only for the job
+        assert await pool.run(allocate, 1024 * 1024) == 1024 * 1024
+    finally:
+        await pool.close()
+
+
+def get_address_space_limit():
+    import resource
+
+    return resource.getrlimit(resource.RLIMIT_AS)[0]
+
+
+@pytest.mark.asyncio
+async def test_sandbox_pool_memory_limit_fallback(monkeypatch):
+    # address space can not be measured on some platforms
+    fallback = sandbox.get_address_space_size() * 2
+    monkeypatch.setattr(sandbox, 'get_address_space_size', lambda: None)
+    monkeypatch.setattr(sandbox, 'FALLBACK_ADDRESS_SPACE_SIZE', fallback)
+    pool = SandboxPool(size=1, timeout=5, memory_limit=1024)
+    try:
+        limit = await pool.run(get_address_space_limit)
+        assert limit == fallback + 1024
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_sandbox_pool_busy():
+    pool = SandboxPool(size=1, timeout=5, acquire_timeout=0.1)
+    try:
+        job = asyncio.ensure_future(pool.run(sleep, 0.5))
+        await asyncio.sleep(0.05)
+        with pytest.raises(PoolBusy):
+            await pool.run(get_pid)
+        assert pool.stats.rejected == 1
+        assert not pool.waiters
+        assert await job == 0.5
+        # pool takes jobs again once worker is free
+        assert await pool.run(get_pid) != os.getpid()
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_sandbox_pool_retire():
+    pool = SandboxPool(size=1)
+    try:
+        pool.start()
+        worker = pool.workers[0]
+        pool.workers.remove(worker)
+        pool.idle.remove(worker)
+        # busy worker does not stop at request, so it is killed
+        worker.conn.send((sleep, (10,), {}))
+        worker.retire()
+        assert not await worker.wait(0.1)
+        await worker.reap(timeout=0.1)
+        assert not worker.process.is_alive()
+        assert worker.process.exitcode == -9
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_sandbox_pool_receive_partial():
+    pool = SandboxPool()
+    parent_conn, child_conn = multiprocessing.Pipe()
+    worker = Worker(process=None, conn=parent_conn)
+    data = pickle.dumps((True, 42))
+    frame = struct.pack('!i', len(data)) + data
+    try:
+        os.write(child_conn.fileno(), frame[:6])
+        task = asyncio.ensure_future(pool.receive(worker))
+        # event loop keeps running while rest of result is not arrived
+        await asyncio.sleep(0.05)
+        assert not task.done()
+        os.write(child_conn.fileno(), frame[6:])
+        assert await task == (True, 42)
+    finally:
+        parent_conn.close()
+        child_conn.close()
@@ -4,6 +4,10 @@ from datetime import timedelta
 from .chat import Chat
 from .conversations import Conversations
 from .endpoint import Endpoint
+from .ratelimit import RateLimiter
+from .retry import DEFAULT_RETRY_POLICY
+from .retry import NOT_IDEMPOTENT_RETRY_POLICY
+from .retry import RetryPolicy
 from .users import Users
 
 
@@ -24,6 +28,7 @@ class SlackAPI:
     converstations: Conversations
     chat: Chat
     users: Users
+    rate_limiter: RateLimiter
 
     def __init__(self, bot) -> None:
         """Initialize"""
@@ -58,3 +63,13 @@ class SlackAPI:
 
         # rtm tier 1
         self.throttle_interval['rtm.start'] = TIER1
+
+        self.rate_limiter = RateLimiter(self)
+
+        self.retry_policy: defaultdict[str, RetryPolicy] = defaultdict(
+            lambda: DEFAULT_RETRY_POLICY
+        )
+
+        # Posting again can make duplicated message
+        self.retry_policy['chat.postEphemeral'] = NOT_IDEMPOTENT_RETRY_POLICY
+        self.retry_policy['chat.postMessage'] = NOT_IDEMPOTENT_RETRY_POLICY
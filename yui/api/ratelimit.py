@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Mapping
+from typing import Any
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from . import SlackAPI
+
+
+#: Maximum seconds of interval after adjusting by rate limited response.
+MAX_INTERVAL = 60.0
+
+
+def get_retry_after(headers: Mapping[str, Any], default: float = 1.0) -> float:
+    """Get seconds from Retry-After header."""
+
+    try:
+        return max(float(headers['Retry-After']), 0.0)
+    except (KeyError, TypeError, ValueError):
+        return default
+
+
+class TokenBucket:
+    """Token bucket for one Slack API method.
+
+    Waiters are served in FIFO order and sleep exactly until next token is
+    available.
+
+    """
+
+    def __init__(self, interval: float, capacity: int = 1) -> None:
+        """Initialize"""
+
+        self.base_interval = interval
+        self.interval = interval
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = asyncio.Lock()
+
+    def refill(self, now: float):
+        if self.interval > 0:
+            elapsed = now - self.updated_at
+            self.tokens = min(
+                self.capacity,
+                self.tokens + elapsed / self.interval,
+            )
+        else:
+            self.tokens = self.capacity
+        self.updated_at = now
+
+    def get_delay(self) -> float:
+        """Get seconds to wait for next token. Consume token if available."""
+
+        now = time.monotonic()
+        self.refill(now)
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) * self.interval
+
+    async def acquire(self):
+        """Wait for token."""
+
+        async with self.lock:
+            while (delay := self.get_delay()) > 0:
+                await asyncio.sleep(delay)
+
+    def penalize(self, retry_after: float):
+        """Apply rate limited response.
+
+        Block all waiters until Retry-After is passed and slow down because
+        real limit of Slack is lower than we expected.
+
+        """
+
+        now = time.monotonic()
+        self.refill(now)
+        self.tokens = 0.0
+        self.blocked_until = max(self.blocked_until, now + retry_after)
+        self.interval = min(self.interval * 2, MAX_INTERVAL)
+
+    def reward(self):
+        """Recover interval slowly after successful call."""
+
+        if self.interval > self.base_interval:
+            self.interval = max(self.base_interval, self.interval * 0.9)
+
+
+class RateLimiter:
+    """Rate limiter of Slack API methods"""
+
+    def __init__(self, api: SlackAPI) -> None:
+        """Initialize"""
+
+        self.api = api
+        self.buckets: dict[str, TokenBucket] = {}
+
+    def get_bucket(self, method: str) -> TokenBucket:
+        try:
+            return self.buckets[method]
+        except KeyError:
+            interval = self.api.throttle_interval[method].total_seconds()
+            bucket = self.buckets[method] = TokenBucket(interval)
+            return bucket
+
+    async def acquire(self, method: str):
+        """Wait until given method can be called."""
+
+        await self.get_bucket(method).acquire()
+
+    def penalize(self, method: str, retry_after: float):
+        self.get_bucket(method).penalize(retry_after)
+
+    def reward(self, method: str):
+        bucket = self.buckets.get(method)
+        if bucket is not None:
+            bucket.reward()
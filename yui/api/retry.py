@@ -0,0 +1,73 @@
+import random
+from typing import Optional
+
+import attr
+
+from .ratelimit import get_retry_after
+from ..types.slack.response import APIResponse
+
+
+#: Errors of Slack Web API which can be fixed by calling again.
+TRANSIENT_ERRORS = frozenset(
+    {
+        'fatal_error',
+        'internal_error',
+        'request_timeout',
+        'service_unavailable',
+    }
+)
+
+
+@attr.dataclass(slots=True, frozen=True)
+class RetryPolicy:
+    """Retry policy of Slack API method"""
+
+    #: Maximum number of tries including first call.
+    max_attempts: int = 5
+    #: Base seconds of exponential backoff.
+    base_delay: float = 1.0
+    #: Maximum seconds of one backoff.
+    max_delay: float = 30.0
+    #: Seconds to give up retrying since first call.
+    deadline: float = 120.0
+    #: Can we call it again when we do not know whether Slack processed it.
+    idempotent: bool = True
+
+    def get_backoff(self, attempt: int) -> float:
+        """Get exponential backoff with full jitter."""
+
+        cap = min(self.max_delay, self.base_delay * pow(2, attempt))
+        return random.uniform(0, cap)
+
+    def get_delay(
+        self,
+        attempt: int,
+        response: Optional[APIResponse],
+    ) -> Optional[float]:
+        """Get seconds to wait before next try.
+
+        :data:`None` means given result must not be retried.
+        ``response`` is :data:`None` when request failed without response.
+
+        """
+
+        if response is None:
+            return self.get_backoff(attempt) if self.idempotent else None
+
+        error = None
+        if isinstance(response.body, dict) and not response.body.get('ok'):
+            error = response.body.get('error')
+
+        if response.status == 429 or error == 'ratelimited':
+            # Slack did not process rate limited call. It is always safe.
+            return get_retry_after(response.headers, self.get_backoff(attempt))
+
+        if response.status >= 500 or error in TRANSIENT_ERRORS:
+            return self.get_backoff(attempt) if self.idempotent else None
+
+        return None
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+NOT_IDEMPOTENT_RETRY_POLICY = RetryPolicy(idempotent=False)
+NO_RETRY_POLICY = RetryPolicy(max_attempts=1)
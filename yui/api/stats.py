@@ -0,0 +1,44 @@
+from types import SimpleNamespace
+
+import aiohttp
+
+import attr
+
+
+@attr.dataclass(slots=True)
+class APIStats:
+    """Statistics of Slack Web API calls"""
+
+    calls: int = 0
+    errors: int = 0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+    connections_created: int = 0
+    connections_reused: int = 0
+
+    @property
+    def average_latency(self) -> float:
+        if not self.calls:
+            return 0.0
+        return self.total_latency / self.calls
+
+    def record(self, latency: float, *, error: bool = False):
+        self.calls += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        if error:
+            self.errors += 1
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        """Make trace config which count connection creation and reuse."""
+
+        async def on_create(session, ctx: SimpleNamespace, params):
+            self.connections_created += 1
+
+        async def on_reuse(session, ctx: SimpleNamespace, params):
+            self.connections_reused += 1
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_create_end.append(on_create)
+        trace_config.on_connection_reuseconn.append(on_reuse)
+        return trace_config
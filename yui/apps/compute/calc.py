@@ -13,18 +13,40 @@ from collections import abc
 from typing import Any
 from typing import Callable
 from typing import Optional
+from typing import Type
 from typing import Union
 
 import _ast
 
-from async_timeout import timeout
-
 from ...bot import Bot
 from ...box import box
+from ...event import ChatterboxSystemStart
 from ...event import Message
 from ...utils import json
+from ...utils.sandbox import PoolBusy
+from ...utils.sandbox import SandboxPool
 
 TIMEOUT = 1
+MEMORY_LIMIT = 2 * 1024 * 1024
+#: Units of work which one calculation can spend.
+#: One unit is about one evaluation of simple node.
+OPERATION_BUDGET = 2_000_000
+#: Ints up to this size are as cheap as one unit to multiply.
+SMALL_INT_BITS = 2048
+#: Max length of rendered result.
+RENDER_LIMIT = 1500
+#: Number of leading and trailing digits in preview of huge number.
+PREVIEW_DIGITS = 20
+#: Nested containers deeper than this are not rendered.
+RENDER_MAX_DEPTH = 100
+
+calc_pool = SandboxPool(
+    size=2,
+    timeout=TIMEOUT,
+    max_jobs=50,
+    memory_limit=MEMORY_LIMIT,
+    acquire_timeout=TIMEOUT,
+)
 
 
 class PLACEHOLDER:
@@ -46,12 +68,12 @@ async def body(
         return
 
     try:
-        async with timeout(TIMEOUT):
-            result, local = await bot.run_in_other_process(
-                calculate,
-                expr,
-                decimal_mode=decimal_mode,
-            )
+        validate(expr)
+        result, local = await calc_pool.run(
+            calculate_and_render,
+            expr,
+            decimal_mode=decimal_mode,
+        )
     except (SyntaxError, BadSyntax) as e:
         await bot.say(
             event.channel,
@@ -66,6 +88,13 @@ async def body(
             thread_ts=ts,
         )
         return
+    except TooExpensive:
+        await bot.say(
+            event.channel,
+            '입력해주신 수식은 계산량이 너무 많아서 계산하지 않았어요!',
+            thread_ts=ts,
+        )
+        return
     except asyncio.TimeoutError:
         await bot.say(
             event.channel,
@@ -73,6 +102,13 @@ async def body(
             thread_ts=ts,
         )
         return
+    except PoolBusy:
+        await bot.say(
+            event.channel,
+            '지금은 계산 요청이 너무 많아서 계산하지 못했어요! 잠시 후에 다시 시도해주세요!',
+            thread_ts=ts,
+        )
+        return
     except Exception as e:
         await bot.say(
             event.channel,
@@ -82,7 +118,7 @@ async def body(
         return
 
     if result is not None:
-        result_string = str(result)[:1500].strip()
+        result_string = result.strip()
 
         if expr_is_multiline or '\n' in result_string:
             r = (
@@ -102,9 +138,7 @@ async def body(
             thread_ts=ts,
         )
     elif local:
-        r = '\n'.join(
-            '{} = {}'.format(key, repr(value)) for key, value in local.items()
-        )[:1500].strip()
+        r = local.strip()
         if ts is None:
             ts = event.ts
         await bot.say(
@@ -120,7 +154,18 @@ async def body(
         )
 
 
-@box.command('=', ['calc'])
+@box.on(ChatterboxSystemStart, needs_registry=False)
+async def start_calc_pool():
+    calc_pool.start()
+    return True
+
+
+@box.on_shutdown
+async def close_calc_pool():
+    await calc_pool.close()
+
+
+@box.command('=', ['calc'], needs_registry=False)
 async def calc_decimal(bot, event: Message, raw: str):
     """
     정수타입 수식 계산기
@@ -140,7 +185,12 @@ async def calc_decimal(bot, event: Message, raw: str):
     )
 
 
-@box.command('=', ['calc'], subtype='message_changed')
+@box.command(
+    '=',
+    ['calc'],
+    subtype='message_changed',
+    needs_registry=False,
+)
 async def calc_decimal_on_change(bot, event: Message, raw: str):
     if event.message:
         await body(
@@ -152,7 +202,7 @@ async def calc_decimal_on_change(bot, event: Message, raw: str):
         )
 
 
-@box.command('==')
+@box.command('==', needs_registry=False)
 async def calc_num(bot, event: Message, raw: str):
     """
     부동소숫점타입 수식 계산기
@@ -172,7 +222,11 @@ async def calc_num(bot, event: Message, raw: str):
     )
 
 
-@box.command('==', subtype='message_changed')
+@box.command(
+    '==',
+    subtype='message_changed',
+    needs_registry=False,
+)
 async def calc_num_on_change(bot, event: Message, raw: str):
     if event.message:
         await body(
@@ -287,6 +341,10 @@ class BadSyntax(Exception):
     pass
 
 
+class TooExpensive(Exception):
+    pass
+
+
 BINOP_TABLE: dict[Any, Callable[[Any, Any], Any]] = {
     _ast.Add: lambda a, b: a + b,
     _ast.BitAnd: lambda a, b: a & b,
@@ -326,12 +384,319 @@ UNARYOP_TABLE: dict[Any, Callable[[Any], Any]] = {
 }
 
 
+#: Nodes which :class:`Evaluator` always refuses, with reason.
+FORBIDDEN_NODES: dict[Any, str] = {
+    _ast.AnnAssign: 'You can not use annotation syntax',
+    _ast.Assert: 'You can not use assertion syntax',
+    _ast.AsyncFor: 'You can not use `async for` loop syntax',
+    _ast.AsyncFunctionDef: (
+        'Defining new coroutine via def syntax is not allowed'
+    ),
+    _ast.AsyncWith: 'You can not use `async with` syntax',
+    _ast.Await: 'You can not await anything',
+    _ast.ClassDef: 'Defining new class via def syntax is not allowed',
+    _ast.FunctionDef: 'Defining new function via def syntax is not allowed',
+    _ast.GeneratorExp: 'Defining new generator expression is not allowed',
+    _ast.Global: 'You can not use `global` syntax',
+    _ast.Import: 'You can not import anything',
+    _ast.ImportFrom: 'You can not import anything',
+    _ast.Lambda: 'Defining new function via lambda syntax is not allowed',
+    _ast.Nonlocal: 'You can not use `nonlocal` syntax',
+    _ast.Raise: 'You can not use `raise` syntax',
+    _ast.Return: 'You can not use `return` syntax',
+    _ast.Try: 'You can not use `try` syntax',
+    _ast.With: 'You can not use `with` syntax',
+    _ast.Yield: 'You can not use `yield` syntax',
+    _ast.YieldFrom: 'You can not use `yield from` syntax',
+}
+
+#: Compiled node. It evaluates node when called.
+CODE_TYPE = Callable[[], Any]
+
+
+def return_none():
+    return None
+
+
+def make_raiser(error: Type[Exception], *args) -> CODE_TYPE:
+    def code():
+        raise error(*args)
+
+    return code
+
+
+def make_block(codes: list[CODE_TYPE]) -> CODE_TYPE:
+    def block():
+        for code in codes:
+            code()
+
+    return block
+
+
+def count_nodes(node) -> int:
+    """Count nodes in given node except nested statements."""
+
+    count = 0
+    stack = [node]
+    while stack:
+        count += 1
+        for child in ast.iter_child_nodes(stack.pop()):
+            if not isinstance(child, _ast.stmt):
+                stack.append(child)
+    return count
+
+
+def int_digits(value: int) -> float:
+    """Estimate number of decimal digits of int."""
+
+    return value.bit_length() * 0.30103 + 1
+
+
+def multiplication_cost(a_digits: float, b_digits: float) -> float:
+    """Estimate cost of multiplication of ints by their 30 bits digits.
+
+    It grows like Karatsuba multiplication of CPython.
+
+    """
+
+    if a_digits > b_digits:
+        a_digits, b_digits = b_digits, a_digits
+    return max(a_digits, 1) ** 0.585 * b_digits / 15 + 1
+
+
+def int_to_decimal_cost(value: int) -> float:
+    return int_digits(value) ** 2 / 4000 + 1
+
+
+def estimate_conversion_cost(a, b) -> float:
+    """Estimate cost of implicit conversion of int to Decimal."""
+
+    if isinstance(a, decimal.Decimal) and isinstance(b, int):
+        return int_to_decimal_cost(b)
+    if isinstance(b, decimal.Decimal) and isinstance(a, int):
+        return int_to_decimal_cost(a)
+    return 1
+
+
+def estimate_mult_cost(a, b) -> float:
+    if isinstance(a, int) and isinstance(b, int):
+        a_bits = a.bit_length()
+        b_bits = b.bit_length()
+        if a_bits + b_bits <= SMALL_INT_BITS:
+            return 1
+        return multiplication_cost(a_bits / 30, b_bits / 30)
+    if isinstance(a, int):
+        a, b = b, a
+    if isinstance(a, (str, bytes, list, tuple)) and isinstance(b, int):
+        size = len(a) * b
+        if size > 10**18:
+            return math.inf
+        return max(size, 0) / 16 + 1
+    return estimate_conversion_cost(a, b)
+
+
+def estimate_division_cost(a, b) -> float:
+    if isinstance(a, int) and isinstance(b, int):
+        a_digits = a.bit_length() / 30
+        b_digits = b.bit_length() / 30
+        return b_digits * max(a_digits - b_digits + 1, 1) / 50 + 1
+    return estimate_conversion_cost(a, b)
+
+
+def estimate_decimal_pow_cost(base, exp) -> float:
+    """Estimate cost of power of which base or exponent is Decimal.
+
+    Integral exponent which fits in 64 bits is done by squaring in
+    precision of context, and others by exp and ln. So cost stays small
+    even if exponent is huge.
+
+    """
+
+    cost = estimate_conversion_cost(base, exp)
+    if isinstance(exp, int):
+        bits = exp.bit_length()
+    elif isinstance(exp, decimal.Decimal) and exp.is_finite():
+        bits = (exp.adjusted() + 1) * 3.33
+    else:
+        return cost
+    digits = decimal.getcontext().prec / 9
+    steps = min(max(bits, 1), 64)
+    return cost + 2 * steps * multiplication_cost(digits, digits)
+
+
+def estimate_pow_cost(base, exp, mod=None) -> float:
+    if isinstance(base, decimal.Decimal) or isinstance(exp, decimal.Decimal):
+        return estimate_decimal_pow_cost(base, exp)
+    if not (isinstance(base, int) and isinstance(exp, int)):
+        return estimate_conversion_cost(base, exp)
+    if isinstance(mod, int):
+        digits = mod.bit_length() / 30
+        return 2 * exp.bit_length() * multiplication_cost(digits, digits)
+    if exp <= 0 or -1 <= base <= 1:
+        return 1
+    if exp.bit_length() > 64:
+        return math.inf
+    bits = base.bit_length() * exp
+    if bits <= SMALL_INT_BITS:
+        return 1
+    return 2 * multiplication_cost(bits / 60, bits / 60)
+
+
+def estimate_lshift_cost(a, b) -> float:
+    if isinstance(a, int) and isinstance(b, int):
+        if b.bit_length() > 64:
+            return math.inf
+        return (a.bit_length() + max(b, 0)) / 500 + 1
+    return 1
+
+
+def estimate_factorial_cost(n, *args, **kwargs) -> float:
+    if not isinstance(n, int) or n < 2:
+        return 1
+    if n.bit_length() > 64:
+        return math.inf
+    digits = math.lgamma(n + 1) / math.log(2) / 30
+    return 1.5 * multiplication_cost(digits, digits)
+
+
+def estimate_int_cost(value=0, *args, **kwargs) -> float:
+    if isinstance(value, decimal.Decimal) and value.is_finite():
+        return max(value.adjusted() + 1, 0) ** 2 / 2500 + 1
+    if isinstance(value, (str, bytes)):
+        return len(value) ** 2 / 10000 + 1
+    return 1
+
+
+def estimate_decimal_cost(value=0, *args, **kwargs) -> float:
+    if isinstance(value, int):
+        return int_to_decimal_cost(value)
+    return 1
+
+
+def estimate_str_cost(value='', *args, **kwargs) -> float:
+    if isinstance(value, int):
+        return int_digits(value) ** 2 / 5000 + 1
+    return 1
+
+
+def iterable_length(value) -> float:
+    """Estimate number of items of iterable. Unsized one counts as one."""
+
+    try:
+        return operator.length_hint(value, 1)
+    except OverflowError:  # range longer than sys.maxsize
+        return math.inf
+    except TypeError:
+        return 1
+
+
+def estimate_iteration_cost(iterable=(), *args, **kwargs) -> float:
+    """Estimate cost of function which goes through iterable once."""
+
+    return iterable_length(iterable) + 1
+
+
+def estimate_extremum_cost(*args, **kwargs) -> float:
+    if len(args) == 1:
+        return estimate_iteration_cost(args[0])
+    return len(args) + 1
+
+
+def estimate_sort_cost(iterable=(), *args, **kwargs) -> float:
+    n = iterable_length(iterable)
+    if n < 2:
+        return 1
+    return n * math.log2(n) / 20 + n + 1
+
+
+def estimate_zip_cost(*iterables, **kwargs) -> float:
+    """Estimate cost of consuming lazy iterator over iterables.
+
+    Cost is charged when iterator is made, because its consumer only sees
+    unsized iterator.
+
+    """
+
+    return min(map(iterable_length, iterables), default=0) + 1
+
+
+def estimate_map_cost(func, *iterables) -> float:
+    return estimate_zip_cost(*iterables)
+
+
+def estimate_filter_cost(func, iterable) -> float:
+    return estimate_iteration_cost(iterable)
+
+
+def estimate_reduce_cost(func, iterable, *args) -> float:
+    return estimate_iteration_cost(iterable)
+
+
+def estimate_bytes_cost(value=b'', *args, **kwargs) -> float:
+    if isinstance(value, int):
+        return max(value, 0) / 16 + 1
+    return estimate_iteration_cost(value)
+
+
+#: Estimators of cost of binary operators by their operands.
+#: Other operators only cost implicit conversion of operands.
+BINOP_COST_TABLE: dict[Any, Callable[[Any, Any], float]] = {
+    _ast.FloorDiv: estimate_division_cost,
+    _ast.LShift: estimate_lshift_cost,
+    _ast.Mod: estimate_division_cost,
+    _ast.Mult: estimate_mult_cost,
+    _ast.Pow: estimate_pow_cost,
+}
+#: Estimators of cost of functions by their arguments.
+#: Functions which go through iterables cost by length of them.
+CALL_COST_TABLE: dict[Any, Callable[..., float]] = {
+    Decimal: estimate_decimal_cost,
+    all: estimate_iteration_cost,
+    any: estimate_iteration_cost,
+    bytes: estimate_bytes_cost,
+    dict: estimate_iteration_cost,
+    divmod: estimate_division_cost,
+    enumerate: estimate_iteration_cost,
+    filter: estimate_filter_cost,
+    format: estimate_str_cost,
+    frozenset: estimate_iteration_cost,
+    functools.reduce: estimate_reduce_cost,
+    int: estimate_int_cost,
+    list: estimate_iteration_cost,
+    map: estimate_map_cost,
+    math.factorial: estimate_factorial_cost,
+    math.fsum: estimate_iteration_cost,
+    max: estimate_extremum_cost,
+    min: estimate_extremum_cost,
+    operator.floordiv: estimate_division_cost,
+    operator.lshift: estimate_lshift_cost,
+    operator.mod: estimate_division_cost,
+    operator.mul: estimate_mult_cost,
+    operator.pow: estimate_pow_cost,
+    pow: estimate_pow_cost,
+    repr: estimate_str_cost,
+    reversed: estimate_iteration_cost,
+    set: estimate_iteration_cost,
+    sorted: estimate_sort_cost,
+    str: estimate_str_cost,
+    sum: estimate_iteration_cost,
+    tuple: estimate_iteration_cost,
+    zip: estimate_zip_cost,
+}
+
+
 class Evaluator:
 
     last_dump: str
 
-    def __init__(self, decimal_mode: bool = False) -> None:
+    def __init__(
+        self,
+        decimal_mode: bool = False,
+        budget: float = OPERATION_BUDGET,
+    ) -> None:
         self.decimal_mode = decimal_mode
+        self.budget = budget
+        self.cost: float = 0
         self.allowed_modules = {
             datetime: {'date', 'datetime', 'time', 'timedelta', 'tzinfo'},
             functools: {'reduce'},
@@ -823,426 +1188,889 @@ class Evaluator:
     def run(self, expr: str):
         h = ast.parse(expr, mode='exec')
         self.last_dump = ast.dump(h)
-        return self._run(h)
+        self.cost = 0
+        return self.compile(h)()
+
+    def charge(self, cost: float):
+        """Spend budget. Raise :exc:`TooExpensive` if it runs out."""
+
+        self.cost += cost
+        if self.cost > self.budget:
+            raise TooExpensive(f'Calculation costs over {self.budget} units')
+
+    def render(
+        self,
+        value,
+        *,
+        as_repr: bool = False,
+        limit: int = RENDER_LIMIT,
+    ) -> str:
+        """Render value into text of bounded length.
+
+        Huge numbers are shortened to their leading and trailing digits and
+        containers are rendered only until text reaches the limit.
+
+        """
+
+        return self.render_value(value, as_repr, limit, set())[:limit]
+
+    def render_value(self, value, as_repr: bool, limit: int, seen: set) -> str:
+        self.charge(1)
+        if isinstance(value, int):
+            return self.render_int(value)
+        if isinstance(value, decimal.Decimal):
+            return self.render_decimal(value, as_repr)
+        if isinstance(value, (str, bytes)):
+            shortened = value[:limit]
+            text = repr(shortened) if as_repr else str(shortened)
+            if len(shortened) < len(value):
+                text += '...'
+            return text
+        if isinstance(value, (dict, list, tuple, set, frozenset)):
+            return self.render_container(value, limit, seen)
+        return repr(value) if as_repr else str(value)
+
+    def render_int(self, value: int) -> str:
+        bits = value.bit_length()
+        if bits <= RENDER_LIMIT * 3:
+            self.charge(estimate_str_cost(value))
+            return str(value)
+
+        sign = '-' if value < 0 else ''
+        value = abs(value)
+        unit = 10**PREVIEW_DIGITS
+        self.charge(estimate_division_cost(value, unit))
+        tail = str(value % unit).zfill(PREVIEW_DIGITS)
+        # real number of digits is count, count + 1 or count + 2
+        count = (bits - 1) * 301029995 // 10**9 + 1
+        cost = estimate_pow_cost(10, count - PREVIEW_DIGITS)
+        if self.cost + cost <= self.budget:
+            self.charge(cost)
+            try:
+                divisor = 10 ** (count - PREVIEW_DIGITS)
+                head = value // divisor
+            except MemoryError:
+                pass
+            else:
+                while head >= unit:
+                    head //= 10
+                    count += 1
+                return f'{sign}{head}...{tail} ({count} digits)'
+        return f'{sign}...{tail} (about {count} digits)'
+
+    def render_decimal(self, value: decimal.Decimal, as_repr: bool) -> str:
+        text = str(value)
+        self.charge(len(text) / 16)
+        suffix = ''
+        if len(text) > RENDER_LIMIT:
+            mantissa = text.partition('E')[0]
+            count = len(mantissa) - mantissa.count('-') - mantissa.count('.')
+            head = text[:PREVIEW_DIGITS]
+            tail = text[-PREVIEW_DIGITS:]
+            text = f'{head}...{tail}'
+            suffix = f' ({count} digits)'
+        if as_repr:
+            return f"Decimal('{text}'){suffix}"
+        return f'{text}{suffix}'
+
+    def render_container(self, value, limit: int, seen: set) -> str:
+        if isinstance(value, dict):
+            opening, closing = '{', '}'
+        elif isinstance(value, list):
+            opening, closing = '[', ']'
+        elif isinstance(value, tuple):
+            opening, closing = '(', ')'
+        elif not value:
+            return f'{value.__class__.__name__}()'
+        elif isinstance(value, frozenset):
+            opening, closing = 'frozenset({', '})'
+        else:
+            opening, closing = '{', '}'
+
+        if id(value) in seen or len(seen) >= RENDER_MAX_DEPTH:
+            return f'{opening}...{closing}'
+
+        seen.add(id(value))
+        parts: list[str] = []
+        size = len(opening) + len(closing)
+        for item in value:
+            if size >= limit:
+                parts.append('...')
+                break
+            if isinstance(value, dict):
+                key = self.render_value(item, True, limit - size, seen)
+                val = self.render_value(
+                    value[item],
+                    True,
+                    max(limit - size - len(key), 0),
+                    seen,
+                )
+                text = f'{key}: {val}'
+            else:
+                text = self.render_value(item, True, limit - size, seen)
+            parts.append(text)
+            size += len(text) + 2
+        seen.discard(id(value))
+
+        if isinstance(value, tuple) and len(value) == 1:
+            return f'({parts[0]},)'
+        return opening + ', '.join(parts) + closing
+
+    def compile(self, node) -> CODE_TYPE:
+        """Compile node to closure which evaluates it."""
 
-    def _run(self, node):
         if node is None:
-            return None
+            return return_none
+
+        cls = node.__class__
+        if cls in FORBIDDEN_NODES:
+            return make_raiser(BadSyntax, FORBIDDEN_NODES[cls])
+        compiler = getattr(self, f'compile_{cls.__name__.lower()}', None)
+        if compiler is None:
+            return make_raiser(NotImplementedError)
+        return compiler(node)
+
+    def make_body(self, nodes: list) -> CODE_TYPE:
+        """Compile statements which spend cost of their nodes at once."""
+
+        codes = [self.compile(x) for x in nodes]
+        cost = sum(count_nodes(x) for x in nodes)
+
+        def block():
+            self.charge(cost)
+            for code in codes:
+                code()
+
+        return block
+
+    def make_loop_body(self, nodes: list, header: Any) -> CODE_TYPE:
+        """Compile body of loop which stops at break or continue.
 
-        return getattr(
-            self,
-            f'visit_{node.__class__.__name__.lower()}',
-            self.no_impl,
-        )(node)
+        Return whether loop should be stopped.
+        Each iteration spends cost of body and header of loop.
 
-    def assign(self, node, val):
+        """
+
+        codes = [self.compile(x) for x in nodes]
+        cost = 1 + count_nodes(header) + sum(count_nodes(x) for x in nodes)
+
+        def body():
+            self.charge(cost)
+            self.current_interrupt = None
+            for code in codes:
+                code()
+                if self.current_interrupt is not None:
+                    break
+            return isinstance(self.current_interrupt, _ast.Break)
+
+        return body
+
+    def make_assigner(self, node) -> Callable[[Any], None]:
         cls = node.__class__
+        symbol_table = self.symbol_table
 
         if cls == _ast.Name:
-            self.symbol_table[node.id] = val
+            name = node.id
+
+            def assign(val):
+                symbol_table[name] = val
+
         elif cls in (_ast.Tuple, _ast.List):
-            if not isinstance(val, abc.Iterable):
-                raise TypeError(
-                    'cannot unpack non-iterable {} object'.format(
-                        type(val).__name__,
+            targets = [self.make_assigner(x) for x in node.elts]
+
+            def assign(val):
+                if not isinstance(val, abc.Iterable):
+                    raise TypeError(
+                        'cannot unpack non-iterable {} object'.format(
+                            type(val).__name__,
+                        )
                     )
-                )
-            for telem, tval in itertools.zip_longest(
-                node.elts,
-                val,
-                fillvalue=PLACEHOLDER,
-            ):
-                if telem == PLACEHOLDER:
-                    raise ValueError('not enough values to unpack')
-                if tval == PLACEHOLDER:
-                    raise ValueError('too many values to unpack')
-                self.assign(telem, tval)
+                for target, tval in itertools.zip_longest(
+                    targets,
+                    val,
+                    fillvalue=PLACEHOLDER,
+                ):
+                    if target is PLACEHOLDER:
+                        raise ValueError('not enough values to unpack')
+                    if tval is PLACEHOLDER:
+                        raise ValueError('too many values to unpack')
+                    target(tval)
+
         elif cls == _ast.Subscript:
-            sym = self._run(node.value)
-            xslice = self._run(node.slice)
-            if isinstance(node.slice, _ast.Slice):
-                sym[slice(xslice.start, xslice.stop)] = val
+            value = self.compile(node.value)
+            index = self.compile(node.slice)
+            if node.slice.__class__ == _ast.Slice:
+
+                def assign(val):
+                    sym = value()
+                    xslice = index()
+                    sym[slice(xslice.start, xslice.stop)] = val
+
             else:
-                sym[xslice] = val
+
+                def assign(val):
+                    sym = value()
+                    sym[index()] = val
+
         else:
-            raise BadSyntax('This assign method is not allowed')
 
-    def delete(self, node):
+            def assign(val):
+                raise BadSyntax('This assign method is not allowed')
+
+        return assign
+
+    def make_unbinder(self, node) -> CODE_TYPE:
         cls = node.__class__
+        symbol_table = self.symbol_table
 
         if cls == _ast.Name:
-            del self.symbol_table[node.id]
-        elif cls == _ast.Tuple:
-            for elt in node.elts:
-                self.delete(elt)
+            name = node.id
 
-    def no_impl(self, node):
-        raise NotImplementedError
+            def unbind():
+                del symbol_table[name]
 
-    def visit_annassign(self, node: _ast.AnnAssign):
-        raise BadSyntax('You can not use annotation syntax')
+        elif cls == _ast.Tuple:
+            unbind = make_block([self.make_unbinder(x) for x in node.elts])
+        else:
+            unbind = return_none
+        return unbind
+
+    def make_comprehension(
+        self,
+        generators: list[_ast.comprehension],
+        emit: Callable[[Any], None],
+        emit_cost: int,
+    ) -> Callable[[Any], None]:
+        """Compile loops of comprehension which emit items to result.
+
+        Each iteration spends cost of target, conditions and emitted nodes.
+
+        """
+
+        gen = generators[0]
+        iter_code = self.compile(gen.iter)
+        assign = self.make_assigner(gen.target)
+        unbind = self.make_unbinder(gen.target)
+        ifs = [self.compile(x) for x in gen.ifs]
+        cost = count_nodes(gen.target) + sum(count_nodes(x) for x in gen.ifs)
+        if len(generators) > 1:
+            inner = self.make_comprehension(generators[1:], emit, emit_cost)
+        else:
+            inner = emit
+            cost += emit_cost
+
+        def loop(result):
+            for val in iter_code():
+                self.charge(cost)
+                assign(val)
+                for cond in ifs:
+                    if not cond():
+                        break
+                else:
+                    inner(result)
+                unbind()
 
-    def visit_assert(self, node: _ast.Assert):
-        raise BadSyntax('You can not use assertion syntax')
+        return loop
 
-    def visit_assign(self, node: _ast.Assign):  # targets, value
-        value = self._run(node.value)
-        for tnode in node.targets:
-            self.assign(tnode, value)
-        return
+    def compile_assign(self, node: _ast.Assign):  # targets, value
+        value = self.compile(node.value)
+        targets = [self.make_assigner(x) for x in node.targets]
 
-    def visit_asyncfor(self, node: _ast.AsyncFor):
-        raise BadSyntax('You can not use `async for` loop syntax')
+        if len(targets) == 1:
+            target = targets[0]
 
-    def visit_asyncfunctiondef(self, node: _ast.AsyncFunctionDef):
-        raise BadSyntax('Defining new coroutine via def syntax is not allowed')
+            def code():
+                target(value())
 
-    def visit_asyncwith(self, node: _ast.AsyncWith):
-        raise BadSyntax('You can not use `async with` syntax')
+        else:
 
-    def visit_attribute(self, node: _ast.Attribute):  # value, attr, ctx
-        value = self._run(node.value)
-        t = type(value)
-        try:
-            if value in self.allowed_modules:
-                if node.attr in self.allowed_modules[value]:
-                    return getattr(value, node.attr)
-                raise BadSyntax(f'You can not access `{node.attr}` attribute')
-            if value in self.allowed_class_properties:
-                if node.attr in self.allowed_class_properties[value]:
-                    return getattr(value, node.attr)
-                raise BadSyntax(f'You can not access `{node.attr}` attribute')
-        except TypeError:
-            pass
-        if t in self.allowed_instance_properties:
-            if node.attr in self.allowed_instance_properties[t]:
-                return getattr(value, node.attr)
-            raise BadSyntax(f'You can not access `{node.attr}` attribute')
-        raise BadSyntax(f'You can not access attributes of {t}')
-
-    def visit_augassign(self, node: _ast.AugAssign):  # target, op, value
-        value = self._run(node.value)
+            def code():
+                val = value()
+                for target in targets:
+                    target(val)
+
+        return code
+
+    def compile_attribute(self, node: _ast.Attribute):  # value, attr, ctx
+        value_code = self.compile(node.value)
+        attr = node.attr
+        allowed_modules = self.allowed_modules
+        allowed_class_properties = self.allowed_class_properties
+        allowed_instance_properties = self.allowed_instance_properties
+
+        def code():
+            value = value_code()
+            t = type(value)
+            try:
+                if value in allowed_modules:
+                    if attr in allowed_modules[value]:
+                        return getattr(value, attr)
+                    raise BadSyntax(f'You can not access `{attr}` attribute')
+                if value in allowed_class_properties:
+                    if attr in allowed_class_properties[value]:
+                        return getattr(value, attr)
+                    raise BadSyntax(f'You can not access `{attr}` attribute')
+            except TypeError:
+                pass
+            if t in allowed_instance_properties:
+                if attr in allowed_instance_properties[t]:
+                    return getattr(value, attr)
+                raise BadSyntax(f'You can not access `{attr}` attribute')
+            raise BadSyntax(f'You can not access attributes of {t}')
+
+        return code
+
+    def compile_augassign(self, node: _ast.AugAssign):  # target, op, value
+        value = self.compile(node.value)
         target = node.target
         target_cls = target.__class__
-        op_cls = node.op.__class__
+        op = BINOP_TABLE[node.op.__class__]
+        estimate = BINOP_COST_TABLE.get(
+            node.op.__class__,
+            estimate_conversion_cost,
+        )
+        symbol_table = self.symbol_table
 
         if target_cls == _ast.Name:
             target_id = target.id  # type: ignore
-            self.symbol_table[target_id] = BINOP_TABLE[op_cls](
-                self.symbol_table[target_id],
-                value,
-            )
+
+            def code():
+                val = value()
+                current = symbol_table[target_id]
+                self.charge(estimate(current, val))
+                symbol_table[target_id] = op(current, val)
+
         elif target_cls == _ast.Subscript:
-            sym = self._run(target.value)  # type: ignore
-            xslice = self._run(target.slice)  # type: ignore
+            sym_code = self.compile(target.value)  # type: ignore
+            index = self.compile(target.slice)  # type: ignore
             if not isinstance(
                 target.slice, (_ast.Tuple, _ast.Slice)  # type: ignore
             ):
-                sym[xslice] = BINOP_TABLE[op_cls](
-                    sym[xslice],
-                    value,
-                )
+
+                def code():
+                    val = value()
+                    sym = sym_code()
+                    xslice = index()
+                    current = sym[xslice]
+                    self.charge(estimate(current, val))
+                    sym[xslice] = op(current, val)
+
             else:
-                raise BadSyntax('This assign method is not allowed')
+
+                def code():
+                    value()
+                    sym_code()
+                    index()
+                    raise BadSyntax('This assign method is not allowed')
+
         else:
-            raise BadSyntax('This assign method is not allowed')
-        return
 
-    def visit_await(self, node: _ast.Await):
-        raise BadSyntax('You can not await anything')
+            def code():
+                value()
+                raise BadSyntax('This assign method is not allowed')
+
+        return code
 
-    def visit_binop(self, node: _ast.BinOp):  # left, op, right
+    def compile_binop(self, node: _ast.BinOp):  # left, op, right
         op = BINOP_TABLE.get(node.op.__class__)
+        if not op:
+            return make_raiser(NotImplementedError)
+        estimate = BINOP_COST_TABLE.get(node.op.__class__)
+        left = self.compile(node.left)
+        right = self.compile(node.right)
+
+        if estimate:
+
+            def code():
+                a = left()
+                b = right()
+                self.charge(estimate(a, b))
+                return op(a, b)
+
+        else:
 
-        if op:
-            return op(self._run(node.left), self._run(node.right))
-        raise NotImplementedError
+            def code():
+                a = left()
+                b = right()
+                if a.__class__ is not b.__class__:
+                    self.charge(estimate_conversion_cost(a, b))
+                return op(a, b)
 
-    def visit_boolop(self, node: _ast.BoolOp):  # left, op, right
+        return code
+
+    def compile_boolop(self, node: _ast.BoolOp):  # op, values
         op = BOOLOP_TABLE.get(node.op.__class__)
+        if not op:
+            return make_raiser(NotImplementedError)
+        values = [self.compile(x) for x in node.values]
 
-        if op:
-            return functools.reduce(op, map(self._run, node.values), True)
-        raise NotImplementedError
-
-    def visit_break(self, node: _ast.Break):
-        self.current_interrupt = node
-
-    def visit_call(self, node: _ast.Call):  # func, args, keywords
-        func = self._run(node.func)
-        args = [self._run(x) for x in node.args]
-        keywords = {x.arg: self._run(x.value) for x in node.keywords}
-        return func(*args, **keywords)
-
-    def visit_compare(self, node: _ast.Compare):  # left, ops, comparators
-        lval = self._run(node.left)
-        out = True
-        for op, rnode in zip(node.ops, node.comparators):
-            rval = self._run(rnode)
-            cmpop = COMPARE_TABLE.get(op.__class__)
-            if cmpop:
-                out = cmpop(lval, rval)
-                lval = rval
-            else:
-                raise NotImplementedError
-        return out
+        def code():
+            return functools.reduce(op, [x() for x in values], True)
+
+        return code
+
+    def compile_break(self, node: _ast.Break):
+        def code():
+            self.current_interrupt = node
 
-    def visit_constant(self, node: _ast.Constant):  # value, kind
-        if self.decimal_mode and isinstance(node.value, (int, float)):
-            return Decimal(str(node.value))
-        return node.value
+        return code
 
-    def visit_continue(self, node: _ast.Continue):
-        self.current_interrupt = node
+    def compile_call(self, node: _ast.Call):  # func, args, keywords
+        func = self.compile(node.func)
+        args = [self.compile(x) for x in node.args]
+        keywords = [(x.arg, self.compile(x.value)) for x in node.keywords]
+
+        if not keywords:
+
+            def code():
+                f = func()
+                a = [x() for x in args]
+                self.charge_call(f, a, {})
+                return f(*a)
+
+        else:
 
-    def visit_classdef(self, node: _ast.ClassDef):
-        raise BadSyntax('Defining new class via def syntax is not allowed')
+            def code():
+                f = func()
+                a = [x() for x in args]
+                kw = {k: v() for k, v in keywords}
+                self.charge_call(f, a, kw)
+                return f(*a, **kw)
 
-    def visit_delete(self, node: _ast.Delete):  # targets
+        return code
+
+    def charge_call(self, func, args: list, kwargs: dict[str, Any]):
+        try:
+            estimate = CALL_COST_TABLE.get(func)
+        except TypeError:  # unhashable callable
+            return
+        if estimate is not None:
+            try:
+                cost = estimate(*args, **kwargs)
+            except TypeError:  # wrong arguments. let func raise error.
+                return
+            self.charge(cost)
+
+    def compile_compare(self, node: _ast.Compare):  # left, ops, comparators
+        left = self.compile(node.left)
+        pairs = [
+            (COMPARE_TABLE.get(op.__class__), self.compile(x))
+            for op, x in zip(node.ops, node.comparators)
+        ]
+
+        if len(pairs) == 1 and pairs[0][0]:
+            cmpop, right = pairs[0]
+
+            def code():
+                return cmpop(left(), right())
+
+        else:
+
+            def code():
+                lval = left()
+                out = True
+                for cmpop, right in pairs:
+                    rval = right()
+                    if cmpop:
+                        out = cmpop(lval, rval)
+                        lval = rval
+                    else:
+                        raise NotImplementedError
+                return out
+
+        return code
+
+    def compile_constant(self, node: _ast.Constant):  # value, kind
+        value = node.value
+        if self.decimal_mode and isinstance(value, (int, float)):
+            try:
+                value = Decimal(str(value))
+            except decimal.InvalidOperation:
+                return functools.partial(Decimal, str(value))
+
+        def code():
+            return value
+
+        return code
+
+    def compile_continue(self, node: _ast.Continue):
+        def code():
+            self.current_interrupt = node
+
+        return code
+
+    def compile_delete(self, node: _ast.Delete):  # targets
+        codes = []
         for target in node.targets:
             target_cls = target.__class__
             if target_cls == _ast.Name:
-                del self.symbol_table[target.id]  # type: ignore
+                codes.append(self.make_name_deleter(target.id))  # type: ignore
             elif target_cls == _ast.Subscript:
-                sym = self._run(target.value)  # type: ignore
-                xslice = self._run(target.slice)  # type: ignore
+                sym_code = self.compile(target.value)  # type: ignore
+                index = self.compile(target.slice)  # type: ignore
                 if not isinstance(
                     target.slice,  # type: ignore
                     (_ast.Tuple, _ast.Slice),
                 ):
-                    del sym[xslice]
+                    codes.append(self.make_item_deleter(sym_code, index))
                 else:
-                    raise BadSyntax('This delete method is not allowed')
+                    codes.append(self.make_delete_refuser(sym_code, index))
             else:
-                raise BadSyntax('This delete method is not allowed')
-        return
+                codes.append(
+                    make_raiser(BadSyntax, 'This delete method is not allowed')
+                )
+        return make_block(codes)
+
+    def make_name_deleter(self, name: str) -> CODE_TYPE:
+        symbol_table = self.symbol_table
+
+        def code():
+            del symbol_table[name]
+
+        return code
+
+    def make_item_deleter(
+        self,
+        sym_code: CODE_TYPE,
+        index: CODE_TYPE,
+    ) -> CODE_TYPE:
+        def code():
+            sym = sym_code()
+            del sym[index()]
+
+        return code
+
+    def make_delete_refuser(
+        self,
+        sym_code: CODE_TYPE,
+        index: CODE_TYPE,
+    ) -> CODE_TYPE:
+        def code():
+            sym_code()
+            index()
+            raise BadSyntax('This delete method is not allowed')
+
+        return code
+
+    def compile_dict(self, node: _ast.Dict):  # keys, values
+        pairs = [
+            (self.compile(k), self.compile(v))
+            for k, v in zip(node.keys, node.values)
+        ]
+
+        def code():
+            return {k(): v() for k, v in pairs}
+
+        return code
+
+    def compile_dictcomp(self, node: _ast.DictComp):  # key, value, generators
+        key = self.compile(node.key)
+        value = self.compile(node.value)
+
+        def emit(result):
+            k = key()
+            result[k] = value()
+
+        loop = self.make_comprehension(
+            node.generators,
+            emit,
+            count_nodes(node.key) + count_nodes(node.value),
+        )
 
-    def visit_dict(self, node: _ast.Dict):  # keys, values
-        return {
-            self._run(k): self._run(v) for k, v in zip(node.keys, node.values)
-        }
+        def code():
+            result: dict = {}
+            loop(result)
+            return result
 
-    def visit_dictcomp(self, node: _ast.DictComp):  # key, value, generators
-        result: dict = {}
-        current_gen = node.generators[0]
-        if current_gen.__class__ == _ast.comprehension:
-            for val in self._run(current_gen.iter):
-                self.assign(current_gen.target, val)
-                add = True
-                for cond in current_gen.ifs:
-                    add = add and self._run(cond)
-                if add:
-                    if len(node.generators) > 1:
-                        r = self.visit_dictcomp(
-                            _ast.DictComp(
-                                key=node.key,
-                                value=node.value,
-                                generators=node.generators[1:],
-                            )
-                        )
-                        result.update(r)
-                    else:
-                        key = self._run(node.key)
-                        value = self._run(node.value)
-                        result[key] = value
-                self.delete(current_gen.target)
-        return result
+        return code
 
-    def visit_expr(self, node: _ast.Expr):  # value,
-        return self._run(node.value)
+    def compile_expr(self, node: _ast.Expr):  # value,
+        return self.compile(node.value)
 
-    def visit_functiondef(self, node: _ast.FunctionDef):
-        raise BadSyntax('Defining new function via def syntax is not allowed')
+    def compile_for(self, node: _ast.For):  # target, iter, body, orelse
+        iter_code = self.compile(node.iter)
+        assign = self.make_assigner(node.target)
+        body = self.make_loop_body(node.body, node.target)
+        orelse = self.make_body(node.orelse)
 
-    def visit_for(self, node: _ast.For):  # target, iter, body, orelse
-        for val in self._run(node.iter):
-            self.assign(node.target, val)
-            self.current_interrupt = None
-            for tnode in node.body:
-                self._run(tnode)
-                if self.current_interrupt is not None:
+        def code():
+            for val in iter_code():
+                assign(val)
+                if body():
                     break
-            if isinstance(self.current_interrupt, _ast.Break):
-                break
-        else:
-            for tnode in node.orelse:
-                self._run(tnode)
+            else:
+                orelse()
 
-        self.current_interrupt = None
+            self.current_interrupt = None
+
+        return code
 
-    def visit_formattedvalue(self, node: _ast.FormattedValue):
+    def compile_formattedvalue(self, node: _ast.FormattedValue):
         # value, conversion, format_spec
-        value = self._run(node.value)
-        format_spec = self._run(node.format_spec)
-        if format_spec is None:
-            format_spec = ''
-        return format(value, format_spec)
-
-    def visit_generatorexp(self, node: _ast.GeneratorExp):
-        raise BadSyntax('Defining new generator expression is not allowed')
-
-    def visit_global(self, node: _ast.Global):
-        raise BadSyntax('You can not use `global` syntax')
-
-    def visit_if(self, node: _ast.If):  # test, body, orelse
-        stmts = node.body if self._run(node.test) else node.orelse
-        for stmt in stmts:
-            self._run(stmt)
-        return
+        value = self.compile(node.value)
+        format_spec = self.compile(node.format_spec)
+
+        def code():
+            v = value()
+            spec = format_spec()
+            if spec is None:
+                spec = ''
+            self.charge(estimate_str_cost(v))
+            return format(v, spec)
+
+        return code
+
+    def compile_if(self, node: _ast.If):  # test, body, orelse
+        test = self.compile(node.test)
+        body = self.make_body(node.body)
+        orelse = self.make_body(node.orelse)
+
+        def code():
+            if test():
+                body()
+            else:
+                orelse()
+
+        return code
+
+    def compile_ifexp(self, node: _ast.IfExp):  # test, body, orelse
+        test = self.compile(node.test)
+        body = self.compile(node.body)
+        orelse = self.compile(node.orelse)
+
+        def code():
+            return body() if test() else orelse()
 
-    def visit_ifexp(self, node: _ast.IfExp):  # test, body, orelse
-        return self._run(node.body if self._run(node.test) else node.orelse)
+        return code
 
-    def visit_import(self, node: _ast.Import):
-        raise BadSyntax('You can not import anything')
+    def compile_joinedstr(self, node: _ast.JoinedStr):  # values,
+        values = [self.compile(x) for x in node.values]
 
-    def visit_importfrom(self, node: _ast.ImportFrom):
-        raise BadSyntax('You can not import anything')
+        def code():
+            return ''.join([x() for x in values])
 
-    def visit_joinedstr(self, node: _ast.JoinedStr):  # values,
-        return ''.join(self._run(x) for x in node.values)
+        return code
 
-    def visit_lambda(self, node: _ast.Lambda):
-        raise BadSyntax(
-            'Defining new function via lambda' ' syntax is not allowed'
+    def compile_list(self, node: _ast.List):  # elts, ctx
+        elts = [self.compile(x) for x in node.elts]
+
+        def code():
+            return [x() for x in elts]
+
+        return code
+
+    def compile_listcomp(self, node: _ast.ListComp):  # elt, generators
+        elt = self.compile(node.elt)
+
+        def emit(result):
+            result.append(elt())
+
+        loop = self.make_comprehension(
+            node.generators,
+            emit,
+            count_nodes(node.elt),
         )
 
-    def visit_list(self, node: _ast.List):  # elts, ctx
-        return [self._run(x) for x in node.elts]
-
-    def visit_listcomp(self, node: _ast.ListComp):  # elt, generators
-        result: list = []
-        current_gen = node.generators[0]
-        if current_gen.__class__ == _ast.comprehension:
-            for val in self._run(current_gen.iter):
-                self.assign(current_gen.target, val)
-                add = True
-                for cond in current_gen.ifs:
-                    add = add and self._run(cond)
-                if add:
-                    if len(node.generators) > 1:
-                        r = self.visit_listcomp(
-                            _ast.ListComp(
-                                elt=node.elt,
-                                generators=node.generators[1:],
-                            )
-                        )
-                        result += r
-                    else:
-                        r = self._run(node.elt)
-                        result.append(r)
-                self.delete(current_gen.target)
-        return result
-
-    def visit_module(self, node: _ast.Module):  # body,
-        last = None
-        for body_node in node.body:
-            last = self._run(body_node)
-        return last
-
-    def visit_name(self, node: _ast.Name):  # id, ctx
-        ctx = node.ctx.__class__
-        if ctx == ast.Del:
-            return node.id
-        else:
-            if node.id in self.symbol_table:
-                return self.symbol_table[node.id]
-            if node.id in self.global_symbol_table:
-                return self.global_symbol_table[node.id]
+        def code():
+            result: list = []
+            loop(result)
+            return result
+
+        return code
+
+    def compile_module(self, node: _ast.Module):  # body,
+        codes = [self.compile(x) for x in node.body]
+        cost = sum(count_nodes(x) for x in node.body)
+
+        def code():
+            self.charge(cost)
+            last = None
+            for body_code in codes:
+                last = body_code()
+            return last
+
+        return code
+
+    def compile_name(self, node: _ast.Name):  # id, ctx
+        name = node.id
+        if node.ctx.__class__ == ast.Del:
+
+            def code():
+                return name
+
+            return code
+
+        symbol_table = self.symbol_table
+        global_symbol_table = self.global_symbol_table
+
+        def code():
+            if name in symbol_table:
+                return symbol_table[name]
+            if name in global_symbol_table:
+                return global_symbol_table[name]
             raise NameError()
 
-    def visit_nonlocal(self, node: _ast.Nonlocal):
-        raise BadSyntax('You can not use `nonlocal` syntax')
+        return code
 
-    def visit_pass(self, node: _ast.Pass):
-        return
+    def compile_pass(self, node: _ast.Pass):
+        return return_none
 
-    def visit_raise(self, node: _ast.Raise):
-        raise BadSyntax('You can not use `raise` syntax')
-
-    def visit_return(self, node: _ast.Return):
-        raise BadSyntax('You can not use `return` syntax')
-
-    def visit_set(self, node: _ast.Set):  # elts,
-        return {self._run(x) for x in node.elts}
-
-    def visit_setcomp(self, node: _ast.SetComp):  # elt, generators
-        result = set()
-        current_gen = node.generators[0]
-        if current_gen.__class__ == _ast.comprehension:
-            for val in self._run(current_gen.iter):
-                self.assign(current_gen.target, val)
-                add = True
-                for cond in current_gen.ifs:
-                    add = add and self._run(cond)
-                if add:
-                    if len(node.generators) > 1:
-                        r = self.visit_setcomp(
-                            _ast.SetComp(
-                                elt=node.elt,
-                                generators=node.generators[1:],
-                            )
-                        )
-                        result |= r
-                    else:
-                        r = self._run(node.elt)
-                        result.add(r)
-                self.delete(current_gen.target)
-        return result
-
-    def visit_slice(self, node: _ast.Slice):  # lower, upper, step
-        return slice(
-            self._run(node.lower),
-            self._run(node.upper),
-            self._run(node.step),
+    def compile_set(self, node: _ast.Set):  # elts,
+        elts = [self.compile(x) for x in node.elts]
+
+        def code():
+            return {x() for x in elts}
+
+        return code
+
+    def compile_setcomp(self, node: _ast.SetComp):  # elt, generators
+        elt = self.compile(node.elt)
+
+        def emit(result):
+            result.add(elt())
+
+        loop = self.make_comprehension(
+            node.generators,
+            emit,
+            count_nodes(node.elt),
         )
 
-    def visit_subscript(self, node: _ast.Subscript):  # value, slice, ctx
-        return self._run(node.value)[self._run(node.slice)]
+        def code():
+            result: set = set()
+            loop(result)
+            return result
+
+        return code
+
+    def compile_slice(self, node: _ast.Slice):  # lower, upper, step
+        lower = self.compile(node.lower)
+        upper = self.compile(node.upper)
+        step = self.compile(node.step)
+
+        def code():
+            return slice(lower(), upper(), step())
+
+        return code
+
+    def compile_subscript(self, node: _ast.Subscript):  # value, slice, ctx
+        value = self.compile(node.value)
+        index = self.compile(node.slice)
+
+        def code():
+            return value()[index()]
 
-    def visit_try(self, node: _ast.Try):
-        raise BadSyntax('You can not use `try` syntax')
+        return code
 
-    def visit_tuple(self, node: _ast.Tuple):  # elts, ctx
-        return tuple(self._run(x) for x in node.elts)
+    def compile_tuple(self, node: _ast.Tuple):  # elts, ctx
+        elts = [self.compile(x) for x in node.elts]
 
-    def visit_unaryop(self, node: _ast.UnaryOp):  # op, operand
+        def code():
+            return tuple([x() for x in elts])
+
+        return code
+
+    def compile_unaryop(self, node: _ast.UnaryOp):  # op, operand
         op = UNARYOP_TABLE.get(node.op.__class__)
-        if op:
-            return op(self._run(node.operand))
-        raise NotImplementedError
+        if not op:
+            return make_raiser(NotImplementedError)
+        operand = self.compile(node.operand)
 
-    def visit_while(self, node: _ast.While):  # test, body, orelse
-        while self._run(node.test):
-            self.current_interrupt = None
-            for tnode in node.body:
-                self._run(tnode)
-                if self.current_interrupt is not None:
+        def code():
+            return op(operand())
+
+        return code
+
+    def compile_while(self, node: _ast.While):  # test, body, orelse
+        test = self.compile(node.test)
+        body = self.make_loop_body(node.body, node.test)
+        orelse = self.make_body(node.orelse)
+
+        def code():
+            while test():
+                if body():
                     break
-            if isinstance(self.current_interrupt, _ast.Break):
-                break
-        else:
-            for tnode in node.orelse:
-                self._run(tnode)
+            else:
+                orelse()
 
-        self.current_interrupt = None
+            self.current_interrupt = None
 
-    def visit_with(self, node: _ast.With):
-        raise BadSyntax('You can not use `with` syntax')
+        return code
 
-    def visit_yield(self, node: _ast.Yield):
-        raise BadSyntax('You can not use `yield` syntax')
 
-    def visit_yieldfrom(self, node: _ast.YieldFrom):
-        raise BadSyntax('You can not use `yield from` syntax')
+#: Longer input is not validated in main process to bound its cost.
+VALIDATION_MAX_LENGTH = 2000
 
+#: Nodes which are handled as part of other nodes by :class:`Evaluator`.
+HELPER_NODES = (
+    _ast.alias,
+    _ast.arg,
+    _ast.arguments,
+    _ast.boolop,
+    _ast.cmpop,
+    _ast.comprehension,
+    _ast.excepthandler,
+    _ast.expr_context,
+    _ast.keyword,
+    _ast.operator,
+    _ast.unaryop,
+    _ast.withitem,
+)
 
-def calculate(expr: str, *, decimal_mode: bool = True):
-    import resource
 
-    limit = 2 * 1024 * 1024
-    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+def validate(expr: str) -> Optional[_ast.Module]:
+    """Check syntax of expression without evaluating it.
+
+    Raise same error as :class:`Evaluator` for syntax error and nodes which
+    it never runs. Return ``None`` if expression is too long or too deep to
+    check here cheaply.
+
+    """
+
+    if len(expr) > VALIDATION_MAX_LENGTH:
+        return None
+    try:
+        tree = ast.parse(expr, mode='exec')
+    except (RecursionError, MemoryError):
+        return None
+
+    for node in ast.walk(tree):
+        if isinstance(node, HELPER_NODES):
+            continue
+        cls = node.__class__
+        if cls in FORBIDDEN_NODES:
+            raise BadSyntax(FORBIDDEN_NODES[cls])
+        if not hasattr(Evaluator, f'compile_{cls.__name__.lower()}'):
+            raise NotImplementedError
+    return tree
+
+
+def calculate(expr: str, *, decimal_mode: bool = True):
     e = Evaluator(decimal_mode=decimal_mode)
     result = e.run(expr)
 
     return result, e.symbol_table
+
+
+def calculate_and_render(
+    expr: str,
+    *,
+    decimal_mode: bool = True,
+) -> tuple[Optional[str], str]:
+    """Calculate and render result and local state under same budget."""
+
+    e = Evaluator(decimal_mode=decimal_mode)
+    result = e.run(expr)
+
+    lines: list[str] = []
+    size = 0
+    for key, value in e.symbol_table.items():
+        if size >= RENDER_LIMIT:
+            break
+        text = e.render(value, as_repr=True, limit=RENDER_LIMIT - size)
+        lines.append(f'{key} = {text}')
+        size += len(lines[-1]) + 1
+
+    return (
+        None if result is None else e.render(result),
+        '\n'.join(lines)[:RENDER_LIMIT],
+    )
@@ -6,7 +6,7 @@ from ...command import option
 from ...event import Message
 
 
-@box.command('select', ['선택', '골라'])
+@box.command('select', ['선택', '골라'], needs_registry=False)
 @option('--seed')
 @argument('items', nargs=-1)
 async def select(bot, event: Message, items: list[str], seed: int):
@@ -1,12 +1,14 @@
 import asyncio
 import logging
+import time
+from typing import Any
 
 from ..bot import BotReconnect
+from ..bot import next_reconnect_delay
 from ..box import box
 from ..event import ChannelArchive
 from ..event import ChannelCreated
 from ..event import ChannelDeleted
-from ..event import ChannelHistoryChanged
 from ..event import ChannelJoined
 from ..event import ChannelLeft
 from ..event import ChannelMarked
@@ -14,191 +16,415 @@ from ..event import ChannelRename
 from ..event import ChannelUnarchive
 from ..event import ChatterboxSystemStart
 from ..event import GroupArchive
-from ..event import GroupClose
-from ..event import GroupHistoryChanged
 from ..event import GroupJoined
 from ..event import GroupLeft
 from ..event import GroupMarked
 from ..event import GroupOpen
 from ..event import GroupRename
 from ..event import GroupUnarchive
-from ..event import IMClose
 from ..event import IMCreated
-from ..event import IMHistoryChanged
 from ..event import IMMarked
 from ..event import IMOpen
 from ..event import TeamJoin
 from ..event import TeamMigrationStarted
 from ..event import UserChange
+from ..snapshot import Snapshot
+from ..snapshot import load_snapshot
+from ..snapshot import save_snapshot
 from ..types.channel import DirectMessageChannel
 from ..types.channel import PrivateChannel
 from ..types.channel import PublicChannel
 from ..types.user import User
 
+#: Reload all users instead of calling users.info more than this.
+USERS_LIST_THRESHOLD = 20
+
 logger = logging.getLogger(__name__)
 
 
-@box.on(ChatterboxSystemStart)
-async def on_start(bot):
-    async def channels():
-        cursor = None
-        bot.channels.clear()
-        while True:
-            result = await bot.api.conversations.list(
-                cursor=cursor,
-                types='public_channel,private_channel,im',
-            )
-            cursor = None
-            if 'response_metadata' in result.body:
-                cursor = result.body['response_metadata'].get('next_cursor')
-            for c in result.body['channels']:
-                resp = await bot.api.conversations.info(c['id'])
-                if not resp.body['ok']:
-                    continue
-                channel = resp.body['channel']
-                if channel.get('is_channel'):
-                    bot.channels.append(PublicChannel(**channel))
-                elif channel.get('is_im'):
-                    bot.ims.append(DirectMessageChannel(**channel))
-                elif channel.get('is_group'):
-                    bot.groups.append(PrivateChannel(**channel))
-            if not cursor:
-                break
-
-    async def users():
-        bot.users.clear()
-        result = await bot.api.users.list(presence=False)
-        for u in result.body['members']:
-            bot.users.append(User(**u))
-
-    bot.is_ready = False
-
-    await asyncio.wait(
-        (
-            channels(),
-            users(),
-        ),
-        return_when=asyncio.FIRST_EXCEPTION,
-    )
+def install_users(bot, members: list[dict[str, Any]]):
+    # users which events changed while loading are newer than loaded data
+    changed = bot.registry.changed_ids
+    users = [User(**u) for u in members if u['id'] not in changed]
+    for id in changed:
+        user = bot.registry.users.get(id)
+        if user is not None:
+            users.append(user)
+    bot.registry.users.replace(users)
 
-    bot.is_ready = True
-
-    return True
 
+def install_channels(bot, channels: list[dict[str, Any]]):
+    new_channels = []
+    new_ims = []
+    new_groups = []
+    # channels which events changed while loading are newer than loaded data
+    changed = bot.registry.changed_ids
+    for channel in channels:
+        if channel['id'] in changed:
+            continue
+        if channel.get('is_channel'):
+            new_channels.append(PublicChannel(**channel))
+        elif channel.get('is_im'):
+            new_ims.append(DirectMessageChannel(**channel))
+        elif channel.get('is_group'):
+            new_groups.append(PrivateChannel(**channel))
+    for id in changed:
+        current = find_channel(bot, id)
+        if isinstance(current, PublicChannel):
+            new_channels.append(current)
+        elif isinstance(current, DirectMessageChannel):
+            new_ims.append(current)
+        elif isinstance(current, PrivateChannel):
+            new_groups.append(current)
+    bot.registry.channels.replace(new_channels)
+    bot.registry.ims.replace(new_ims)
+    bot.registry.groups.replace(new_groups)
 
-@box.on(TeamJoin)
-async def on_team_join(bot, event: TeamJoin):
-    logger.info('on team join start')
-    res = await bot.api.users.info(event.user)
-    bot.users.append(User(**res.body['user']))  # type: ignore
-    logger.info('on team join end')
 
-    return True
+def install_channel(bot, channel: dict[str, Any]):
+    if channel.get('is_channel'):
+        bot.registry.channels.add(PublicChannel(**channel))
+    elif channel.get('is_im'):
+        bot.registry.ims.add(DirectMessageChannel(**channel))
+    elif channel.get('is_group'):
+        bot.registry.groups.add(PrivateChannel(**channel))
 
 
-@box.on(UserChange)
-async def on_user_change(bot, event: UserChange):
-    if not (event.user.id and event.user.team_id):
-        return True
+def find_channel(bot, id: str):
+    for index in (
+        bot.registry.channels,
+        bot.registry.groups,
+        bot.registry.ims,
+    ):
+        channel = index.get(id)
+        if channel is not None:
+            return channel
+    return None
 
-    logger.info('on user change start')
-    res = await bot.api.users.info(event.user)
 
-    bot.users[:] = [u for u in bot.users if u.id != event.user.id] + [
-        User(**res.body['user'])  # type: ignore
-    ]
-    logger.info('on user change end')
+async def fetch_channels(bot) -> list[dict[str, Any]]:
+    semaphore = asyncio.Semaphore(bot.config.HYDRATION_CONCURRENCY)
+    loaded = 0
 
-    return True
+    async def channel_info(id: str):
+        nonlocal loaded
+        async with semaphore:
+            resp = await bot.api.conversations.info(id)
+        loaded += 1
+        if loaded % 100 == 0:
+            logger.info(f'{loaded} channels loaded')
+        if not resp.body['ok']:
+            return None
+        return resp.body['channel']
 
-
-@box.on(ChannelArchive)
-@box.on(ChannelCreated)
-@box.on(ChannelDeleted)
-@box.on(ChannelHistoryChanged)
-@box.on(ChannelJoined)
-@box.on(ChannelLeft)
-@box.on(ChannelMarked)
-@box.on(ChannelUnarchive)
-@box.on(ChannelRename)
-async def public_channel_mutation_detected(bot):
-    logger.info('public_channel_mutation_detected start')
     cursor = None
-    new_channels = []
+    tasks = []
     while True:
         result = await bot.api.conversations.list(
             cursor=cursor,
-            types='public_channel',
+            limit=200,
+            types='public_channel,private_channel,im',
         )
         cursor = result.body.get('response_metadata', {}).get('next_cursor')
-        for c in result.body['channels']:
-            res = await bot.api.conversations.info(c['id'])
-            new_channels.append(PublicChannel(**res.body['channel']))
+        tasks.extend(
+            asyncio.ensure_future(channel_info(c['id']))
+            for c in result.body['channels']
+        )
         if not cursor:
             break
 
-    bot.channels[:] = new_channels
-    logger.info('public_channel_mutation_detected end')
-    return True
+    try:
+        channels = await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    return [c for c in channels if c is not None]
 
 
-@box.on(GroupArchive)
-@box.on(GroupClose)
-@box.on(GroupHistoryChanged)
-@box.on(GroupJoined)
-@box.on(GroupLeft)
-@box.on(GroupMarked)
-@box.on(GroupOpen)
-@box.on(GroupRename)
-@box.on(GroupUnarchive)
-async def private_channel_mutation_detected(bot):
-    logger.info('private_channel_mutation_detected start')
-    new_groups = []
+async def fetch_users(bot) -> list[dict[str, Any]]:
     cursor = None
+    members: list[dict[str, Any]] = []
     while True:
-        result = await bot.api.conversations.list(
-            cursor=cursor,
-            types='private_channel',
+        result = await bot.api.users.list(
+            cursor,
+            limit=200,
+            presence=False,
         )
+        members.extend(result.body['members'])
+        logger.info(f'{len(members)} users loaded')
         cursor = result.body.get('response_metadata', {}).get('next_cursor')
-        for c in result.body['channels']:
-            res = await bot.api.conversations.info(c['id'])
-            new_groups.append(PrivateChannel(**res.body['channel']))
         if not cursor:
             break
+    return members
+
+
+async def resync_channels(bot):
+    logger.info('channel resync start')
+    with bot.registry.tracking_changes():
+        install_channels(bot, await fetch_channels(bot))
+    logger.info('channel resync end')
+
+
+async def load_workspace(bot) -> bool:
+    """Load users and channels from Slack and save snapshot of them.
+
+    Return whether both of them were loaded.
+
+    """
+
+    snapshot_path = bot.config.SNAPSHOT_PATH
+    logger.info('workspace hydration start')
+    started_at = time.monotonic()
+
+    # full hydration covers pending resync
+    bot.registry.channel_resync.cancel()
+
+    with bot.registry.tracking_changes():
+        channels_result, users_result = await asyncio.gather(
+            fetch_channels(bot),
+            fetch_users(bot),
+            return_exceptions=True,
+        )
+
+        # users must be ready before channels to resolve owner of IMs
+        if isinstance(users_result, BaseException):
+            logger.error('fail to load users', exc_info=users_result)
+        else:
+            install_users(bot, users_result)
+
+        if isinstance(channels_result, BaseException):
+            logger.error('fail to load channels', exc_info=channels_result)
+        else:
+            install_channels(bot, channels_result)
+
+    if isinstance(users_result, BaseException) or isinstance(
+        channels_result, BaseException
+    ):
+        return False
+
+    bot.is_ready = True
+    logger.info(
+        f'workspace hydration end: {len(bot.users)} users,'
+        f' {len(bot.channels) + len(bot.groups) + len(bot.ims)} channels'
+        f' in {time.monotonic() - started_at:.2f}s'
+    )
+
+    if snapshot_path:
+        try:
+            await bot.run_in_other_thread(
+                save_snapshot,
+                snapshot_path,
+                Snapshot(users=users_result, channels=channels_result),
+            )
+        except OSError:
+            logger.exception(f'fail to save snapshot: {snapshot_path}')
+    return True
+
+
+async def hydrate(bot):
+    """Load workspace until it succeeds. Wait longer after each failure."""
+
+    delay = 0.0
+    while not await load_workspace(bot):
+        delay = next_reconnect_delay(delay)
+        logger.warning(f'workspace hydration failed. retry in {delay:.0f}s')
+        await asyncio.sleep(delay)
+
+
+def start_hydration(bot) -> asyncio.Future:
+    """Run :func:`hydrate` in background unless it is running already."""
+
+    task = bot.registry.hydration
+    if task is None or task.done():
+        task = bot.registry.hydration = asyncio.ensure_future(hydrate(bot))
+    return task
+
+
+@box.on(ChatterboxSystemStart, needs_registry=False)
+async def on_start(bot):
+    snapshot_path = bot.config.SNAPSHOT_PATH
+    if snapshot_path and not bot.is_ready:
+        snapshot = await bot.run_in_other_thread(
+            load_snapshot,
+            snapshot_path,
+            bot.config.SNAPSHOT_MAX_AGE,
+        )
+        if snapshot is not None:
+            # users must be ready before channels to resolve owner of IMs
+            install_users(bot, snapshot.users)
+            install_channels(bot, snapshot.channels)
+            bot.is_ready = True
+            logger.info(
+                f'workspace snapshot loaded: {len(snapshot.users)} users,'
+                f' {len(snapshot.channels)} channels,'
+                f' {snapshot.age:.0f}s old'
+            )
 
-    bot.groups[:] = new_groups
-    logger.info('private_channel_mutation_detected end')
+    # this handler holds lane of events without channel.
+    # so reconcile with Slack in background.
+    start_hydration(bot)
     return True
 
 
-@box.on(IMClose)
+async def refresh_users(bot):
+    ids = list(bot.registry.pending_user_ids)
+    bot.registry.pending_user_ids.clear()
+    logger.info(f'refresh {len(ids)} users')
+    if len(ids) > USERS_LIST_THRESHOLD:
+        with bot.registry.tracking_changes():
+            install_users(bot, await fetch_users(bot))
+        return
+    for id in ids:
+        res = await bot.api.users.info(id)
+        if res.body['ok']:
+            bot.registry.users.add(User(**res.body['user']))
+            bot.registry.mark_changed(id)
+
+
+def apply_user(bot, user: User):
+    if user.is_unknown or user is bot.users.get(user.id):
+        # UserPayloadField could not build user from payload.
+        bot.registry.pending_user_ids.add(user.id)
+        bot.registry.user_refresh.schedule(
+            bot.config.USER_REFRESH_DELAY,
+            refresh_users,
+            bot,
+        )
+    else:
+        bot.registry.users.add(user)
+        bot.registry.mark_changed(user.id)
+
+
+@box.on(TeamJoin)
+async def on_team_join(bot, event: TeamJoin):
+    apply_user(bot, event.user)
+    return True
+
+
+@box.on(UserChange)
+async def on_user_change(bot, event: UserChange):
+    if not (event.user.id and event.user.team_id):
+        return True
+
+    apply_user(bot, event.user)
+    return True
+
+
+def schedule_channel_resync(bot):
+    bot.registry.channel_resync.schedule(
+        bot.config.CHANNEL_RESYNC_DELAY,
+        resync_channels,
+        bot,
+    )
+
+
+async def refetch_channel(bot, id: str):
+    """Fetch channel which event could not be applied to."""
+
+    res = await bot.api.conversations.info(id)
+    if res.body['ok']:
+        install_channel(bot, res.body['channel'])
+        bot.registry.mark_changed(id)
+    else:
+        schedule_channel_resync(bot)
+
+
+def add_channel(bot, channel):
+    if isinstance(channel, PublicChannel):
+        bot.registry.channels.add(channel)
+    elif isinstance(channel, DirectMessageChannel):
+        bot.registry.ims.add(channel)
+    elif isinstance(channel, PrivateChannel):
+        bot.registry.groups.add(channel)
+
+
+@box.on(ChannelArchive)
+@box.on(GroupArchive)
+async def on_channel_archive(bot, event):
+    channel = find_channel(bot, event.channel.id)
+    if channel is None:
+        await refetch_channel(bot, event.channel.id)
+    else:
+        channel.is_archived = True
+        bot.registry.mark_changed(channel.id)
+    return True
+
+
+@box.on(ChannelUnarchive)
+@box.on(GroupUnarchive)
+async def on_channel_unarchive(bot, event):
+    channel = find_channel(bot, event.channel.id)
+    if channel is None:
+        await refetch_channel(bot, event.channel.id)
+    else:
+        channel.is_archived = False
+        bot.registry.mark_changed(channel.id)
+    return True
+
+
+@box.on(ChannelLeft)
+async def on_channel_left(bot, event: ChannelLeft):
+    channel = find_channel(bot, event.channel.id)
+    if channel is None:
+        await refetch_channel(bot, event.channel.id)
+    else:
+        channel.is_member = False
+        bot.registry.mark_changed(channel.id)
+    return True
+
+
+@box.on(ChannelDeleted)
+@box.on(GroupLeft)
+async def on_channel_gone(bot, event):
+    # bot can not see private channel after leaving it
+    bot.registry.channels.remove(event.channel.id)
+    bot.registry.groups.remove(event.channel.id)
+    bot.registry.mark_changed(event.channel.id)
+    return True
+
+
+@box.on(ChannelCreated)
+@box.on(ChannelJoined)
+@box.on(ChannelRename)
+@box.on(GroupJoined)
+@box.on(GroupRename)
 @box.on(IMCreated)
-@box.on(IMHistoryChanged)
-@box.on(IMMarked)
+async def on_channel_changed(bot, event):
+    channel = event.channel
+    if channel.is_unknown or channel is find_channel(bot, channel.id):
+        # payload of event was not complete to build channel object.
+        await refetch_channel(bot, channel.id)
+    else:
+        add_channel(bot, channel)
+        bot.registry.mark_changed(channel.id)
+    return True
+
+
+@box.on(GroupOpen)
 @box.on(IMOpen)
-async def direct_message_channel_mutation_detected(bot):
-    logger.info('direct_message_channel_mutation_detected start')
-    new_ims = []
-    cursor = None
-    while True:
-        result = await bot.api.conversations.list(
-            cursor=cursor,
-            types='im',
-        )
-        cursor = result.body.get('response_metadata', {}).get('next_cursor')
-        for c in result.body['channels']:
-            res = await bot.api.conversations.info(c['id'])
-            new_ims.append(DirectMessageChannel(**res.body['channel']))
-        if not cursor:
-            break
+async def on_channel_open(bot, event):
+    channel = find_channel(bot, event.channel.id)
+    if channel is None:
+        await refetch_channel(bot, event.channel.id)
+    elif isinstance(channel, DirectMessageChannel):
+        channel.is_open = True
+        bot.registry.mark_changed(channel.id)
+    return True
 
-    bot.ims[:] = new_ims
-    logger.info('direct_message_channel_mutation_detected end')
+
+@box.on(ChannelMarked)
+@box.on(GroupMarked)
+@box.on(IMMarked)
+async def on_channel_marked(bot, event):
+    channel = find_channel(bot, event.channel.id)
+    if channel is not None:
+        channel.last_read = event.ts
+        bot.registry.mark_changed(channel.id)
     return True
 
 
-@box.on(TeamMigrationStarted)
+@box.on(TeamMigrationStarted, needs_registry=False)
 async def team_migration_started():
     logger.info('Slack sent team_migration_started. restart bot')
     raise BotReconnect()
@@ -3,9 +3,9 @@ import functools
 import importlib
 import logging
 import logging.config
-import random
-import string
-from collections import defaultdict
+import re
+import time
+from collections import Counter
 from concurrent.futures import BrokenExecutor
 from concurrent.futures import ProcessPoolExecutor
 from concurrent.futures import ThreadPoolExecutor
@@ -31,16 +31,26 @@ import async_timeout
 from dateutil.tz import tzoffset
 
 from .api import SlackAPI
+from .api.ratelimit import get_retry_after
+from .api.stats import APIStats
 from .box import Box
 from .box import box
+from .box.injection import InjectionContext
 from .box.tasks import CronTask
+from .box.utils import split_call
 from .cache import Cache
 from .config import Config
+from .config import DEFAULT
+from .dispatcher import Dispatcher
+from .event import BaseEvent
+from .event import ChatterboxSystemStart
+from .event import Message
 from .event import create_event
+from .event_queue import create_event_queue
 from .orm import Base
-from .orm import EngineConfig
 from .orm import get_database_engine
-from .orm import make_session
+from .registry import EntityIndex
+from .registry import Registry
 from .types.base import ChannelID
 from .types.channel import Channel
 from .types.channel import DirectMessageChannel
@@ -50,12 +60,30 @@ from .types.namespace import Namespace
 from .types.slack.response import APIResponse
 from .types.user import User
 from .utils import json
-from .utils.datetime import now
 from .utils.report import report
 
 
 R = TypeVar('R')
 UTC9 = tzoffset('UTC9', timedelta(hours=9))
+EVENT_TYPE_PATTERN = re.compile(r'\s*\{\s*"type"\s*:\s*"([^"\\]*)"')
+
+#: First delay of reconnecting after failure, in seconds.
+RECONNECT_DELAY = 1.0
+#: Delay of reconnecting is doubled at each failure up to this.
+RECONNECT_MAX_DELAY = 60.0
+
+
+def peek_event_type(data: str) -> Optional[str]:
+    """Get type of event from raw frame without decoding all of it.
+
+    Return :data:`None` if type is not the first key of frame.
+
+    """
+
+    match = EVENT_TYPE_PATTERN.match(data)
+    if match is None:
+        return None
+    return match.group(1)
 
 
 class BotReconnect(Exception):
@@ -78,6 +106,12 @@ class APICallError(Exception):
         self.data = data
 
 
+def next_reconnect_delay(delay: float) -> float:
+    """Get delay of next reconnecting after failure."""
+
+    return min(max(delay * 2, RECONNECT_DELAY), RECONNECT_MAX_DELAY)
+
+
 class Bot:
     """Yui."""
 
@@ -125,16 +159,27 @@ class Bot:
         self.loop.set_debug(self.config.DEBUG)
         self.orm_base = orm_base or Base
         self.box = using_box or box
-        self.queue: asyncio.Queue = asyncio.Queue()
+        self.queue = create_event_queue(
+            self.config.EVENT_QUEUE,
+            DEFAULT['EVENT_QUEUE'],
+        )
+        self.dispatcher = Dispatcher(
+            self.dispatch,
+            concurrency=self.config.DISPATCH_CONCURRENCY,
+            queue_size=self.config.DISPATCH_QUEUE_SIZE,
+            lag_warning=self.config.DISPATCH_LAG_WARNING,
+        )
         self.api = SlackAPI(self)
-        self.channels: list[PublicChannel] = []
-        self.ims: list[DirectMessageChannel] = []
-        self.groups: list[PrivateChannel] = []
-        self.users: list[User] = []
+        self.api_stats = APIStats()
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.session_in_use: Counter[aiohttp.ClientSession] = Counter()
+        self.registry = Registry()
+        self.dropped_events: Counter[str] = Counter()
         self.restart = False
         self.is_ready = False
-        self.method_last_call: defaultdict[str, datetime] = defaultdict(now)
-        self.method_queue: defaultdict[str, list] = defaultdict(list)
+        self.system_start_pending = False
+
+        self.box.freeze()
 
         self.config.check(
             self.box.config_required,
@@ -148,6 +193,22 @@ class Bot:
             logger.info('register crontab')
             self.register_tasks()
 
+    @property
+    def users(self) -> EntityIndex[User]:
+        return self.registry.users
+
+    @property
+    def channels(self) -> EntityIndex[PublicChannel]:
+        return self.registry.channels
+
+    @property
+    def ims(self) -> EntityIndex[DirectMessageChannel]:
+        return self.registry.ims
+
+    @property
+    def groups(self) -> EntityIndex[PrivateChannel]:
+        return self.registry.groups
+
     def register_tasks(self):
         """Register cronjob to bot from box."""
 
@@ -156,10 +217,6 @@ class Bot:
         def register(c: CronTask):
             logger.info(f'register {c}')
             is_runnable = [1]
-            func_params = c.handler.params
-            kw: dict[str, Any] = {}
-            if 'bot' in func_params:
-                kw['bot'] = self
 
             @aiocron.crontab(c.spec, tz=UTC9, *c.args, **c.kwargs)
             async def task():
@@ -171,28 +228,17 @@ class Bot:
                     return
 
                 is_runnable.pop()
-                if 'loop' in func_params:
-                    kw['loop'] = self.loop
-
-                sess = make_session(bind=self.config.DATABASE_ENGINE)
-                if 'sess' in func_params:
-                    kw['sess'] = sess
-
-                if 'engine_config' in func_params:
-                    kw['engine_config'] = EngineConfig(
-                        url=self.config.DATABASE_URL,
-                        echo=self.config.DATABASE_ECHO,
-                    )
+                context = InjectionContext(bot=self)
 
                 logger.debug(f'cron run {c}')
                 try:
-                    await c.handler(**kw)
+                    await c.handler.invoke(context)
                 except APICallError as e:
                     await report(self, exception=e)
                 except:  # noqa: E722
                     await report(self)
                 finally:
-                    sess.close()
+                    context.close()
                     is_runnable.append(1)
                 logger.debug(f'cron end {c}')
 
@@ -245,21 +291,9 @@ class Bot:
             raise
 
     async def throttle(self, method: str):
-        name = ''.join(random.choice(string.printable) for _ in range(16))
-        q = self.method_queue[method]
-        q.append(name)
-        while q and q[0] != name:
-            await asyncio.sleep(0.05)
-
-        method_dt = self.method_last_call[method]
-        tier_min = self.api.throttle_interval[method]
-        if (gap := now() - method_dt) < tier_min:
-            await asyncio.sleep(delay=gap.microseconds / 1_000_000)
-        self.method_last_call[method] = now()
-        try:
-            q.pop(0)
-        except KeyError:
-            pass
+        """Wait until given API method can be called."""
+
+        await self.api.rate_limiter.acquire(method)
 
     async def call(
         self,
@@ -270,45 +304,160 @@ class Bot:
         token: str = None,
         json_mode: bool = False,
     ) -> APIResponse:
-        """Call API methods."""
-        if throttle_check:
-            await self.throttle(method)
-        async with aiohttp.ClientSession() as session:
-            headers = {
-                'Content-Type': 'application/x-www-form-urlencoded',
-            }
-            payload: Union[str, aiohttp.FormData]
-            if json_mode:
-                payload = json.dumps(data)
-                headers['Content-Type'] = 'application/json'
-                headers['Authorization'] = 'Bearer {}'.format(
-                    token or self.config.TOKEN
-                )
-            else:
-                payload = aiohttp.FormData(data or {})
-                payload.add_field('token', token or self.config.TOKEN)
+        """Call API methods.
+
+        Rate limited and transient failures are retried by
+        :attr:`SlackAPI.retry_policy` of given method.
 
+        """
+
+        logger = logging.getLogger(f'{__name__}.Bot.call')
+
+        policy = self.api.retry_policy[method]
+        deadline = time.monotonic() + policy.deadline
+        attempt = 0
+        while True:
+            if throttle_check:
+                await self.throttle(method)
+
+            response: Optional[APIResponse] = None
+            error: Optional[APICallError] = None
             try:
-                async with session.post(
-                    'https://slack.com/api/{}'.format(method),
-                    data=payload,
-                    headers=headers,
-                ) as response:
-                    try:
-                        result = await response.json(loads=json.loads)
-                    except ContentTypeError:
-                        result = await response.text()
-                    return APIResponse(
-                        body=result,
-                        status=response.status,
-                        headers=response.headers,
+                response = await self.request(
+                    method,
+                    data,
+                    token=token,
+                    json_mode=json_mode,
+                )
+            except APICallError as e:
+                error = e
+
+            delay = policy.get_delay(attempt, response)
+            attempt += 1
+            if (
+                delay is None
+                or attempt >= policy.max_attempts
+                or time.monotonic() + delay > deadline
+            ):
+                if error is not None:
+                    raise error
+                return response  # type: ignore
+
+            logger.info(
+                'retry %s after %.2f seconds (attempt %d)',
+                method,
+                delay,
+                attempt,
+            )
+            await asyncio.sleep(delay)
+
+    async def request(
+        self,
+        method: str,
+        data: Optional[dict[str, Any]] = None,
+        *,
+        token: Optional[str] = None,
+        json_mode: bool = False,
+    ) -> APIResponse:
+        """Send one HTTP request to Slack Web API."""
+
+        headers = {
+            'Content-Type': 'application/x-www-form-urlencoded',
+        }
+        payload: Union[str, aiohttp.FormData]
+        if json_mode:
+            payload = json.dumps(data)
+            headers['Content-Type'] = 'application/json'
+            headers['Authorization'] = 'Bearer {}'.format(
+                token or self.config.TOKEN
+            )
+        else:
+            payload = aiohttp.FormData(data or {})
+            payload.add_field('token', token or self.config.TOKEN)
+
+        session = self.get_session()
+        self.session_in_use[session] += 1
+        started_at = time.monotonic()
+        error = False
+        try:
+            async with session.post(
+                'https://slack.com/api/{}'.format(method),
+                data=payload,
+                headers=headers,
+            ) as response:
+                if response.status == 429:
+                    self.api.rate_limiter.penalize(
+                        method,
+                        get_retry_after(response.headers),
                     )
-            except ClientError as e:
-                raise APICallError(
-                    method=method,
-                    headers=headers,
-                    data=data,
-                ) from e
+                else:
+                    self.api.rate_limiter.reward(method)
+                try:
+                    result = await response.json(loads=json.loads)
+                except ContentTypeError:
+                    result = await response.text()
+                return APIResponse(
+                    body=result,
+                    status=response.status,
+                    headers=response.headers,
+                )
+        except ClientError as e:
+            error = True
+            raise APICallError(
+                method=method,
+                headers=headers,
+                data=data,
+            ) from e
+        finally:
+            self.api_stats.record(time.monotonic() - started_at, error=error)
+            self.session_in_use[session] -= 1
+            if (
+                session is not self.session
+                and not self.session_in_use[session]
+            ):
+                del self.session_in_use[session]
+                await session.close()
+
+    def get_session(self) -> aiohttp.ClientSession:
+        """Get shared HTTP session for Slack Web API."""
+
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.config.API_CONNECTION_LIMIT,
+                ttl_dns_cache=self.config.API_DNS_CACHE_TTL,
+                keepalive_timeout=self.config.API_KEEPALIVE_TIMEOUT,
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                trace_configs=[self.api_stats.trace_config()],
+            )
+        return self.session
+
+    async def reset_session(self):
+        """Drop current HTTP session.
+
+        Session is closed after all running API calls on it are finished.
+        New session will be made at next API call.
+
+        """
+
+        session, self.session = self.session, None
+        if session is not None and not self.session_in_use[session]:
+            self.session_in_use.pop(session, None)
+            await session.close()
+
+    async def close(self):
+        """Close shared resources and run shutdown hooks of apps."""
+
+        logger = logging.getLogger(f'{__name__}.Bot.close')
+
+        for hook in self.box.shutdown_hooks:
+            try:
+                await hook()
+            except Exception:
+                logger.exception(f'shutdown hook {hook!r} failed')
+        self.registry.cancel_pending()
+        await self.reset_session()
 
     async def say(
         self,
@@ -333,32 +482,75 @@ class Bot:
 
         logger = logging.getLogger(f'{__name__}.Bot.process')
 
-        async def handle(handler, event):
-            try:
-                return await handler.run(self, event)
-            except SystemExit:
-                logger.info('SystemExit')
-                raise
-            except BotReconnect:
-                logger.info('BotReconnect raised.')
-                self.restart = True
-                return False
-            except APICallError as e:
-                await report(self, event=event, exception=e)
-                return False
-            except:  # noqa: E722
-                await report(self, event=event)
-                return False
+        await self.dispatcher.start()
+        try:
+            while True:
+                event = await self.queue.get()
 
-        while True:
-            event = await self.queue.get()
+                # repr converts every lazy field of event. log it on debug.
+                logger.debug(event)
+
+                await self.dispatcher.put(event)
+        finally:
+            await self.dispatcher.stop()
+
+    async def request_system_start(self) -> bool:
+        """Put system start event unless previous one is pending or running.
+
+        Return whether event was put.
+
+        """
+
+        if self.system_start_pending:
+            return False
+        self.system_start_pending = True
+        await self.queue.put(create_event('chatterbox_system_start', {}))
+        return True
 
-            logger.info(event)
+    async def dispatch(self, event: BaseEvent):
+        """Run apps in box until one of them returns falsy value."""
 
-            for handler in self.box.apps:
-                result = await handle(handler, event)
+        tokens = ('', '')
+        if isinstance(event, Message):
+            tokens = split_call(event)
+
+        apps = self.box.get_apps(event, tokens[0], self.config.PREFIX)
+        try:
+            for app in apps:
+                if app.needs_registry and not self.is_ready:
+                    continue
+                result = await self.run_app(app, event, tokens)
                 if not result:
                     break
+        finally:
+            if isinstance(event, ChatterboxSystemStart):
+                self.system_start_pending = False
+
+    async def run_app(
+        self,
+        app,
+        event: BaseEvent,
+        tokens: tuple[str, str],
+    ) -> bool:
+        """Run app with reporting unexpected errors."""
+
+        logger = logging.getLogger(f'{__name__}.Bot.run_app')
+
+        try:
+            return await app.run(self, event, tokens=tokens)
+        except SystemExit:
+            logger.info('SystemExit')
+            raise
+        except BotReconnect:
+            logger.info('BotReconnect raised.')
+            self.restart = True
+            return False
+        except APICallError as e:
+            await report(self, event=event, exception=e)
+            return False
+        except:  # noqa: E722
+            await report(self, event=event)
+            return False
 
     async def ping(self, ws: ClientWebSocketResponse):
         while not ws.closed:
@@ -390,8 +582,15 @@ class Bot:
                 break
 
             if msg.type == aiohttp.WSMsgType.TEXT:
+                type_ = peek_event_type(msg.data)
+                if type_ is not None and not self.box.handles_type(type_):
+                    self.dropped_events[type_] += 1
+                    continue
                 source = msg.json(loads=json.loads)
                 type_ = source.pop('type', None)
+                if not self.box.handles(type_, source.get('subtype')):
+                    self.dropped_events[type_] += 1
+                    continue
                 try:
                     event = create_event(type_, source)
                 except:  # noqa:
@@ -420,19 +619,28 @@ class Bot:
         """Connect Slack RTM."""
         logger = logging.getLogger(f'{__name__}.Bot.connect')
 
+        delay = 0.0
         while True:
-            await self.queue.put(create_event('chatterbox_system_start', {}))
-            while not self.is_ready:
-                await asyncio.sleep(0.1)
+            if delay:
+                logger.info(f'reconnect after {delay:.0f}s')
+                await asyncio.sleep(delay)
 
             try:
                 rtm = await self.call('rtm.start')
             except Exception as e:
                 logger.exception(e)
+                delay = next_reconnect_delay(delay)
                 continue
             if not rtm.body['ok']:
+                logger.error(f'rtm.start failed: {rtm.body.get("error")}')
+                delay = next_reconnect_delay(delay)
                 continue
 
+            delay = 0.0
+            # workspace is loaded in background. apps which need it are
+            # skipped until loading is done.
+            await self.request_system_start()
+
             try:
                 async with aiohttp.ClientSession() as session:
                     async with session.ws_connect(rtm.body['url']) as ws:
@@ -447,7 +655,9 @@ class Bot:
                 raise BotReconnect()
             except BotReconnect:
                 logger.info('BotReconnect raised. I will reconnect to rtm.')
+                await self.reset_session()
                 continue
             except:  # noqa
                 logger.exception('Unexpected Exception raised')
+                delay = next_reconnect_delay(delay)
                 continue
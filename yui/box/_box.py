@@ -1,19 +1,115 @@
+import heapq
+from collections import defaultdict
 from typing import Any
+from typing import Awaitable
+from typing import Callable
 from typing import Optional
 from typing import Type
 from typing import Union
 
 from .apps.base import BaseApp
 from .apps.basic import App
+from .apps.route import RouteApp
 from .tasks import CronTask
 from ..command.validators import VALIDATOR_TYPE
+from ..event import BaseEvent
 from ..event import Event
+from ..event import Message
 from ..types.handler import DECORATOR_ARGS_TYPE
 from ..types.handler import DECORATOR_TYPE
 from ..types.handler import Handler
 from ..utils.handler import get_handler
 
 
+INDEX_ITEM = tuple[int, BaseApp]
+
+
+class DispatchIndex:
+    """Precomputed lookup table of apps"""
+
+    def __init__(self, apps: list[BaseApp]) -> None:
+        """Initialize"""
+
+        self.size = len(apps)
+        self.generic: list[INDEX_ITEM] = []
+        self.passive: defaultdict[
+            tuple[str, Optional[str]],
+            list[INDEX_ITEM],
+        ] = defaultdict(list)
+        self.commands: defaultdict[
+            tuple[str, Optional[str], str],
+            list[INDEX_ITEM],
+        ] = defaultdict(list)
+        self.routes: defaultdict[str, list[INDEX_ITEM]] = defaultdict(list)
+        #: Pairs of type and subtype of events which some apps can handle.
+        self.handled: set[tuple[str, Optional[str]]] = set()
+        #: Types of events which some apps can handle with any subtype.
+        self.handled_any_subtype: set[str] = set()
+
+        for i, app in enumerate(apps):
+            if isinstance(app, App) and type(app).run is App.run:
+                self.handled.add((app.type, app.subtype))
+                if app.subtype == '*':
+                    self.handled_any_subtype.add(app.type)
+                if not app.is_command:
+                    self.passive[app.type, app.subtype].append((i, app))
+                    continue
+                for name in dict.fromkeys(app.names):
+                    key = (app.type, app.subtype, name)
+                    self.commands[key].append((i, app))
+            elif isinstance(app, RouteApp) and type(app).run is RouteApp.run:
+                # routes of app can be changed after indexing
+                self.handled_any_subtype.add('message')
+                self.routes[app.name].append((i, app))
+            else:
+                # We can not know when custom app wants to run.
+                self.generic.append((i, app))
+
+        self.handled_types = frozenset(
+            {type_ for type_, _ in self.handled} | self.handled_any_subtype
+        )
+
+    def handles_type(self, type_: str) -> bool:
+        """Check some apps may handle events of given type."""
+
+        return bool(self.generic) or type_ in self.handled_types
+
+    def handles(self, type_: str, subtype: Optional[str]) -> bool:
+        """Check some apps may handle events of given type and subtype."""
+
+        return (
+            bool(self.generic)
+            or type_ in self.handled_any_subtype
+            or (type_, subtype) in self.handled
+        )
+
+    def get_apps(
+        self,
+        event: BaseEvent,
+        call: str,
+        prefix: str,
+    ) -> list[BaseApp]:
+        """Get apps which can handle given event with keeping order."""
+
+        candidates = [self.generic]
+        type_ = getattr(event, 'type', None)
+        subtypes: tuple[Optional[str], ...] = ()
+        if hasattr(event, 'subtype'):
+            subtype = event.subtype  # type: ignore
+            subtypes = (subtype,) if subtype == '*' else (subtype, '*')
+            for subtype in subtypes:
+                candidates.append(self.passive.get((type_, subtype), []))
+
+        if isinstance(event, Message) and call.startswith(prefix):
+            name = call.removeprefix(prefix)
+            for subtype in subtypes:
+                key = (type_, subtype, name)
+                candidates.append(self.commands.get(key, []))
+            candidates.append(self.routes.get(name, []))
+
+        return [app for _, app in heapq.merge(*candidates)]
+
+
 class Box:
     """Box, collection of apps and tasks"""
 
@@ -27,11 +123,41 @@ class Box:
         self.users_required: set[str] = set()
         self.apps: list[BaseApp] = []
         self.tasks: list[CronTask] = []
+        self.shutdown_hooks: list[Callable[[], Awaitable[Any]]] = []
+        self._index: Optional[DispatchIndex] = None
 
     def register(self, app: BaseApp):
         """Register App manually."""
 
         self.apps.append(app)
+        self._index = None
+
+    def freeze(self) -> DispatchIndex:
+        """Build index of apps for dispatching events."""
+
+        if self._index is None or self._index.size != len(self.apps):
+            self._index = DispatchIndex(self.apps)
+        return self._index
+
+    def handles_type(self, type_: str) -> bool:
+        """Check some apps may handle events of given type."""
+
+        return self.freeze().handles_type(type_)
+
+    def handles(self, type_: str, subtype: Optional[str] = None) -> bool:
+        """Check some apps may handle events of given type and subtype."""
+
+        return self.freeze().handles(type_, subtype)
+
+    def get_apps(
+        self,
+        event: BaseEvent,
+        call: str = '',
+        prefix: str = '',
+    ) -> list[BaseApp]:
+        """Get apps which can handle given event in registered order."""
+
+        return self.freeze().get_apps(event, call, prefix)
 
     def assert_config_required(self, key: str, type_):
         """Mark required configuration key and type."""
@@ -68,13 +194,14 @@ class Box:
         help: Optional[str] = None,
         use_shlex: bool = True,
         channels: Optional[VALIDATOR_TYPE] = None,
+        needs_registry: bool = True,
     ) -> DECORATOR_TYPE:
         """Shortcut decorator for make command easily."""
 
         def decorator(target: DECORATOR_ARGS_TYPE) -> Handler:
             handler = get_handler(target)
 
-            self.apps.append(
+            self.register(
                 App(
                     'message',
                     subtype,
@@ -86,6 +213,7 @@ class Box:
                     is_command=True,
                     use_shlex=use_shlex,
                     channel_validator=channels,
+                    needs_registry=needs_registry,
                 )
             )
 
@@ -99,6 +227,7 @@ class Box:
         *,
         subtype: Optional[str] = None,
         channels: Optional[VALIDATOR_TYPE] = None,
+        needs_registry: bool = True,
     ) -> DECORATOR_TYPE:
         """Decorator for make app."""
 
@@ -110,12 +239,13 @@ class Box:
         def decorator(target: DECORATOR_ARGS_TYPE) -> Handler:
             handler = get_handler(target)
 
-            self.apps.append(
+            self.register(
                 App(
                     event_type,
                     subtype,
                     handler,
                     channel_validator=channels,
+                    needs_registry=needs_registry,
                 )
             )
 
@@ -129,3 +259,12 @@ class Box:
         c = CronTask(self, spec, args, kwargs)
         self.tasks.append(c)
         return c
+
+    def on_shutdown(
+        self,
+        target: Callable[[], Awaitable[Any]],
+    ) -> Callable[[], Awaitable[Any]]:
+        """Decorator for coroutine function which is run when bot closes."""
+
+        self.shutdown_hooks.append(target)
+        return target
@@ -1,13 +1,12 @@
 from __future__ import annotations
 
-import contextlib
-import inspect
-from typing import Mapping
+from typing import Any
+from typing import Optional
 from typing import TYPE_CHECKING
 
+from ..injection import InjectionContext
 from ...event import Event
-from ...orm import EngineConfig
-from ...orm import make_session
+from ...types.handler import Handler
 
 if TYPE_CHECKING:
     from ...bot import Bot
@@ -16,6 +15,9 @@ if TYPE_CHECKING:
 class BaseApp:
     """Base class of App"""
 
+    #: App can not run until users and channels of workspace are loaded.
+    needs_registry: bool = True
+
     def get_short_help(self, prefix: str) -> str:
         raise NotImplementedError
 
@@ -38,36 +40,35 @@ class BaseApp:
             return False
         return True
 
-    async def run(self, bot: Bot, event: Event):
+    async def run(
+        self,
+        bot: Bot,
+        event: Event,
+        *,
+        tokens: Optional[tuple[str, str]] = None,
+    ):
         raise NotImplementedError
 
-    @contextlib.contextmanager
-    def prepare_kwargs(
+    async def call_handler(
         self,
+        handler: Handler,
         *,
         bot: Bot,
         event: Event,
-        func_params: Mapping[str, inspect.Parameter],
-        **kwargs,
+        kwargs: Optional[dict[str, Any]] = None,
+        raw: Optional[str] = None,
+        remain_chunks: Optional[list[str]] = None,
     ):
-        sess = make_session(bind=bot.config.DATABASE_ENGINE)
-        if 'self' in func_params:
-            kwargs['_self'] = self
-        if 'bot' in func_params:
-            kwargs['bot'] = bot
-        if 'loop' in func_params:
-            kwargs['loop'] = bot.loop
-        if 'event' in func_params:
-            kwargs['event'] = event
-        if 'sess' in func_params:
-            kwargs['sess'] = sess
-        if 'engine_config' in func_params:
-            kwargs['engine_config'] = EngineConfig(
-                url=bot.config.DATABASE_URL,
-                echo=bot.config.DATABASE_ECHO,
-            )
+        """Call handler with values injected by plan of handler."""
 
+        context = InjectionContext(
+            bot=bot,
+            app=self,
+            event=event,
+            raw=raw,
+            remain_chunks=remain_chunks,
+        )
         try:
-            yield kwargs
+            return await handler.invoke(context, kwargs)
         finally:
-            sess.close()
+            context.close()
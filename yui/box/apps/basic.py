@@ -1,13 +1,12 @@
 from __future__ import annotations
 
 import html
-import inspect
 from typing import Optional
 from typing import TYPE_CHECKING
 
 from .base import BaseApp
 from ..parsers import parse_option_and_arguments
-from ..utils import SPACE_RE
+from ..utils import split_call
 from ..utils import split_chunks
 from ...command.validators import VALIDATOR_TYPE
 from ...event import Event
@@ -35,6 +34,7 @@ class App(BaseApp):
         use_shlex: bool = False,
         is_command: bool = False,
         channel_validator: Optional[VALIDATOR_TYPE] = None,
+        needs_registry: bool = True,
     ) -> None:
         """Initialize"""
         self.type = type
@@ -61,6 +61,7 @@ class App(BaseApp):
         self.is_command = is_command
         self.use_shlex = use_shlex
         self.channel_validator = channel_validator
+        self.needs_registry = needs_registry
 
     @property
     def has_short_help(self) -> bool:
@@ -88,13 +89,21 @@ class App(BaseApp):
             help += '\n\n' + self.help.format(PREFIX=prefix)
         return help
 
-    async def run(self, bot: Bot, event: Event):
+    async def run(
+        self,
+        bot: Bot,
+        event: Event,
+        *,
+        tokens: Optional[tuple[str, str]] = None,
+    ):
         subtype = hasattr(event, 'subtype') and (
             event.subtype == self.subtype or self.subtype == '*'
         )
         if event.type == self.type and subtype:
             if isinstance(event, Message):
-                return await self._run_message_event(bot, event)
+                if tokens is None:
+                    tokens = split_call(event)
+                return await self._run_message_event(bot, event, *tokens)
             return await self._run(bot, event)
         return True
 
@@ -105,30 +114,18 @@ class App(BaseApp):
             validation = await self.channel_validator(self, event)
 
         if validation:
-            with self.prepare_kwargs(
-                bot=bot,
-                event=event,
-                func_params=self.handler.params,
-            ) as kwargs:
-                res = await self.handler(**kwargs)
+            res = await self.call_handler(self.handler, bot=bot, event=event)
 
         return bool(res)
 
-    async def _run_message_event(self, bot: Bot, event: Message):
+    async def _run_message_event(
+        self,
+        bot: Bot,
+        event: Message,
+        call: str,
+        args: str,
+    ):
         res: Optional[bool] = True
-        call = ''
-        args = ''
-        if event.text:
-            try:
-                call, args = SPACE_RE.split(event.text, 1)
-            except ValueError:
-                call = event.text
-        elif event.message and event.message.text:
-            try:
-                call, args = SPACE_RE.split(event.message.text, 1)
-            except ValueError:
-                call = event.message.text
-
         raw = html.unescape(args)
 
         match = True
@@ -138,7 +135,6 @@ class App(BaseApp):
             )
 
         if match:
-            func_params = self.handler.params
             try:
                 chunks = split_chunks(raw, self.use_shlex)
             except ValueError:
@@ -162,20 +158,13 @@ class App(BaseApp):
                 validation = await self.channel_validator(self, event)
 
             if validation:
-                if 'raw' in func_params:
-                    kw['raw'] = raw
-                if 'remain_chunks' in func_params:
-                    annotation = func_params['remain_chunks'].annotation
-                    if annotation in [str, inspect._empty]:  # type: ignore
-                        kw['remain_chunks'] = ' '.join(remain_chunks)
-                    else:
-                        kw['remain_chunks'] = remain_chunks
-                with self.prepare_kwargs(
+                res = await self.call_handler(
+                    self.handler,
                     bot=bot,
                     event=event,
-                    func_params=func_params,
-                    **kw,
-                ) as kwargs:
-                    res = await self.handler(**kwargs)
+                    kwargs=kw,
+                    raw=raw,
+                    remain_chunks=remain_chunks,
+                )
 
         return bool(res)
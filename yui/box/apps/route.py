@@ -8,6 +8,7 @@ from typing import Union
 from .base import BaseApp
 from ..parsers import parse_option_and_arguments
 from ..utils import SPACE_RE
+from ..utils import split_call
 from ..utils import split_chunks
 from ...event import Event
 from ...event import Message
@@ -41,6 +42,7 @@ class RouteApp(BaseApp):
     use_shlex: bool = True
     name: str
     route_list: list[Route] = []
+    _route_cache: Optional[tuple] = None
 
     def get_short_help(self, prefix: str) -> str:
         raise NotImplementedError
@@ -52,50 +54,57 @@ class RouteApp(BaseApp):
     def names(self):
         return [self.name]
 
+    def get_route_index(
+        self,
+    ) -> tuple[dict[str, list[Route]], set[Optional[str]]]:
+        """Get routes grouped by name and subtypes of all routes."""
+
+        key = (id(self.route_list), len(self.route_list))
+        if self._route_cache is None or self._route_cache[0] != key:
+            index: dict[str, list[Route]] = {}
+            for c in self.route_list:
+                if c.name is not None:
+                    index.setdefault(c.name, []).append(c)
+            subtypes = {c.subtype for c in self.route_list}
+            self._route_cache = (key, index, subtypes)
+        return self._route_cache[1], self._route_cache[2]
+
     async def fallback(self, bot: Bot, event: Message):
         pass
 
-    async def run(self, bot: Bot, event: Event):
+    async def run(
+        self,
+        bot: Bot,
+        event: Event,
+        *,
+        tokens: Optional[tuple[str, str]] = None,
+    ):
         if not isinstance(event, Message):
             return True
 
-        root_args = ''
-        root_call = ''
         args = ''
         handler = None
-        if event.text:
-            try:
-                root_call, root_args = SPACE_RE.split(event.text, 1)
-            except ValueError:
-                root_call = event.text
-        elif event.message and event.message.text:
-            try:
-                root_call, root_args = SPACE_RE.split(event.message.text, 1)
-            except ValueError:
-                root_call = event.message.text
+        if tokens is None:
+            tokens = split_call(event)
+        root_call, root_args = tokens
 
         if root_call == bot.config.PREFIX + self.name:
-            for c in self.route_list:
-                if c.subtype == event.subtype or c.subtype == '*':
-                    if root_args is None:
-                        if c.name is None:
-                            handler = c.handler
-                            break
-                    else:
-                        try:
-                            call, args = SPACE_RE.split(root_args, 1)
-                        except ValueError:
-                            call = root_args
-
-                        if c.name == call:
-                            handler = c.handler
-                            break
-            else:
+            index, subtypes = self.get_route_index()
+            if event.subtype in subtypes or '*' in subtypes:
+                try:
+                    call, args = SPACE_RE.split(root_args, 1)
+                except ValueError:
+                    call = root_args
+
+                for c in index.get(call, []):
+                    if c.subtype == event.subtype or c.subtype == '*':
+                        handler = c.handler
+                        break
+            if handler is None:
                 handler = Handler(self.fallback)
 
         if handler:
             raw = html.unescape(args)
-            func_params = handler.params
             try:
                 chunks = split_chunks(raw, self.use_shlex)
             except ValueError:
@@ -112,11 +121,12 @@ class RouteApp(BaseApp):
             except SyntaxError as e:
                 await bot.say(event.channel, '*Error*\n{}'.format(e))
                 return False
-            with self.prepare_kwargs(
+            return await self.call_handler(
+                handler,
                 bot=bot,
                 event=event,
-                func_params=func_params,
-                **kw,
-            ) as kwargs:
-                return await handler(**kwargs)
+                kwargs=kw,
+                raw=raw,
+                remain_chunks=remain_chunks,
+            )
         return True
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import inspect
+from operator import attrgetter
+from typing import Any
+from typing import Callable
+from typing import Mapping
+from typing import Optional
+from typing import TYPE_CHECKING
+
+import attr
+
+from sqlalchemy.orm import Session
+
+from ..orm import EngineConfig
+from ..orm import make_session
+
+if TYPE_CHECKING:
+    from .apps.base import BaseApp
+    from ..bot import Bot
+    from ..event import Event
+
+
+@attr.dataclass(slots=True)
+class InjectionContext:
+    """Values which can be injected to handler at one call"""
+
+    bot: Bot
+    app: Optional[BaseApp] = None
+    event: Optional[Event] = None
+    raw: Optional[str] = None
+    remain_chunks: Optional[list[str]] = None
+    sess: Optional[Session] = attr.ib(init=False, default=None)
+
+    def get_session(self) -> Session:
+        """Make session at first use."""
+
+        if self.sess is None:
+            self.sess = make_session(bind=self.bot.config.DATABASE_ENGINE)
+        return self.sess
+
+    def close(self):
+        if self.sess is not None:
+            self.sess.close()
+            self.sess = None
+
+
+PROVIDER_TYPE = Callable[[InjectionContext], Any]
+PLAN_TYPE = list[tuple[str, PROVIDER_TYPE]]
+
+
+def provide_engine_config(context: InjectionContext) -> EngineConfig:
+    return EngineConfig(
+        url=context.bot.config.DATABASE_URL,
+        echo=context.bot.config.DATABASE_ECHO,
+    )
+
+
+def provide_joined_remain_chunks(context: InjectionContext) -> str:
+    return ' '.join(context.remain_chunks or [])
+
+
+#: Providers of injectable parameters by name.
+PROVIDERS: dict[str, PROVIDER_TYPE] = {
+    'self': attrgetter('app'),
+    'bot': attrgetter('bot'),
+    'loop': attrgetter('bot.loop'),
+    'event': attrgetter('event'),
+    'sess': InjectionContext.get_session,
+    'engine_config': provide_engine_config,
+    'raw': attrgetter('raw'),
+    'remain_chunks': attrgetter('remain_chunks'),
+}
+
+
+def make_plan(params: Mapping[str, inspect.Parameter]) -> PLAN_TYPE:
+    """Make list of providers for injectable parameters in given order."""
+
+    plan: PLAN_TYPE = []
+    for name, param in params.items():
+        provider = PROVIDERS.get(name)
+        if provider is None:
+            continue
+        if name == 'remain_chunks' and param.annotation in [
+            str,
+            inspect._empty,  # type: ignore
+        ]:
+            provider = provide_joined_remain_chunks
+        plan.append((name, provider))
+    return plan
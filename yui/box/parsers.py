@@ -1,183 +1,216 @@
 from typing import Any
+from typing import Callable
+from typing import Optional
 
+from ..types.handler import Argument
 from ..types.handler import Handler
+from ..types.handler import Option
 from ..utils.cast import CastError
 from ..utils.cast import cast
 
 KWARGS_DICT = dict[str, Any]
 
 
-def parse_option_and_arguments(
-    handler: Handler,
-    chunks: list[str],
-) -> tuple[KWARGS_DICT, list[str]]:
-    end = False
-    if not handler.is_prepared:
-        handler.prepare()
-
-    result: KWARGS_DICT = {}
-    options = handler.options
-    arguments = handler.arguments
-
-    required = {o.dest for o in options if o.required}
-
-    for option in options:
+def make_option_caster(option: Option) -> Callable[[list[str]], Any]:
+    type_ = option.type_
+    container_cls = option.container_cls
+    if container_cls:
         if option.multiple:
-            result[option.dest] = []
-        else:
-            if callable(option.default):
-                result[option.dest] = option.default()
-            else:
-                result[option.dest] = option.default
-
-    while not end and chunks:
+            return lambda args: cast(type_, args)
+        return lambda args: container_cls(cast(type_, x) for x in args)
+    return lambda args: cast(type_, args[0])
+
+
+def make_argument_caster(argument: Argument) -> Callable[[list[str]], Any]:
+    type_ = argument.type_
+    container_cls = argument.container_cls
+    if argument.concat:
+        return ' '.join
+    if container_cls:
+        return lambda args: container_cls(cast(type_, x) for x in args)
+    if argument.typing_has_container:
+        return lambda args: cast(type_, args)
+    return lambda args: cast(type_, args[0])
+
+
+class Parser:
+    """Parser of options and arguments compiled from prepared handler."""
+
+    def __init__(
+        self,
+        options: list[Option],
+        arguments: list[Argument],
+    ) -> None:
+        """Initialize"""
+
+        self.options = options
+        self.arguments = arguments
+
+        # first option wins like checking options in order
+        self.names: dict[str, tuple[int, Option]] = {}
+        self.dests: dict[str, Option] = {}
+        self.option_casters: dict[str, Callable[[list[str]], Any]] = {}
+        for i, option in enumerate(options):
+            if option.name not in self.names:
+                self.names[option.name] = (i, option)
+                self.option_casters[option.name] = make_option_caster(option)
+            self.dests.setdefault(option.dest, option)
+
+        self.defaults: dict[str, tuple[bool, Any]] = {}
         for option in options:
-            name = chunks.pop(0)
-            if name.startswith(option.name + '='):
-                name, new_chunk = name.split('=', 1)
-                chunks.insert(0, new_chunk)
+            if option.multiple:
+                self.defaults[option.dest] = (True, list)
+            elif callable(option.default):
+                self.defaults[option.dest] = (True, option.default)
+            else:
+                self.defaults[option.dest] = (False, option.default)
+        self.required = tuple(o.dest for o in options if o.required)
+
+        self.argument_casters = [make_argument_caster(a) for a in arguments]
+        self.rest_nargs = [
+            sum(a.nargs for a in arguments[i:]) for i in range(len(arguments))
+        ]
+
+    def match(self, chunk: str) -> tuple[Optional[Option], Optional[str]]:
+        """Find option of chunk. Return option and value after ``=``.
+
+        Chunk can be name of option or name and value joined by ``=``.
+        If many options are matched, former one is used.
+
+        """
+
+        found = self.names.get(chunk)
+        value = None
+        pos = chunk.find('=')
+        while pos >= 0:
+            matched = self.names.get(chunk[:pos])
+            if matched and (found is None or matched[0] < found[0]):
+                found = matched
+                start = pos + 1
+                value = chunk[start:]
+            pos = chunk.find('=', pos + 1)
+        if found is None:
+            return None, None
+        return found[1], value
+
+    def parse(self, chunks: list[str]) -> tuple[KWARGS_DICT, list[str]]:
+        result: KWARGS_DICT = {
+            dest: default() if call else default
+            for dest, (call, default) in self.defaults.items()
+        }
+        required = set(self.required)
+        pos = 0
+
+        while pos < len(chunks):
+            option, value = self.match(chunks[pos])
+            if option is None:
+                break
+            if value is None:
+                pos += 1
+            else:
+                chunks[pos] = value
 
-            if name == option.name:
-                if option.dest in required:
-                    required.remove(option.dest)
+            required.discard(option.dest)
 
-                if option.nargs == 0:
-                    result[option.dest] = option.value
-                    break
+            if option.nargs == 0:
+                result[option.dest] = option.value
+                continue
 
-                length = len(chunks)
-                try:
-                    args = [chunks.pop(0) for _ in range(option.nargs)]
-                except IndexError:
-                    raise SyntaxError(
-                        option.count_error.format(
-                            name=option.name,
-                            expected=option.nargs,
-                            given=length,
-                        )
+            length = len(chunks) - pos
+            if option.nargs > length:
+                raise SyntaxError(
+                    option.count_error.format(
+                        name=option.name,
+                        expected=option.nargs,
+                        given=length,
                     )
+                )
+            end = pos + option.nargs
+            args = chunks[pos:end]
+            pos = end
+            try:
+                r = self.option_casters[option.name](args)
+            except (ValueError, CastError) as e:
+                raise SyntaxError(
+                    option.type_error.format(name=option.name, e=e)
+                )
+
+            if option.transform_func:
                 try:
                     if option.container_cls:
-                        if option.multiple:
-                            r = cast(option.type_, args)
-                        else:
-                            r = option.container_cls(
-                                cast(option.type_, x) for x in args
-                            )
+                        r = option.container_cls(
+                            option.transform_func(x) for x in r
+                        )
                     else:
-                        r = cast(option.type_, args[0])
-                except (ValueError, CastError) as e:
+                        r = option.transform_func(r)
+                except ValueError as e:
                     raise SyntaxError(
-                        option.type_error.format(name=option.name, e=e)
+                        option.transform_error.format(
+                            name=option.name,
+                            e=e,
+                        )
                     )
 
-                if option.transform_func:
-                    if option.container_cls:
-                        try:
-                            r = option.container_cls(
-                                option.transform_func(x) for x in r
-                            )
-                        except ValueError as e:
-                            raise SyntaxError(
-                                option.transform_error.format(
-                                    name=option.name,
-                                    e=e,
-                                )
-                            )
-                    else:
-                        try:
-                            r = option.transform_func(r)
-                        except ValueError as e:
-                            raise SyntaxError(
-                                option.transform_error.format(
-                                    name=option.name,
-                                    e=e,
-                                )
-                            )
-
-                if option.multiple:
-                    result[option.dest].append(r[0])
-                else:
-                    result[option.dest] = r
-
-                break
-            chunks.insert(0, name)
-        else:
-            end = True
-
-    if required:
-        raise SyntaxError(
-            '\n'.join(
-                o.count_error.format(
-                    name=o.name,
-                    expected=o.nargs,
-                    given=0,
-                )
-                for o in (
-                    list(filter(lambda x: x.dest == o, options))[0]
-                    for o in required
-                )
-            )
-        )
-
-    for i, argument in enumerate(arguments):
-        length = argument.nargs
-        if argument.nargs < 0:
-            length = len(chunks) - sum(a.nargs for a in arguments[i:]) - 1
+            if option.multiple:
+                result[option.dest].append(r[0])
+            else:
+                result[option.dest] = r
 
-        if length < 1:
+        if required:
             raise SyntaxError(
-                argument.count_error.format(
-                    name=argument.name,
-                    expected='>0',
-                    given=0,
+                '\n'.join(
+                    self.dests[dest].count_error.format(
+                        name=self.dests[dest].name,
+                        expected=self.dests[dest].nargs,
+                        given=0,
+                    )
+                    for dest in required
                 )
             )
-        if length <= len(chunks):
-            args = [chunks.pop(0) for _ in range(length)]
-        else:
-            raise SyntaxError(
-                argument.count_error.format(
-                    name=argument.name,
-                    expected=argument.nargs,
-                    given=len(chunks),
+
+        for i, argument in enumerate(self.arguments):
+            remain = len(chunks) - pos
+            length = argument.nargs
+            if argument.nargs < 0:
+                length = remain - self.rest_nargs[i] - 1
+
+            if length < 1:
+                raise SyntaxError(
+                    argument.count_error.format(
+                        name=argument.name,
+                        expected='>0',
+                        given=0,
+                    )
                 )
-            )
-        try:
-            if argument.concat:
-                r = ' '.join(args)
-            elif argument.container_cls:
-                r = argument.container_cls(
-                    cast(argument.type_, x) for x in args
+            if length > remain:
+                raise SyntaxError(
+                    argument.count_error.format(
+                        name=argument.name,
+                        expected=argument.nargs,
+                        given=remain,
+                    )
                 )
-            elif argument.typing_has_container:
-                r = cast(argument.type_, args)
-            else:
-                r = cast(argument.type_, args[0])
-        except (ValueError, CastError) as e:
-            raise SyntaxError(
-                argument.type_error.format(
-                    name=argument.name,
-                    e=e,
+            end = pos + length
+            args = chunks[pos:end]
+            pos = end
+            try:
+                r = self.argument_casters[i](args)
+            except (ValueError, CastError) as e:
+                raise SyntaxError(
+                    argument.type_error.format(
+                        name=argument.name,
+                        e=e,
+                    )
                 )
-            )
 
-        if argument.transform_func:
-            if argument.container_cls and r:
+            if argument.transform_func:
                 try:
-                    r = argument.container_cls(
-                        argument.transform_func(x) for x in r
-                    )
-                except ValueError as e:
-                    raise SyntaxError(
-                        argument.transform_error.format(
-                            name=argument.name,
-                            e=e,
+                    if argument.container_cls and r:
+                        r = argument.container_cls(
+                            argument.transform_func(x) for x in r
                         )
-                    )
-            else:
-                try:
-                    r = argument.transform_func(r)
+                    else:
+                        r = argument.transform_func(r)
                 except ValueError as e:
                     raise SyntaxError(
                         argument.transform_error.format(
@@ -186,7 +219,18 @@ def parse_option_and_arguments(
                         )
                     )
 
-        if r is not None:
-            result[argument.dest] = r
+            if r is not None:
+                result[argument.dest] = r
+
+        del chunks[:pos]
+        return result, chunks
+
+
+def parse_option_and_arguments(
+    handler: Handler,
+    chunks: list[str],
+) -> tuple[KWARGS_DICT, list[str]]:
+    if not handler.is_prepared:
+        handler.prepare()
 
-    return result, chunks
+    return handler.parser.parse(chunks)
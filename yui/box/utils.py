@@ -1,8 +1,26 @@
+from __future__ import annotations
+
 import re
-import shlex
 import typing
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from ..event import Message
 
 SPACE_RE = re.compile(r'[\s\xa0]+')
+TOKEN_RE = re.compile(
+    r"""
+    (?P<space>[ \t\r\n\xa0]+)
+    |'(?P<single>[^']*)'
+    |"(?P<double>(?:[^"\\]|\\.)*)"
+    |\\(?P<escaped>.)
+    |(?P<word>[^ \t\r\n\xa0'"\\]+)
+    |(?P<broken>.)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+DOUBLE_QUOTED_ESCAPE_RE = re.compile(r'\\(["\\])')
+BROKEN_DOUBLE_QUOTED_RE = re.compile(r'"(?:[^"\\]|\\.)*\\\Z', re.DOTALL)
 
 CONTAINER = (set, tuple, list)
 
@@ -13,11 +31,59 @@ def is_container(t) -> bool:
     return t in CONTAINER or typing.get_origin(t) in CONTAINER
 
 
+def tokenize(text: str) -> list[str]:
+    """Split text like POSIX shell.
+
+    Result is same as :class:`shlex.shlex` in POSIX mode with
+    ``whitespace_split`` and no commenters, which also treats ``\\xa0`` as
+    whitespace. Raise :exc:`ValueError` for unclosed quotation or trailing
+    escape character like it.
+
+    """
+
+    tokens = []
+    token: list[str] = []
+    in_token = False
+    for match in TOKEN_RE.finditer(text):
+        kind = match.lastgroup
+        if kind == 'space':
+            if in_token:
+                tokens.append(''.join(token))
+                token = []
+                in_token = False
+            continue
+        if kind == 'broken':
+            start = match.start()
+            rest = text[start:]
+            if rest == '\\' or BROKEN_DOUBLE_QUOTED_RE.match(rest):
+                raise ValueError('No escaped character')
+            raise ValueError('No closing quotation')
+        value = match.group(kind)
+        if kind == 'double':
+            value = DOUBLE_QUOTED_ESCAPE_RE.sub(r'\1', value)
+        token.append(value)
+        in_token = True
+    if in_token:
+        tokens.append(''.join(token))
+    return tokens
+
+
 def split_chunks(text: str, use_shlex: bool) -> list[str]:
     if use_shlex:
-        lex = shlex.shlex(text, posix=True)
-        lex.whitespace_split = True
-        lex.whitespace += '\xa0'
-        lex.commenters = ''
-        return list(lex)
+        return tokenize(text)
     return SPACE_RE.split(text)
+
+
+def split_call(event: Message) -> tuple[str, str]:
+    """Split text of message into command call and rest arguments."""
+
+    text = event.text
+    if not text and event.message:
+        text = event.message.text
+    if not text:
+        return '', ''
+    try:
+        call, args = SPACE_RE.split(text, 1)
+    except ValueError:
+        return text, ''
+    return call, args
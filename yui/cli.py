@@ -64,7 +64,10 @@ def run(config):
         while True:
             loop = asyncio.get_event_loop()
             bot = Bot(config, loop)
-            loop.run_until_complete(bot.run())
+            try:
+                loop.run_until_complete(bot.run())
+            finally:
+                loop.run_until_complete(bot.close())
             loop.close()
     except ConfigurationError as e:
         error(str(e))
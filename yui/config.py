@@ -59,6 +59,20 @@ DEFAULT = {
         },
     },
     'CACHE': {'HOST': 'localhost', 'PORT': 11211, 'PREFIX': 'YUI_'},
+    'DISPATCH_CONCURRENCY': 8,
+    'DISPATCH_QUEUE_SIZE': 1000,
+    'DISPATCH_LAG_WARNING': 5.0,
+    'API_CONNECTION_LIMIT': 16,
+    'API_DNS_CACHE_TTL': 300,
+    'API_KEEPALIVE_TIMEOUT': 30.0,
+    'HYDRATION_CONCURRENCY': 4,
+    'CHANNEL_RESYNC_DELAY': 300.0,
+    'USER_REFRESH_DELAY': 5.0,
+    'EVENT_QUEUE': {
+        'high': {'capacity': 1000, 'policy': 'block'},
+        'normal': {'capacity': 1000, 'policy': 'block'},
+        'low': {'capacity': 100, 'policy': 'drop_oldest'},
+    },
 }
 
 
@@ -81,7 +95,19 @@ class Config:
     CHANNELS: dict[str, Any]
     USERS: dict[str, Any]
     CACHE: dict[str, Any]
+    DISPATCH_CONCURRENCY: int
+    DISPATCH_QUEUE_SIZE: int
+    DISPATCH_LAG_WARNING: float
+    API_CONNECTION_LIMIT: int
+    API_DNS_CACHE_TTL: int
+    API_KEEPALIVE_TIMEOUT: float
+    HYDRATION_CONCURRENCY: int
+    CHANNEL_RESYNC_DELAY: float
+    USER_REFRESH_DELAY: float
+    EVENT_QUEUE: dict[str, Any]
     WEBSOCKETDEBUGGERURL: Optional[str] = None
+    SNAPSHOT_PATH: Optional[str] = None
+    SNAPSHOT_MAX_AGE: float = 7 * 24 * 60 * 60.0
     DATABASE_ENGINE: Engine = attr.ib(init=False, repr=False, cmp=False)
 
     def check(
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from collections import deque
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Optional
+
+from .event import BaseEvent
+
+
+EVENT_HANDLER_TYPE = Callable[[BaseEvent], Awaitable[Any]]
+
+#: Number of recently dispatched lanes of which lag is kept for stats.
+LAG_LANES_LIMIT = 100
+
+logger = logging.getLogger(__name__)
+
+
+def get_lane_key(event: BaseEvent) -> Optional[str]:
+    """Get ordering key of given event.
+
+    Events of same channel must be processed in order. Events without channel
+    (workspace events, system events) share one lane keyed by :data:`None`.
+
+    """
+
+    channel = getattr(event, 'channel', None)
+    if channel is None or isinstance(channel, str):
+        return channel
+    return getattr(channel, 'id', None)
+
+
+class Dispatcher:
+    """Run events on bounded pool of workers with keeping order per channel"""
+
+    def __init__(
+        self,
+        handler: EVENT_HANDLER_TYPE,
+        *,
+        concurrency: int,
+        queue_size: int,
+        lag_warning: float,
+    ) -> None:
+        """Initialize"""
+
+        self.handler = handler
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.lag_warning = lag_warning
+        self.lanes: dict[Optional[str], deque[tuple[float, BaseEvent]]] = {}
+        self.lag: OrderedDict[Optional[str], float] = OrderedDict()
+        self.ready: asyncio.Queue = asyncio.Queue()
+        self.slots = asyncio.Semaphore(queue_size)
+        self.workers: list[asyncio.Future] = []
+        self.pending = 0
+        self.busy = 0
+
+    async def start(self):
+        """Start workers. Previous workers are cancelled."""
+
+        await self.stop()
+        self.workers = [
+            asyncio.ensure_future(self.work()) for _ in range(self.concurrency)
+        ]
+
+    async def stop(self):
+        """Cancel all workers and drop events which are not dispatched."""
+
+        workers, self.workers = self.workers, []
+        for worker in workers:
+            worker.cancel()
+        # workers clean up their lane on cancel. wait it before reset.
+        await asyncio.gather(*workers, return_exceptions=True)
+        self.lanes.clear()
+        self.lag.clear()
+        self.ready = asyncio.Queue()
+        self.slots = asyncio.Semaphore(self.queue_size)
+        self.pending = 0
+        self.busy = 0
+
+    async def put(self, event: BaseEvent):
+        """Put event. Wait if too many events are pending."""
+
+        await self.slots.acquire()
+        self.pending += 1
+        key = get_lane_key(event)
+        lane = self.lanes.get(key)
+        if lane is None:
+            # no worker is holding this lane. schedule it.
+            self.lanes[key] = deque([(time.monotonic(), event)])
+            self.ready.put_nowait(key)
+        else:
+            lane.append((time.monotonic(), event))
+
+    async def work(self):
+        while True:
+            key = await self.ready.get()
+            lane = self.lanes[key]
+            enqueued_at, event = lane.popleft()
+            lag = time.monotonic() - enqueued_at
+            self.lag[key] = lag
+            self.lag.move_to_end(key)
+            if len(self.lag) > LAG_LANES_LIMIT:
+                self.lag.popitem(last=False)
+            if lag > self.lag_warning:
+                logger.warning(
+                    'dispatch lag of lane %s is %.2f seconds', key, lag
+                )
+
+            self.busy += 1
+            try:
+                await self.handler(event)
+            except Exception:
+                # worker must survive failed handler. otherwise pool shrinks
+                # and dispatching stalls when no worker is left.
+                logger.exception('handler failed on event of lane %s', key)
+            finally:
+                self.busy -= 1
+                self.pending -= 1
+                self.slots.release()
+                if lane:
+                    self.ready.put_nowait(key)
+                else:
+                    del self.lanes[key]
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Current state of dispatcher."""
+
+        return {
+            'concurrency': self.concurrency,
+            'queue_size': self.queue_size,
+            'pending': self.pending,
+            'busy': self.busy,
+            'lanes': len(self.lanes),
+            'lag': dict(self.lag),
+        }
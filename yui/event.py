@@ -18,10 +18,16 @@ from .types.channel import Channel
 from .types.channel import DirectMessageChannel
 from .types.channel import PrivateChannel
 from .types.channel import PublicChannel
+from .types.decoder import Decoder
+from .types.decoder import compile_decoder
+from .types.lazy import LazyList
 from .types.namespace import BooleanField
 from .types.namespace import ChannelField
+from .types.namespace import ChannelPayloadField
+from .types.namespace import ChannelRenameField
 from .types.namespace import Field
 from .types.namespace import IDField
+from .types.namespace import IM_PAYLOAD_KEYS
 from .types.namespace import IntegerField
 from .types.namespace import ListField
 from .types.namespace import OptionalField
@@ -29,6 +35,7 @@ from .types.namespace import StringField
 from .types.namespace import TsField
 from .types.namespace import UserField
 from .types.namespace import UserListField
+from .types.namespace import UserPayloadField
 from .types.namespace import namespace
 from .types.objects import BotObject
 from .types.objects import DnDStatus
@@ -198,11 +205,17 @@ class Event(BaseEvent):
 
 
 _events: dict[EventType, Type[BaseEvent]] = {}
+_decoders: dict[EventType, Optional[Decoder]] = {}
+
+#: Fields which dispatcher reads on every event. Decoder converts them at once
+#: and others on first read.
+EAGER_FIELDS = frozenset({'channel'})
 
 
 def event(cls):
     cls = namespace(cls)
     _events[cls.type] = cls
+    _decoders[cls.type] = compile_decoder(cls, EAGER_FIELDS)
     return cls
 
 
@@ -250,7 +263,7 @@ class ChannelCreated(Event):
     """A channel was created."""
 
     type: ClassVar[str] = 'channel_created'
-    channel: PublicChannel = ChannelField()
+    channel: PublicChannel = ChannelPayloadField(PublicChannel)()
 
 
 @event
@@ -276,7 +289,7 @@ class ChannelJoined(Event):
     """You joined a channel."""
 
     type: ClassVar[str] = 'channel_joined'
-    channel: PublicChannel = ChannelField()
+    channel: PublicChannel = ChannelPayloadField(PublicChannel)()
 
 
 @event
@@ -301,7 +314,7 @@ class ChannelRename(Event):
     """A channel was renamed."""
 
     type: ClassVar[str] = 'channel_rename'
-    channel: PublicChannel = ChannelField()
+    channel: PublicChannel = ChannelRenameField()
 
 
 @event
@@ -474,7 +487,7 @@ class GroupJoined(Event):
     """You joined a private channel."""
 
     type: ClassVar[str] = 'group_joined'
-    channel: PrivateChannel = ChannelField()
+    channel: PrivateChannel = ChannelPayloadField(PrivateChannel)()
 
 
 @event
@@ -508,7 +521,7 @@ class GroupRename(Event):
     """A private channel was renamed"""
 
     type: ClassVar[str] = 'group_rename'
-    channel: PrivateChannel = ChannelField()
+    channel: PrivateChannel = ChannelRenameField()
 
 
 @event
@@ -541,7 +554,10 @@ class IMCreated(Event):
 
     type: ClassVar[str] = 'im_created'
     user: User = UserField()
-    channel: DirectMessageChannel = ChannelField()
+    channel: DirectMessageChannel = ChannelPayloadField(
+        DirectMessageChannel,
+        IM_PAYLOAD_KEYS,
+    )()
 
 
 @event
@@ -662,7 +678,7 @@ class PresenceChange(Event):
 
     type: ClassVar[str] = 'presence_change'
     user: User = UserField()
-    users: list[User] = UserListField()
+    users: LazyList[User] = UserListField()
     presence: str = StringField()
 
 
@@ -735,9 +751,9 @@ class SubteamMembersChanged(Event):
     team_id: TeamID = IDField()
     date_previous_update: int = IntegerField()
     date_update: int = IntegerField()
-    added_users: list[User] = UserListField()
+    added_users: LazyList[User] = UserListField()
     added_users_count: str = StringField()
-    removed_users: list[User] = UserListField()
+    removed_users: LazyList[User] = UserListField()
     removed_users_count: str = StringField()
 
 
@@ -779,7 +795,7 @@ class TeamJoin(Event):
     """A new team member has joined."""
 
     type: ClassVar[str] = 'team_join'
-    user: User = UserField()
+    user: User = UserPayloadField()
 
 
 @event
@@ -843,7 +859,7 @@ class UserChange(Event):
     """A team member's data has changed."""
 
     type: ClassVar[str] = 'user_change'
-    user: User = UserField()
+    user: User = UserPayloadField()
 
 
 @event
@@ -1275,8 +1291,11 @@ def create_event(type_, source):
     """Create Event"""
 
     cls = _events.get(type_, UnknownEvent)
+    decoder = _decoders.get(type_)
 
     try:
-        return cls(type=type_, **source)
+        if decoder is None or source is None:
+            return cls(type=type_, **source)
+        return decoder(type_, source)
     except TypeError as e:
         raise TypeError(f'Error at creating {cls.__name__}: {e}')
@@ -0,0 +1,209 @@
+import asyncio
+from collections import Counter
+from collections import deque
+from typing import Any
+from typing import Optional
+
+import attr
+
+from .event import BaseEvent
+from .event import Message
+
+#: Lanes of :class:`EventQueue` in order of priority.
+HIGH = 'high'
+NORMAL = 'normal'
+LOW = 'low'
+LANES = (HIGH, NORMAL, LOW)
+
+#: Wait until lane has room. It makes backpressure to receiving.
+BLOCK = 'block'
+#: Drop new event if lane is full.
+DROP_NEW = 'drop_new'
+#: Drop oldest event in lane if lane is full.
+DROP_OLDEST = 'drop_oldest'
+POLICIES = (BLOCK, DROP_NEW, DROP_OLDEST)
+
+#: Types of events which are just noise for most apps.
+LOW_PRIORITY_TYPES = frozenset(
+    {
+        'channel_history_changed',
+        'channel_marked',
+        'dnd_updated',
+        'dnd_updated_user',
+        'group_history_changed',
+        'group_marked',
+        'im_history_changed',
+        'im_marked',
+        'manual_presence_change',
+        'pong',
+        'presence_change',
+        'user_typing',
+    }
+)
+
+
+def get_lane(event: BaseEvent) -> str:
+    """Get lane of given event."""
+
+    if isinstance(event, Message):
+        return HIGH
+    if getattr(event, 'type', None) in LOW_PRIORITY_TYPES:
+        return LOW
+    return NORMAL
+
+
+@attr.dataclass(slots=True, frozen=True)
+class LanePolicy:
+    """Capacity and drop policy of lane"""
+
+    capacity: int
+    policy: str = BLOCK
+
+    def __attrs_post_init__(self):
+        if self.capacity < 1:
+            raise ValueError('capacity must be positive')
+        if self.policy not in POLICIES:
+            raise ValueError(f'unknown policy: {self.policy}')
+
+
+class EventQueue:
+    """Bounded queue of events with priority lanes
+
+    :meth:`get` returns event of highest lane first and events of same lane
+    in FIFO order. Interface follows :class:`asyncio.Queue` without
+    ``task_done`` and ``join``.
+
+    """
+
+    def __init__(self, policies: dict[str, LanePolicy]) -> None:
+        """Initialize"""
+
+        self.policies = {lane: policies[lane] for lane in LANES}
+        self.lanes: dict[str, deque[BaseEvent]] = {
+            lane: deque() for lane in LANES
+        }
+        self.dropped: Counter[str] = Counter()
+        self.peak: Counter[str] = Counter()
+        self.not_empty = asyncio.Event()
+        self.has_room: dict[str, asyncio.Event] = {
+            lane: asyncio.Event() for lane in LANES
+        }
+        for event in self.has_room.values():
+            event.set()
+
+    def qsize(self) -> int:
+        return sum(len(queue) for queue in self.lanes.values())
+
+    def empty(self) -> bool:
+        return not any(self.lanes.values())
+
+    def full(self) -> bool:
+        return all(
+            len(self.lanes[lane]) >= policy.capacity
+            for lane, policy in self.policies.items()
+        )
+
+    def is_lane_full(self, lane: str) -> bool:
+        return len(self.lanes[lane]) >= self.policies[lane].capacity
+
+    def refresh(self, lane: str):
+        """Update events for waiters after lane was changed."""
+
+        if self.is_lane_full(lane):
+            self.has_room[lane].clear()
+        else:
+            self.has_room[lane].set()
+        if self.empty():
+            self.not_empty.clear()
+        else:
+            self.not_empty.set()
+
+    def drop_oldest(self, lane: str):
+        self.lanes[lane].popleft()
+        self.dropped[lane] += 1
+        self.refresh(lane)
+
+    def put_nowait(self, item: BaseEvent):
+        """Put event without waiting.
+
+        Raise :exc:`asyncio.QueueFull` if lane of event is full and its policy
+        is :data:`BLOCK`.
+
+        """
+
+        lane = get_lane(item)
+        if self.is_lane_full(lane):
+            policy = self.policies[lane].policy
+            if policy == DROP_NEW:
+                self.dropped[lane] += 1
+                return
+            elif policy == DROP_OLDEST:
+                self.drop_oldest(lane)
+            else:
+                raise asyncio.QueueFull
+        queue = self.lanes[lane]
+        queue.append(item)
+        self.peak[lane] = max(self.peak[lane], len(queue))
+        self.refresh(lane)
+
+    async def put(self, item: BaseEvent):
+        """Put event. Wait if lane of event is full and blocking."""
+
+        lane = get_lane(item)
+        while self.is_lane_full(lane) and self.policies[lane].policy == BLOCK:
+            await self.has_room[lane].wait()
+        self.put_nowait(item)
+
+    def get_nowait(self) -> BaseEvent:
+        """Get event without waiting.
+
+        Raise :exc:`asyncio.QueueEmpty` if queue is empty.
+
+        """
+
+        for lane in LANES:
+            queue = self.lanes[lane]
+            if queue:
+                item = queue.popleft()
+                self.refresh(lane)
+                return item
+        raise asyncio.QueueEmpty
+
+    async def get(self) -> BaseEvent:
+        """Get event. Wait until any event is put."""
+
+        while self.empty():
+            await self.not_empty.wait()
+        return self.get_nowait()
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Current state of queue."""
+
+        return {
+            lane: {
+                'capacity': self.policies[lane].capacity,
+                'policy': self.policies[lane].policy,
+                'depth': len(self.lanes[lane]),
+                'peak': self.peak[lane],
+                'dropped': self.dropped[lane],
+            }
+            for lane in LANES
+        }
+
+
+def create_event_queue(
+    config: dict[str, dict[str, Any]],
+    default: Optional[dict[str, dict[str, Any]]] = None,
+) -> EventQueue:
+    """Create queue from config. Missing values are filled from default."""
+
+    default = default or {}
+    policies = {}
+    for lane in LANES:
+        values = {**default.get(lane, {}), **config.get(lane, {})}
+        policies[lane] = LanePolicy(
+            capacity=int(values['capacity']),
+            policy=values.get('policy', BLOCK),
+        )
+    return EventQueue(policies)
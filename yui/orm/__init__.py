@@ -6,6 +6,7 @@ from .engine import get_database_engine
 from .model import Base
 from .session import EngineConfig
 from .session import make_session
+from .session import session_counter
 from .session import subprocess_session_manager
 from .types import JSONType
 from .types import TimezoneType
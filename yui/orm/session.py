@@ -1,4 +1,5 @@
 import contextlib
+from collections import Counter
 from typing import Iterator
 from typing import NamedTuple
 
@@ -14,8 +15,13 @@ class EngineConfig(NamedTuple):
     echo: bool
 
 
+#: Number of sessions made by :func:`make_session`.
+session_counter: Counter[str] = Counter()
+
+
 def make_session(*args, **kwargs) -> Session:
     kwargs['autocommit'] = True
+    session_counter['created'] += 1
     return Session(*args, **kwargs)
 
 
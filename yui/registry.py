@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from typing import Callable
+from typing import Generic
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+from typing import TYPE_CHECKING
+from typing import TypeVar
+from typing import Union
+
+from .utils.debounce import Debouncer
+
+if TYPE_CHECKING:
+    from .types.channel import DirectMessageChannel
+    from .types.channel import PrivateChannel
+    from .types.channel import PublicChannel
+    from .types.user import User
+
+
+T = TypeVar('T')
+
+
+class EntityIndex(Generic[T]):
+    """Collection of Slack objects indexed by ID and name"""
+
+    def __init__(self, name_of: Callable[[T], Optional[str]]) -> None:
+        """Initialize"""
+
+        self.name_of = name_of
+        self.by_id: dict[str, T] = {}
+        self.by_name: dict[str, T] = {}
+        self.names: dict[str, str] = {}
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(list(self.by_id.values()))
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    def __contains__(self, item: Union[str, T]) -> bool:
+        if isinstance(item, str):
+            return item in self.by_id
+        return getattr(item, 'id', None) in self.by_id
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({list(self.by_id.values())!r})'
+
+    def get(self, id: str) -> Optional[T]:
+        """Find object by ID."""
+
+        return self.by_id.get(id)
+
+    def get_by_name(self, name: str) -> Optional[T]:
+        """Find object by name."""
+
+        return self.by_name.get(name)
+
+    def add(self, obj: T):
+        """Add new object or replace object which has same ID.
+
+        Call it again after changing name of object in place for reindexing.
+
+        """
+
+        id = obj.id  # type: ignore
+        self._unname(id)
+        self.by_id[id] = obj
+        self._name(id, obj)
+
+    def remove(self, id: str) -> Optional[T]:
+        """Remove object by ID."""
+
+        self._unname(id)
+        return self.by_id.pop(id, None)
+
+    def replace(self, objs: Iterable[T]):
+        """Replace all objects at once."""
+
+        by_id: dict[str, T] = {}
+        by_name: dict[str, T] = {}
+        names: dict[str, str] = {}
+        for obj in objs:
+            id = obj.id  # type: ignore
+            by_id[id] = obj
+            name = self.name_of(obj)
+            if name:
+                by_name[name] = obj
+                names[id] = name
+        self.by_id, self.by_name, self.names = by_id, by_name, names
+
+    def clear(self):
+        self.replace([])
+
+    def _name(self, id: str, obj: T):
+        name = self.name_of(obj)
+        if name:
+            self.by_name[name] = obj
+            self.names[id] = name
+
+    def _unname(self, id: str):
+        name = self.names.pop(id, None)
+        if name is not None and self.by_name.get(name) is self.by_id.get(id):
+            del self.by_name[name]
+
+
+def _user_id_of_im(im: DirectMessageChannel) -> Optional[str]:
+    user = im.user
+    if user is None or isinstance(user, str):
+        return user
+    return user.id
+
+
+class Registry:
+    """Registry of users and channels in workspace.
+
+    IMs are named by ID of their user.
+
+    """
+
+    def __init__(self) -> None:
+        """Initialize"""
+
+        self.users: EntityIndex[User] = EntityIndex(lambda u: u.name)
+        self.channels: EntityIndex[PublicChannel] = EntityIndex(
+            lambda c: c.name
+        )
+        self.groups: EntityIndex[PrivateChannel] = EntityIndex(
+            lambda g: g.name
+        )
+        self.ims: EntityIndex[DirectMessageChannel] = EntityIndex(
+            _user_id_of_im
+        )
+        self.channel_indexes: dict[str, EntityIndex] = {
+            'C': self.channels,
+            'D': self.ims,
+            'G': self.groups,
+        }
+        #: Users to fetch because their event payload was not complete.
+        self.pending_user_ids: set[str] = set()
+        #: Coalesced refresh of :attr:`pending_user_ids`.
+        self.user_refresh = Debouncer()
+        #: Coalesced reload of all channels.
+        self.channel_resync = Debouncer()
+        #: Background loading of whole workspace.
+        self.hydration: Optional[asyncio.Future] = None
+        #: IDs of users and channels which events changed while loading them
+        #: from Slack. Loaded data of them is older than registry.
+        self.changed_ids: set[str] = set()
+        self.loading = 0
+
+    def mark_changed(self, id: str):
+        """Mark user or channel changed by event."""
+
+        if self.loading:
+            self.changed_ids.add(id)
+
+    @contextlib.contextmanager
+    def tracking_changes(self) -> Iterator[set[str]]:
+        """Track changes by events while loading users or channels."""
+
+        self.loading += 1
+        try:
+            yield self.changed_ids
+        finally:
+            self.loading -= 1
+            if not self.loading:
+                self.changed_ids.clear()
+
+    def cancel_pending(self):
+        """Cancel scheduled refresh and reload, and running hydration."""
+
+        if self.hydration is not None:
+            self.hydration.cancel()
+            self.hydration = None
+        self.user_refresh.cancel()
+        self.channel_resync.cancel()
+        self.pending_user_ids.clear()
+
+    def get_channel_index(self, id: str) -> EntityIndex:
+        """Get index of channels by prefix of given ID."""
+
+        try:
+            return self.channel_indexes[id[0]]
+        except (IndexError, KeyError):
+            raise KeyError('Given Channel ID prefix was not expected.')
@@ -0,0 +1,87 @@
+import logging
+import os
+import pathlib
+import time
+from typing import Any
+from typing import Optional
+
+import attr
+
+from .utils import json
+
+#: Version of snapshot format. Snapshot of other version is ignored.
+SNAPSHOT_VERSION = 1
+
+#: Snapshot holds profiles of workspace members. Only owner can read it.
+SNAPSHOT_MODE = 0o600
+
+logger = logging.getLogger(__name__)
+
+
+@attr.dataclass(slots=True)
+class Snapshot:
+    """Raw API payloads of users and channels of workspace"""
+
+    users: list[dict[str, Any]]
+    channels: list[dict[str, Any]]
+    version: int = SNAPSHOT_VERSION
+    created_at: float = attr.Factory(time.time)
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.created_at
+
+
+def load_snapshot(
+    path: str,
+    max_age: Optional[float] = None,
+) -> Optional[Snapshot]:
+    """Load snapshot. Return :data:`None` if it is missing or unusable.
+
+    Snapshot older than ``max_age`` seconds is unusable too.
+
+    """
+
+    try:
+        data = json.loads(pathlib.Path(path).read_text())
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError):
+        logger.warning(f'fail to read snapshot: {path}', exc_info=True)
+        return None
+
+    if not isinstance(data, dict) or data.get('version') != SNAPSHOT_VERSION:
+        logger.info(f'ignore snapshot of other version: {path}')
+        return None
+
+    try:
+        snapshot = Snapshot(
+            users=list(data['users']),
+            channels=list(data['channels']),
+            created_at=float(data['created_at']),
+        )
+    except (KeyError, TypeError, ValueError):
+        logger.warning(f'broken snapshot: {path}', exc_info=True)
+        return None
+
+    if max_age is not None and snapshot.age > max_age:
+        logger.info(f'ignore snapshot older than {max_age:.0f}s: {path}')
+        return None
+    return snapshot
+
+
+def save_snapshot(path: str, snapshot: Snapshot):
+    """Save snapshot atomically."""
+
+    target = pathlib.Path(path)
+    temp = target.with_name(f'.{target.name}.tmp')
+    # stale temp file may have other mode. O_EXCL creates new one.
+    temp.unlink(missing_ok=True)
+    fd = os.open(temp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, SNAPSHOT_MODE)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(json.dumps(attr.asdict(snapshot)))
+        os.replace(temp, target)
+    except BaseException:
+        temp.unlink(missing_ok=True)
+        raise
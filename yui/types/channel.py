@@ -1,6 +1,7 @@
 from datetime import datetime
 
 from .base import Ts
+from .lazy import LazyList
 from .namespace import BooleanField
 from .namespace import DateTimeField
 from .namespace import Field
@@ -12,11 +13,11 @@ from .namespace import StringField
 from .namespace import TsField
 from .namespace import UserField
 from .namespace import UserListField
-from .namespace import namespace
+from .namespace import slotted_namespace
 from .user import User
 
 
-@namespace
+@slotted_namespace
 class ChannelTopic:
     """Topic of Channel."""
 
@@ -25,7 +26,7 @@ class ChannelTopic:
     last_set: datetime = DateTimeField()
 
 
-@namespace
+@slotted_namespace
 class ChannelPurpose:
     """Purpose of Channel."""
 
@@ -34,7 +35,7 @@ class ChannelPurpose:
     last_set: datetime = DateTimeField()
 
 
-@namespace
+@slotted_namespace
 class Channel:
 
     id: str = IDField()
@@ -45,14 +46,14 @@ class Channel:
     is_unknown: bool = BooleanField(init=False, repr=True, default=False)
 
 
-@namespace
+@slotted_namespace
 class PublicChannel(Channel):
 
     id: str = IDField()
     name: str = NameField()
     creator: User = UserField()
     last_read: Ts = TsField()
-    members: list[User] = UserListField()
+    members: LazyList[User] = UserListField()
     created: datetime = DateTimeField()
     is_org_shared: bool = BooleanField()
     has_pins: bool = BooleanField()
@@ -70,7 +71,7 @@ class PublicChannel(Channel):
     previous_names: list[str] = ListField(str)()
 
 
-@namespace
+@slotted_namespace
 class DirectMessageChannel(Channel):
 
     id: str = IDField()
@@ -83,19 +84,20 @@ class DirectMessageChannel(Channel):
     is_open: bool = BooleanField()
 
 
-@namespace
+@slotted_namespace
 class PrivateChannel(Channel):
 
     id: str = IDField()
     name: str = NameField()
     creator: User = UserField()
     last_read: Ts = TsField()
-    members: list[User] = UserListField()
+    members: LazyList[User] = UserListField()
     created: datetime = DateTimeField()
     is_org_shared: bool = BooleanField()
     has_pins: bool = BooleanField()
     is_group: bool = BooleanField()
     is_archived: bool = BooleanField()
+    is_member: bool = BooleanField()
     topic: ChannelTopic = Field(converter=ChannelTopic)
     purpose: ChannelPurpose = Field(converter=ChannelPurpose)
 
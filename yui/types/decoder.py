@@ -0,0 +1,155 @@
+from typing import Any
+from typing import Callable
+from typing import Optional
+
+import attr
+
+from .namespace import optional_int
+from .namespace import optional_str
+
+#: Key of raw payload values in ``__dict__`` of decoded object.
+RAW_KEY = '__raw__'
+
+#: Converters applied inline by generated decoder. Value of expected type is
+#: kept as is. Items are ``(type, accepts None)``.
+INLINE_CONVERTERS: dict[Any, tuple[type, bool]] = {
+    str: (str, False),
+    bool: (bool, False),
+    optional_int: (int, True),
+    optional_str: (str, True),
+}
+
+Decoder = Callable[[str, dict[str, Any]], Any]
+
+
+class LazyField:
+    """Non-data descriptor which converts raw payload value on first read.
+
+    Converted value is stored in ``__dict__`` of instance, so next read does
+    not reach this descriptor.
+
+    """
+
+    __slots__ = ('name', 'converter')
+
+    def __init__(self, name: str, converter: Callable[[Any], Any]) -> None:
+        self.name = name
+        self.converter = converter
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        try:
+            value = obj.__dict__[RAW_KEY][self.name]
+        except KeyError:
+            raise AttributeError(
+                f'{type(obj).__name__!r} object has no attribute'
+                f' {self.name!r}'
+            )
+        value = self.converter(value)
+        obj.__dict__[self.name] = value
+        return value
+
+
+def compile_decoder(
+    cls,
+    eager: frozenset[str] = frozenset(),
+) -> Optional[Decoder]:
+    """Compile decoder of namespace class from its attrs fields.
+
+    Decoder takes ``(type, source)`` like
+    :func:`yui.event.create_event` and builds object without calling
+    ``__init__``. Fields with converter of :data:`INLINE_CONVERTERS` are
+    converted inline and fields in ``eager`` are converted at once. Other
+    converters run on first read of the field, so fields which no handler
+    reads are never converted.
+
+    Return :data:`None` if class is not supported. Use ``__init__`` then.
+
+    """
+
+    if not attr.has(cls) or '__slots__' in cls.__dict__:
+        return None
+    fields = attr.fields(cls)
+    if any(
+        not a.init or a.name.startswith('_') or a.name == 'type'
+        for a in fields
+    ):
+        return None
+
+    _global: dict[str, Any] = {
+        'cls': cls,
+        'new': object.__new__,
+        'MISSING': attr.NOTHING,
+        'RAW_KEY': RAW_KEY,
+    }
+    # copy whole payload at once. it keeps unexpected keys as namespace
+    # does, and fields are fixed up in place.
+    lines = [
+        'def decode(type, source):',
+        '    self = new(cls)',
+        '    d = self.__dict__',
+        '    d.update(source)',
+        '    d["type"] = type',
+        '    raw = {}',
+    ]
+    for i, a in enumerate(fields):
+        name = a.name
+        converter = a.converter
+        lazy = (
+            converter is not None
+            and converter not in INLINE_CONVERTERS
+            and name not in eager
+        )
+        # lazy field must not be left in __dict__. it hides descriptor.
+        read = 'pop' if lazy else 'get'
+        if a.default is attr.NOTHING:
+            lines += [
+                f'    v = d.{read}({name!r}, MISSING)',
+                '    if v is MISSING:',
+                '        raise TypeError(',
+                '            "__init__() missing 1 required positional"',
+                f'            " argument: {name!r}"',
+                '        )',
+            ]
+        elif isinstance(a.default, attr.Factory):
+            _global[f'factory_{i}'] = a.default.factory
+            lines += [
+                f'    v = d.{read}({name!r}, MISSING)',
+                '    if v is MISSING:',
+                f'        v = factory_{i}()',
+            ]
+        elif converter is None:
+            _global[f'default_{i}'] = a.default
+            lines.append(f'    d.setdefault({name!r}, default_{i})')
+            continue
+        else:
+            _global[f'default_{i}'] = a.default
+            lines.append(f'    v = d.{read}({name!r}, default_{i})')
+
+        if lazy:
+            setattr(cls, name, LazyField(name, converter))
+            lines.append(f'    raw[{name!r}] = v')
+        elif converter is None:
+            lines.append(f'    d[{name!r}] = v')
+        elif converter not in INLINE_CONVERTERS:
+            _global[f'conv_{i}'] = converter
+            lines.append(f'    d[{name!r}] = conv_{i}(v)')
+        else:
+            type_, optional = INLINE_CONVERTERS[converter]
+            _global[f'type_{i}'] = type_
+            _global[f'conv_{i}'] = converter
+            check = f'v.__class__ is type_{i}'
+            if optional:
+                check = f'v is None or {check}'
+            lines.append(f'    d[{name!r}] = v if {check} else conv_{i}(v)')
+
+    lines += [
+        '    if raw:',
+        '        d[RAW_KEY] = raw',
+        '    return self',
+    ]
+    _local: dict[str, Any] = {}
+    code = '\n'.join(lines) + '\n'
+    eval(compile(code, f'{cls.__qualname__}.decode', 'exec'), _global, _local)
+    return _local['decode']
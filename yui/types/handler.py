@@ -13,6 +13,9 @@ from typing import Union
 import attr
 
 if TYPE_CHECKING:
+    from ..box.injection import InjectionContext
+    from ..box.injection import PLAN_TYPE
+    from ..box.parsers import Parser
     from ..box.tasks import CronTask
 
 
@@ -67,15 +70,21 @@ class Handler:
     doc: Optional[str] = attr.ib(init=False)
     params: Mapping[str, inspect.Parameter] = attr.ib(init=False)
     is_prepared: bool = attr.ib(init=False, default=False)
+    parser: Optional[Parser] = attr.ib(init=False, default=None)
+    plan: PLAN_TYPE = attr.ib(init=False)
 
     def __attrs_post_init__(self):
+        from ..box.injection import make_plan
+
         self.doc = inspect.getdoc(self.f)
         self.params = inspect.signature(self.f).parameters
+        self.plan = make_plan(self.params)
         self.arguments = []
         self.options = []
         self.last_call = {}
 
     def prepare(self):
+        from ..box.parsers import Parser
         from ..box.utils import is_container
 
         for o in self.options:
@@ -104,8 +113,22 @@ class Handler:
                 if is_container(a.type_):
                     a.container_cls = None
                     a.typing_has_container = True
+        self.parser = Parser(self.options, self.arguments)
         self.is_prepared = True
 
+    def invoke(
+        self,
+        context: InjectionContext,
+        kwargs: Optional[dict[str, Any]] = None,
+    ) -> HANDLER_CALL_RETURN_TYPE:
+        """Call handler with kwargs and values injected by plan."""
+
+        if kwargs is None:
+            kwargs = {}
+        for name, provide in self.plan:
+            kwargs[name] = provide(context)
+        return self.f(**kwargs)
+
     def __call__(self, *args, **kwargs) -> HANDLER_CALL_RETURN_TYPE:
         _self = kwargs.pop('_self', None)
         if _self:
@@ -0,0 +1,78 @@
+from collections.abc import Sequence
+from typing import Any
+from typing import Callable
+from typing import Generic
+from typing import Iterable
+from typing import Optional
+from typing import TypeVar
+
+T = TypeVar('T')
+
+
+class LazyList(Sequence, Generic[T]):
+    """List of references which are resolved at first access.
+
+    It keeps raw values (IDs or payloads) and converts all of them when
+    any item is read or :meth:`resolve` is called. Length and :attr:`ids`
+    do not need resolving.
+
+    """
+
+    __slots__ = ('values', 'convert', 'resolved')
+
+    def __init__(
+        self,
+        values: Iterable[Any],
+        convert: Callable[[Any], T],
+    ) -> None:
+        """Initialize"""
+
+        self.values = list(values)
+        self.convert = convert
+        self.resolved: Optional[list[T]] = None
+
+    @property
+    def ids(self) -> list[Optional[str]]:
+        """IDs of references without resolving them."""
+
+        return [get_id(v) for v in self.values]
+
+    @property
+    def is_resolved(self) -> bool:
+        return self.resolved is not None
+
+    def resolve(self) -> list[T]:
+        """Resolve all references and return them."""
+
+        if self.resolved is None:
+            self.resolved = [self.convert(v) for v in self.values]
+        return self.resolved
+
+    def __getitem__(self, index):
+        return self.resolve()[index]
+
+    def __iter__(self):
+        return iter(self.resolve())
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, LazyList):
+            other = other.resolve()
+        if not isinstance(other, list):
+            return NotImplemented
+        return self.resolve() == other
+
+    def __repr__(self) -> str:
+        if self.resolved is None:
+            return f'{type(self).__name__}(ids={self.ids!r})'
+        return f'{type(self).__name__}({self.resolved!r})'
+
+
+def get_id(value) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, dict):
+        return value.get('id')
+    return getattr(value, 'id', None)
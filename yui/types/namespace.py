@@ -1,35 +1,112 @@
+import copy
 import inspect
+import logging
+from collections import Counter
 from functools import partial
+from typing import Any
+from typing import Optional
 from typing import TYPE_CHECKING
 
 import attr
 
+from .lazy import LazyList
 from ..utils.datetime import fromtimestamp
 
 if TYPE_CHECKING:
     from ..bot import Bot
 
 
+#: Default maximum number of unexpected kwargs kept by slotted class.
+EXTRAS_LIMIT = 16
+
+#: Number of unexpected kwargs dropped over the limit, by class name.
+dropped_extras: Counter[str] = Counter()
+
+logger = logging.getLogger(__name__)
+
+
+def pick_extras(cls, kwargs: dict, limit: int):
+    extras = {}
+    dropped = []
+    for key, value in kwargs.items():
+        if hasattr(cls, key):
+            # such as type of event. class already knows it.
+            continue
+        if len(extras) >= limit:
+            dropped.append(key)
+        else:
+            extras[key] = value
+    if dropped:
+        name = cls.__qualname__
+        if not dropped_extras[name]:
+            logger.warning(
+                f'{name} keeps only {limit} unexpected kwargs.'
+                f' dropped: {", ".join(dropped)}'
+            )
+        dropped_extras[name] += len(dropped)
+    return extras or None
+
+
+def getattr_extras(self, name: str):
+    if name != '_extras':
+        extras = self._extras
+        if extras is not None and name in extras:
+            return extras[name]
+    raise AttributeError(
+        f'{type(self).__name__!r} object has no attribute {name!r}'
+    )
+
+
 class Namespace:
-    """Factory of attr.s decorator with supporting unexpected kwargs."""
+    """Factory of attr.s decorator with supporting unexpected kwargs.
+
+    Unexpected kwargs are stored in ``__dict__`` of instance by default.
+    With ``slots=True``, class uses ``__slots__`` and keeps at most
+    ``extras_limit`` unexpected kwargs in ``_extras`` mapping instead.
+    They are still readable as attributes.
+
+    """
 
     _bot: 'Bot'
 
-    def __init__(self, **kwargs):
+    def __init__(
+        self,
+        *,
+        slots: bool = False,
+        extras_limit: int = EXTRAS_LIMIT,
+        **kwargs,
+    ):
         # These params was not supported
         kwargs.pop('maybe_cls', None)
         kwargs.pop('these', None)
         kwargs.pop('repr_ns', None)
-        kwargs.pop('slots', None)  # can not use __slots__ and __dict__ both
 
         if 'auto_attribs' not in kwargs:
             kwargs['auto_attribs'] = True
 
+        self.slots = slots
+        self.extras_limit = extras_limit
         self.kwargs = kwargs
 
     def __call__(self, cls):
+        if self.slots:
+            fields = getattr(cls, '__attrs_attrs__', ())
+            if not any(a.name == '_extras' for a in fields):
+                if '__annotations__' not in cls.__dict__:
+                    cls.__annotations__ = {}
+                cls.__annotations__['_extras'] = Optional[dict[str, Any]]
+                cls._extras = attr.ib(
+                    default=None,
+                    init=False,
+                    repr=False,
+                    eq=False,
+                )
+            if '__getattr__' not in cls.__dict__:
+                cls.__getattr__ = getattr_extras
+
         # At first, apply attr.dataclass to cls
-        cls = attr.s(**self.kwargs)(cls)
+        cls = attr.s(slots=self.slots, **self.kwargs)(cls)
+        cls.__extras_limit__ = self.extras_limit
 
         # Move and keep old init
         cls.__old_init__ = cls.__init__
@@ -57,12 +134,20 @@ class Namespace:
         )
 
         # make new __init__ by eval
-        _global = {}
+        _global = {'pick_extras': pick_extras}
         _local = {}
+        if self.slots:
+            keep_kwargs = """\
+    if _kwargs:
+        self._extras = pick_extras(
+            type(self), _kwargs, self.__extras_limit__
+        )"""
+        else:
+            keep_kwargs = '    self.__dict__.update(_kwargs)'
         code = f"""\
 def __init__{str(new_signature)}:
     self.__old_init__({init_args})
-    self.__dict__.update(_kwargs)
+{keep_kwargs}
 """
         eval(compile(code, cls.__qualname__, 'exec'), _global, _local)
 
@@ -91,13 +176,9 @@ def channel_id_convert(value):
     if id is None:
         return id
 
-    try:
-        objs = {'C': bot.channels, 'D': bot.ims, 'G': bot.groups}[id[0]]
-    except KeyError:
-        raise KeyError('Given Channel ID prefix was not expected.')
-    for obj in objs:
-        if obj.id == id:
-            return obj
+    obj = bot.registry.get_channel_index(id).get(id)
+    if obj is not None:
+        return obj
 
     from .channel import create_unknown_channel  # circular dependency
 
@@ -108,6 +189,37 @@ def channel_id_convert(value):
     return create_unknown_channel(**kwargs)
 
 
+#: Keys which must be in channel payload to build channel object from it.
+CHANNEL_PAYLOAD_KEYS = frozenset({'id', 'name', 'creator'})
+#: Keys which must be in DM payload to build DM object from it.
+IM_PAYLOAD_KEYS = frozenset({'id', 'user'})
+
+
+def channel_payload_convert(value, cls, keys: frozenset[str]):
+    """Build new channel object if given value is channel payload."""
+
+    if isinstance(value, dict) and value.keys() >= keys:
+        return cls(**value)
+    return channel_id_convert(value)
+
+
+def channel_rename_convert(value):
+    """Copy known channel object with new name in given payload."""
+
+    if not isinstance(value, dict):
+        return channel_id_convert(value)
+    channel = channel_id_convert(value.get('id'))
+    if channel is None or channel.is_unknown or 'name' not in value:
+        return channel
+    channel = copy.copy(channel)
+    channel.name = value['name']
+    return channel
+
+
+#: Keys which must be in user payload to build user object without API call.
+USER_PAYLOAD_KEYS = frozenset({'id', 'name', 'team_id'})
+
+
 def user_id_convert(value):
     bot = Namespace._bot
     if value is None:
@@ -119,13 +231,13 @@ def user_id_convert(value):
     if id is None:
         return id
 
-    from .user import create_unknown_user  # circular dependency
-
     if not (id.startswith('U') or id.startswith('W')):
         raise KeyError('Given ID value has unexpected prefix.')
-    for obj in bot.users:
-        if obj.id == id:
-            return obj
+    obj = bot.registry.users.get(id)
+    if obj is not None:
+        return obj
+
+    from .user import create_unknown_user  # circular dependency
 
     if isinstance(value, str):
         kwargs = {'id': value}
@@ -134,6 +246,16 @@ def user_id_convert(value):
     return create_unknown_user(**kwargs)
 
 
+def user_payload_convert(value):
+    """Build new user object if given value is full user payload."""
+
+    if isinstance(value, dict) and value.keys() >= USER_PAYLOAD_KEYS:
+        from .user import User  # circular dependency
+
+        return User(**value)
+    return user_id_convert(value)
+
+
 def id_convert(value):
     if value is None:
         return value
@@ -150,24 +272,21 @@ def id_convert(value):
 
 
 def name_convert(value, type: str = None):
-    bot = Namespace._bot
+    registry = Namespace._bot.registry
 
     if type is None or type == 'channel':
-        for c in bot.channels:
-            if c.name == value:
-                return c
+        if (c := registry.channels.get_by_name(value)) is not None:
+            return c
     if type is None or type == 'ims':
-        for d in bot.ims:
-            if d.user.name == value:
+        if (u := registry.users.get_by_name(value)) is not None:
+            if (d := registry.ims.get_by_name(u.id)) is not None:
                 return d
     if type is None or type == 'groups':
-        for g in bot.groups:
-            if g.name == value:
-                return g
+        if (g := registry.groups.get_by_name(value)) is not None:
+            return g
     if type is None or type == 'users':
-        for u in bot.users:
-            if u.name == value:
-                return u
+        if (u := registry.users.get_by_name(value)) is not None:
+            return u
 
     raise KeyError('Bot did not know given name.')
 
@@ -182,12 +301,21 @@ def list_convert(values, conv):
     return [conv(v) for v in values]
 
 
+def lazy_list_convert(values, conv):
+    if values is None or isinstance(values, LazyList):
+        return values
+    return LazyList(values, conv)
+
+
 # shortcut decorator
 namespace = Namespace()
+slotted_namespace = Namespace(slots=True)
 
 SlackObjectField = partial(attr.ib, converter=id_convert)
 ChannelField = partial(attr.ib, converter=channel_id_convert)
+ChannelRenameField = partial(attr.ib, converter=channel_rename_convert)
 UserField = partial(attr.ib, converter=user_id_convert)
+UserPayloadField = partial(attr.ib, converter=user_payload_convert)
 NameField = partial(attr.ib, repr=True, converter=str)
 IDField = partial(attr.ib, repr=True, converter=str)
 TsField = partial(attr.ib, repr=True, converter=str, default='')
@@ -196,8 +324,17 @@ Field = partial(attr.ib, default=None, repr=False)
 BooleanField = partial(Field, converter=bool)
 
 
+#: Converters which :mod:`yui.types.decoder` knows and inlines.
+optional_int = attr.converters.optional(int)
+optional_str = attr.converters.optional(str)
+OPTIONAL_CONVERTERS = {int: optional_int, str: optional_str}
+
+
 def OptionalField(conv):
-    return partial(Field, converter=attr.converters.optional(conv))
+    converter = OPTIONAL_CONVERTERS.get(conv)
+    if converter is None:
+        converter = attr.converters.optional(conv)
+    return partial(Field, converter=converter)
 
 
 IntegerField = OptionalField(int)
@@ -210,5 +347,16 @@ def ListField(conv):
     return partial(Field, converter=lambda x: list_convert(x, conv))
 
 
-ChannelListField = ListField(channel_id_convert)
-UserListField = ListField(user_id_convert)
+def ChannelPayloadField(cls, keys: frozenset[str] = CHANNEL_PAYLOAD_KEYS):
+    return partial(
+        attr.ib,
+        converter=lambda x: channel_payload_convert(x, cls, keys),
+    )
+
+
+def LazyListField(conv):
+    return partial(Field, converter=lambda x: lazy_list_convert(x, conv))
+
+
+ChannelListField = LazyListField(channel_id_convert)
+UserListField = LazyListField(user_id_convert)
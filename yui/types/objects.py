@@ -7,6 +7,7 @@ from .base import FileID
 from .base import SubteamID
 from .base import TeamID
 from .base import Ts
+from .lazy import LazyList
 from .namespace import BooleanField
 from .namespace import ChannelListField
 from .namespace import DateTimeField
@@ -55,8 +56,8 @@ class File:
 class SubteamPrefs:
     """Prefs of Subteam."""
 
-    channels: list = ChannelListField()
-    groups: list = ChannelListField()
+    channels: LazyList = ChannelListField()
+    groups: LazyList = ChannelListField()
 
 
 @namespace
@@ -78,7 +79,7 @@ class Subteam:
     updated_by: Optional[User] = OptionalUserField()
     deleted_by: Optional[User] = OptionalUserField()
     perfs: SubteamPrefs = Field(converter=SubteamPrefs)
-    users: list[User] = UserListField()
+    users: LazyList[User] = UserListField()
     user_count: str = StringField()
 
 
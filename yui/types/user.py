@@ -7,10 +7,10 @@ from .namespace import Field
 from .namespace import IDField
 from .namespace import NameField
 from .namespace import StringField
-from .namespace import namespace
+from .namespace import slotted_namespace
 
 
-@namespace
+@slotted_namespace
 class UserProfile:
     """Profile of User."""
 
@@ -32,7 +32,7 @@ class UserProfile:
     image_512: str = StringField()
 
 
-@namespace
+@slotted_namespace
 class User:
 
     id: str = IDField()
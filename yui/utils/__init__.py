@@ -8,6 +8,7 @@ from .cast import KNOWN_TYPES
 from .cast import KnownTypesCaster
 from .cast import ListCaster
 from .cast import NewTypeCaster
+from .cast import NOT_MATCHED
 from .cast import NoHandleCaster
 from .cast import NoneType
 from .cast import NoneTypeCaster
@@ -1,4 +1,7 @@
+from functools import partial
 from typing import Any
+from typing import Callable
+from typing import Optional
 from typing import TypeVar
 from typing import Union
 from typing import get_origin
@@ -16,25 +19,82 @@ KNOWN_TYPES = {
 }
 
 
+#: Returned by compiled step of caster if it does not match given value.
+NOT_MATCHED = object()
+
+
 class CastError(Exception):
     pass
 
 
+def identity(value):
+    return value
+
+
+def type_key(t):
+    """Make cache key of type.
+
+    ``Union[int, float]`` equals to ``Union[float, int]`` and ``int | str``,
+    but they are cast in different way. So key keeps order and kind of args.
+
+    """
+
+    args = getattr(t, '__args__', None)
+    if not isinstance(args, tuple) or not args:
+        return t
+    return type(t), get_origin(t), tuple(type_key(a) for a in args)
+
+
 class BaseCaster:
+    #: :meth:`check` depends only on type. Such caster is chosen once per type.
+    type_only = False
+
     def check(self, t, value):
         raise NotImplementedError
 
     def cast(self, caster_box, t, value):
         raise NotImplementedError
 
+    def compile(self, caster_box, t) -> Callable[[Any], Any]:
+        """Make function which converts value into given type.
+
+        It is used only if :meth:`check` was passed.
+
+        """
+
+        return partial(self.cast, caster_box, t)
+
+    def compile_step(self, caster_box, t) -> Optional[Callable[[Any], Any]]:
+        """Make function which converts value if :meth:`check` passes.
+
+        The function returns :data:`NOT_MATCHED` if check was failed.
+        Return :data:`None` if this caster never matches given type.
+
+        """
+
+        check = self.check
+        convert = self.compile(caster_box, t)
+
+        def step(value):
+            if check(t, value):
+                return convert(value)
+            return NOT_MATCHED
+
+        return step
+
 
 class BoolCaster(BaseCaster):
+    type_only = True
+
     def check(self, t, value):
         return t == bool
 
     def cast(self, caster_box, t, value):
         return t(value)
 
+    def compile(self, caster_box, t):
+        return t
+
 
 class KnownTypesCaster(BaseCaster):
     def check(self, t, value):
@@ -49,8 +109,24 @@ class KnownTypesCaster(BaseCaster):
     def cast(self, caster_box, t, value):
         return t(value)
 
+    def compile_step(self, caster_box, t):
+        if t not in KNOWN_TYPES:
+            return None
+
+        def step(value):
+            if value is None:
+                return NOT_MATCHED
+            try:
+                return t(value)
+            except ValueError:
+                return NOT_MATCHED
+
+        return step
+
 
 class TypeVarCaster(BaseCaster):
+    type_only = True
+
     def check(self, t, value):
         return isinstance(t, TypeVar)
 
@@ -66,24 +142,41 @@ class TypeVarCaster(BaseCaster):
         else:
             return value
 
+    def compile(self, caster_box, t):
+        if t.__constraints__:
+            return super().compile(caster_box, t)
+        return identity
+
 
 class NewTypeCaster(BaseCaster):
+    type_only = True
+
     def check(self, t, value):
         return hasattr(t, '__supertype__')
 
     def cast(self, caster_box, t, value):
         return caster_box.cast(t.__supertype__, value)
 
+    def compile(self, caster_box, t):
+        return caster_box.get_caster(t.__supertype__)
+
 
 class AnyCaster(BaseCaster):
+    type_only = True
+
     def check(self, t, value):
         return t == Any
 
     def cast(self, caster_box, t, value):
         return value
 
+    def compile(self, caster_box, t):
+        return identity
+
 
 class UnionCaster(BaseCaster):
+    type_only = True
+
     def check(self, t, value):
         return get_origin(t) == Union
 
@@ -96,8 +189,28 @@ class UnionCaster(BaseCaster):
                 continue
         raise ValueError
 
+    def compile(self, caster_box, t):
+        candidates = [
+            (caster_box.get_checker(ty), caster_box.get_caster(ty))
+            for ty in t.__args__
+        ]
+
+        def cast_union(value):
+            # all checks run before casting like CasterBox.sort
+            casters = [c for check, c in candidates if check(value)]
+            for caster in casters:
+                try:
+                    return caster(value)
+                except CastError:
+                    continue
+            raise ValueError
+
+        return cast_union
+
 
 class TupleCaster(BaseCaster):
+    type_only = True
+
     def check(self, t, value):
         return t == tuple or get_origin(t) == tuple
 
@@ -109,8 +222,16 @@ class TupleCaster(BaseCaster):
         else:
             return tuple(value)
 
+    def compile(self, caster_box, t):
+        if hasattr(t, '__args__') and t.__args__:
+            casters = [caster_box.get_caster(ty) for ty in t.__args__]
+            return lambda value: tuple(c(x) for c, x in zip(casters, value))
+        return tuple
+
 
 class SetCaster(BaseCaster):
+    type_only = True
+
     def check(self, t, value):
         return t == set or get_origin(t) == set
 
@@ -120,8 +241,16 @@ class SetCaster(BaseCaster):
         else:
             return set(value)
 
+    def compile(self, caster_box, t):
+        if hasattr(t, '__args__') and t.__args__:
+            caster = caster_box.get_caster(t.__args__[0])
+            return lambda value: {caster(x) for x in value}
+        return set
+
 
 class ListCaster(BaseCaster):
+    type_only = True
+
     def check(self, t, value):
         return t == list or get_origin(t) == list
 
@@ -131,8 +260,16 @@ class ListCaster(BaseCaster):
         else:
             return list(value)
 
+    def compile(self, caster_box, t):
+        if hasattr(t, '__args__') and t.__args__:
+            caster = caster_box.get_caster(t.__args__[0])
+            return lambda value: [caster(x) for x in value]
+        return list
+
 
 class DictCaster(BaseCaster):
+    type_only = True
+
     def check(self, t, value):
         return t == dict or get_origin(t) == dict
 
@@ -148,6 +285,15 @@ class DictCaster(BaseCaster):
         else:
             return dict(value)
 
+    def compile(self, caster_box, t):
+        if hasattr(t, '__args__') and t.__args__:
+            key_caster = caster_box.get_caster(t.__args__[0])
+            value_caster = caster_box.get_caster(t.__args__[1])
+            return lambda value: {
+                key_caster(k): value_caster(v) for k, v in value.items()
+            }
+        return dict
+
 
 class NoHandleCaster(BaseCaster):
     def check(self, t, value):
@@ -159,26 +305,62 @@ class NoHandleCaster(BaseCaster):
     def cast(self, caster_box, t, value):
         return value
 
+    def compile_step(self, caster_box, t):
+        if not isinstance(t, type):
+            try:
+                isinstance(None, t)
+            except TypeError:
+                # such as list[int]. it can not be used with isinstance.
+                return None
+
+        def step(value):
+            try:
+                matched = isinstance(value, t)
+            except TypeError:
+                return NOT_MATCHED
+            return value if matched else NOT_MATCHED
+
+        return step
+
 
 class NoneTypeCaster(BaseCaster):
+    type_only = True
+
     def check(self, t, value):
         return t == NoneType
 
     def cast(self, caster_box, t, value):
         return None
 
+    def compile(self, caster_box, t):
+        return lambda value: None
+
 
 class AttrCaster(BaseCaster):
+    type_only = True
+
     def check(self, t, value):
         return hasattr(t, '__attrs_attrs__')
 
     def cast(self, caster_box, t, value):
         return t(**value)
 
+    def compile(self, caster_box, t):
+        return lambda value: t(**value)
+
 
 class CasterBox:
+    """Cast value by first caster which matches.
+
+    Each type is resolved once into conversion function by :meth:`compile`.
+    Functions are cached by type.
+
+    """
+
     def __init__(self, caster_box: list[BaseCaster]) -> None:
         self.caster_box = caster_box
+        self.casters: dict[Any, Callable[[Any], Any]] = {}
+        self.checkers: dict[Any, Callable[[Any], bool]] = {}
 
     def __call__(self, t, value):
         return self.cast(t, value)
@@ -186,7 +368,74 @@ class CasterBox:
     def sort(self, types, value):
         return [t for t in types for c in self.caster_box if c.check(t, value)]
 
+    def compile(self, t) -> Callable[[Any], Any]:
+        """Resolve type into function which converts value."""
+
+        steps = []
+        convert = None
+        for caster in self.caster_box:
+            if caster.type_only:
+                if caster.check(t, None):
+                    convert = caster.compile(self, t)
+                    break
+            else:
+                step = caster.compile_step(self, t)
+                if step is not None:
+                    steps.append(step)
+
+        if convert is not None and not steps:
+            return convert
+
+        def cast_value(value):
+            for step in steps:
+                result = step(value)
+                if result is not NOT_MATCHED:
+                    return result
+            if convert is None:
+                raise CastError('Can not find matching caster')
+            return convert(value)
+
+        return cast_value
+
+    def compile_checker(self, t) -> Callable[[Any], bool]:
+        """Make function which tells some caster matches type and value."""
+
+        matched = any(c.check(t, None) for c in self.caster_box if c.type_only)
+        checks = [c.check for c in self.caster_box if not c.type_only]
+
+        def check(value):
+            # run all of them like sort does
+            results = [c(t, value) for c in checks]
+            return matched or any(results)
+
+        return check
+
+    def get_caster(self, t) -> Callable[[Any], Any]:
+        key = type_key(t)
+        try:
+            return self.casters[key]
+        except KeyError:
+            caster = self.casters[key] = self.compile(t)
+            return caster
+        except TypeError:  # unhashable type
+            return partial(self.cast_by_check, t)
+
+    def get_checker(self, t) -> Callable[[Any], bool]:
+        key = type_key(t)
+        try:
+            return self.checkers[key]
+        except KeyError:
+            checker = self.checkers[key] = self.compile_checker(t)
+            return checker
+        except TypeError:  # unhashable type
+            return lambda value: any(
+                [c.check(t, value) for c in self.caster_box]
+            )
+
     def cast(self, t, value):
+        return self.get_caster(t)(value)
+
+    def cast_by_check(self, t, value):
         for caster_box in self.caster_box:
             if caster_box.check(t, value):
                 return caster_box.cast(self, t, value)
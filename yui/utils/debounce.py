@@ -0,0 +1,65 @@
+import asyncio
+import logging
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Debouncer:
+    """Coalesce many requests for running coroutine function into one run.
+
+    First request schedules run of given function after delay. Requests made
+    before the run starts are merged into it.
+
+    """
+
+    def __init__(self) -> None:
+        """Initialize"""
+
+        self.task: Optional[asyncio.Future] = None
+        self.requested = 0
+        self.runs = 0
+
+    @property
+    def pending(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    def schedule(
+        self,
+        delay: float,
+        func: Callable[..., Awaitable[Any]],
+        *args,
+        **kwargs,
+    ) -> asyncio.Future:
+        """Request run. Return task of scheduled run."""
+
+        self.requested += 1
+        if not self.pending:
+            self.task = asyncio.ensure_future(
+                self.run_later(delay, func, *args, **kwargs)
+            )
+        return self.task  # type: ignore
+
+    async def run_later(
+        self,
+        delay: float,
+        func: Callable[..., Awaitable[Any]],
+        *args,
+        **kwargs,
+    ):
+        await asyncio.sleep(delay)
+        # requests made while running need another run
+        self.task = None
+        self.runs += 1
+        try:
+            await func(*args, **kwargs)
+        except Exception:
+            logger.exception(f'Error at running {func!r}')
+
+    def cancel(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
@@ -0,0 +1,364 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import pickle
+import time
+from collections import deque
+from multiprocessing.connection import Connection
+from typing import Any
+from typing import Callable
+from typing import Optional
+from typing import TypeVar
+
+import attr
+
+logger = logging.getLogger(__name__)
+
+R = TypeVar('R')
+
+#: Interval of polling killed worker process until it exits.
+REAP_INTERVAL = 0.01
+#: Size of address space assumed when it can not be measured.
+FALLBACK_ADDRESS_SPACE_SIZE = 1024 * 1024 * 1024
+
+
+class WorkerDied(RuntimeError):
+    """Worker process exited without sending result."""
+
+
+class PoolBusy(RuntimeError):
+    """No worker became free in time."""
+
+
+def get_address_space_size() -> Optional[int]:
+    """Get size of virtual memory of current process in bytes."""
+
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf('SC_PAGE_SIZE')
+
+
+def run_job(
+    func: Callable[..., R],
+    args: tuple,
+    kwargs: dict[str, Any],
+    memory_limit: Optional[int],
+) -> R:
+    """Run job with address space limited to current size + memory_limit.
+
+    If current size can not be measured, :data:`FALLBACK_ADDRESS_SPACE_SIZE`
+    is used instead so that job is never run without limit.
+
+    """
+
+    if memory_limit is None:
+        return func(*args, **kwargs)
+
+    import resource
+
+    size = get_address_space_size()
+    if size is None:
+        size = FALLBACK_ADDRESS_SPACE_SIZE
+    soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+    limit = size + memory_limit
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    try:
+        return func(*args, **kwargs)
+    finally:
+        resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+
+
+def worker_main(conn: Connection, memory_limit: Optional[int]):
+    """Main loop of worker process. ``None`` job stops the loop."""
+
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        func, args, kwargs = job
+        try:
+            result = (True, run_job(func, args, kwargs, memory_limit))
+        except BaseException as e:
+            result = (False, e)
+        try:
+            conn.send(result)
+        except Exception as e:
+            conn.send((False, RuntimeError(f'Can not send result: {e}')))
+
+
+@attr.dataclass(slots=True, eq=False)
+class Worker:
+    """Worker process and pipe to it"""
+
+    process: multiprocessing.Process
+    conn: Connection
+    jobs: int = 0
+
+    def retire(self):
+        """Ask process to stop without waiting it. See :meth:`reap`."""
+
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.conn.close()
+
+    def kill(self):
+        """Kill process without waiting it. See :meth:`reap`."""
+
+        self.conn.close()
+        self.process.kill()
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait process to exit without blocking event loop.
+
+        Return :data:`True` if process exited in time.
+
+        """
+
+        deadline = time.monotonic() + timeout
+        while self.process.is_alive():
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(REAP_INTERVAL)
+        return True
+
+    async def reap(self, timeout: float = 1.0):
+        """Wait process to exit. Kill it if it does not exit in time."""
+
+        if not await self.wait(timeout):
+            logger.warning(f'kill worker {self.process.pid} not exiting')
+            self.process.kill()
+            await self.wait(timeout)
+
+
+@attr.dataclass(slots=True)
+class SandboxStats:
+    """Statistics of :class:`SandboxPool`"""
+
+    jobs: int = 0
+    errors: int = 0
+    killed: int = 0
+    died: int = 0
+    recycled: int = 0
+    spawned: int = 0
+    rejected: int = 0
+
+
+class SandboxPool:
+    """Pool of dedicated worker processes for untrusted jobs.
+
+    Workers are started ahead of jobs. Each job runs with its own memory
+    limit. A worker which overruns deadline of job or is cancelled is killed
+    and replaced at once, and a worker is replaced after ``max_jobs`` jobs.
+
+    """
+
+    def __init__(
+        self,
+        *,
+        size: int = 1,
+        timeout: float = 1.0,
+        max_jobs: int = 100,
+        memory_limit: Optional[int] = None,
+        acquire_timeout: Optional[float] = None,
+    ) -> None:
+        """Initialize
+
+        Job waits free worker for ``acquire_timeout`` seconds, ``timeout``
+        if it is not given, and :exc:`PoolBusy` is raised after that.
+
+        """
+
+        self.size = size
+        self.timeout = timeout
+        self.acquire_timeout = (
+            timeout if acquire_timeout is None else acquire_timeout
+        )
+        self.max_jobs = max_jobs
+        self.memory_limit = memory_limit
+        self.workers: list[Worker] = []
+        self.idle: deque[Worker] = deque()
+        self.waiters: deque[asyncio.Future] = deque()
+        self.reapers: set[asyncio.Future] = set()
+        self.stats = SandboxStats()
+
+    @property
+    def busy(self) -> int:
+        return len(self.workers) - len(self.idle)
+
+    @property
+    def utilization(self) -> float:
+        """Ratio of busy workers."""
+
+        return self.busy / self.size
+
+    def spawn(self) -> Worker:
+        parent_conn, child_conn = multiprocessing.Pipe()
+        process = multiprocessing.Process(
+            target=worker_main,
+            args=(child_conn, self.memory_limit),
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        worker = Worker(process=process, conn=parent_conn)
+        self.workers.append(worker)
+        self.stats.spawned += 1
+        self.release(worker)
+        return worker
+
+    def start(self):
+        """Start workers until pool is full."""
+
+        while len(self.workers) < self.size:
+            self.spawn()
+
+    async def close(self):
+        """Kill all workers and wait them to exit."""
+
+        workers = self.workers
+        self.workers = []
+        self.idle.clear()
+        for worker in workers:
+            worker.kill()
+        await asyncio.gather(
+            *[worker.reap() for worker in workers],
+            *self.reapers,
+        )
+
+    def release(self, worker: Worker):
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(worker)
+                return
+        self.idle.append(worker)
+
+    def replace(self, worker: Worker):
+        self.workers.remove(worker)
+        self.spawn()
+
+    def reap_later(self, worker: Worker):
+        reaper = asyncio.ensure_future(worker.reap())
+        self.reapers.add(reaper)
+        reaper.add_done_callback(self.reapers.discard)
+
+    def discard(self, worker: Worker):
+        """Kill and replace worker. Killed process is reaped in background."""
+
+        worker.kill()
+        self.replace(worker)
+        self.reap_later(worker)
+
+    def recycle(self, worker: Worker):
+        """Retire and replace worker. Process is reaped in background."""
+
+        worker.retire()
+        self.replace(worker)
+        self.reap_later(worker)
+
+    async def acquire(self) -> Worker:
+        """Take free worker. Raise :exc:`PoolBusy` if none is free in time."""
+
+        self.start()
+        if self.idle:
+            return self.idle.popleft()
+        waiter = asyncio.get_event_loop().create_future()
+        self.waiters.append(waiter)
+        try:
+            # asyncio.wait does not cancel waiter, so worker set to it at
+            # the last moment is not lost.
+            await asyncio.wait([waiter], timeout=self.acquire_timeout)
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release(waiter.result())
+            waiter.cancel()
+            raise
+        if waiter.done():
+            return waiter.result()
+        waiter.cancel()
+        self.waiters.remove(waiter)
+        self.stats.rejected += 1
+        raise PoolBusy(f'No worker is free in {self.acquire_timeout} seconds')
+
+    async def receive(self, worker: Worker) -> tuple[bool, Any]:
+        """Receive result from worker without blocking event loop.
+
+        Readable pipe only means that some bytes of result arrived, so
+        :meth:`~multiprocessing.connection.Connection.recv` which reads
+        whole of it runs in executor.
+
+        """
+
+        loop = asyncio.get_event_loop()
+        readable = loop.create_future()
+        fd = worker.conn.fileno()
+
+        def on_readable():
+            if not readable.done():
+                readable.set_result(None)
+
+        loop.add_reader(fd, on_readable)
+        try:
+            await readable
+        finally:
+            loop.remove_reader(fd)
+        return await loop.run_in_executor(None, worker.conn.recv)
+
+    async def run(self, func: Callable[..., R], *args, **kwargs) -> R:
+        """Run function in worker and return its result.
+
+        Raise :exc:`asyncio.TimeoutError` if job is not done in time and
+        :exc:`PoolBusy` if no worker is free in time.
+
+        """
+
+        worker = await self.acquire()
+        try:
+            # pickling error does not touch the pipe, so worker is still fine
+            worker.conn.send((func, args, kwargs))
+        except (pickle.PicklingError, TypeError, AttributeError):
+            self.release(worker)
+            raise
+        except OSError:
+            self.stats.died += 1
+            self.discard(worker)
+            raise WorkerDied(f'Worker died before running {func!r}')
+
+        try:
+            ok, result = await asyncio.wait_for(
+                self.receive(worker),
+                self.timeout,
+            )
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            logger.warning(f'kill worker {worker.process.pid} of {func!r}')
+            self.stats.killed += 1
+            self.discard(worker)
+            raise
+        except (EOFError, OSError):
+            self.stats.died += 1
+            self.discard(worker)
+            raise WorkerDied(f'Worker died while running {func!r}')
+
+        self.stats.jobs += 1
+        worker.jobs += 1
+        if worker.jobs >= self.max_jobs:
+            self.stats.recycled += 1
+            self.recycle(worker)
+        else:
+            self.release(worker)
+
+        if not ok:
+            self.stats.errors += 1
+            raise result
+        return result